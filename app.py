@@ -1,34 +1,100 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse
-import shutil
+from fastapi import FastAPI, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse, PlainTextResponse
 import os
-import tempfile
+import asyncio
 from src.pipeline.pipeline import TrainPipeline
-from src.exception.exception import WordSearchException
+from src.exception.exception import WordSearchException, ResultsNotFoundError
 from src.logging import logger
 from src.components.data_search import DataSearch
+from src.components.search_filter import SearchFilter
+from src.components.model_registry import ModelRegistry
+from src.components.results_store import ResultsStore
+from src.components.page_renderer import PageRenderer
+from src.components.upload_ingestion import UploadIngestion
+from src.entity.config_entity import DataDetectionConfig, UploadIngestionConfig, ConfigEntity
+from src.pipeline.job_manager import JobManager
+from src.constants import SEARCH_MATCH_MODES
+from src.utils.progress import ProgressTracker
+from src.utils.metrics import registry as metrics_registry
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field
+from typing import Literal
 import json
 
+
+def warm_up_model():
+    try:
+        ModelRegistry.warm_up()
+    except Exception as e:
+        logger.logger.error(f"OCR model warm-up failed: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm up the OCR model once per worker process in a thread, so the server starts
+    # answering (readiness reports "loading") while it runs
+    app.state.warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up_model))
+
+    # Background pipeline workers; jobs left running by a dead worker are re-queued on start.
+    # Each job takes the model from the registry when it runs, so a failed warm-up only fails jobs
+    app.state.job_manager = JobManager()
+    app.state.job_manager.start()
+    yield
+    app.state.job_manager.stop()
+
+
 app = FastAPI(
     title="Word Search Pipeline API",
     description="API for processing documents to extract text via OCR and searching for specific words in the extracted text.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+
+@app.get(
+    "/health/ready",
+    summary="Readiness Probe",
+    description="Reports ready only once the OCR model has been loaded and warmed up in this worker, and the warm-up error when it failed."
 )
+async def readiness_api():
+    if not ModelRegistry.is_ready():
+        error = ModelRegistry.last_error()
+        if error is not None:
+            return JSONResponse(status_code=503, content={"status": "failed", "error": error})
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    return JSONResponse(status_code=200, content={"status": "ready"})
+
+
+@app.get(
+    "/metrics",
+    summary="Prometheus Metrics",
+    description="Stage latency histograms and page, word and cache counters of this worker process, in the Prometheus text format."
+)
+async def metrics_api():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 
 @app.post(
     "/run-pipeline",
     summary="Run Document Processing Pipeline",
     description="Processes documents in the specified folder path to convert them to images and perform OCR, generating a JSON file with all detected words."
 )
-async def run_pipeline_api(folder_path: str = Form(..., description="Path to the folder containing documents to process")):
+def run_pipeline_api(
+    folder_path: str = Form(..., description="Path to the folder containing documents to process"),
+    streaming: bool | None = Form(None, description="Overlap conversion, rasterization and OCR instead of running them one after another")
+):
     try:
         logger.logger.info(f"Received folder path: {folder_path}")
         if not os.path.exists(folder_path):
             return JSONResponse(status_code=400, content={"error": "Folder path does not exist"})
         # Ensure logs directory exists
         os.makedirs("logs", exist_ok=True)
-        pipeline = TrainPipeline()
-        transformation_artifact, detection_artifact = pipeline.run_pipeline(folder_path)
+        pipeline = TrainPipeline(model=ModelRegistry.get_model())
+        progress = ProgressTracker()
+        transformation_artifact, detection_artifact = pipeline.run_pipeline(
+            folder_path, streaming=streaming, progress=progress
+        )
         response = {
             "message": "Pipeline executed successfully",
             "data_transformation": {
@@ -37,8 +103,13 @@ async def run_pipeline_api(folder_path: str = Form(..., description="Path to the
             },
             "data_detection": {
                 "annotated_images_folder": detection_artifact.annotated_image_file_path,
-                "detection_results_file": detection_artifact.output_json_file_path
-            }
+                "detection_results_file": detection_artifact.output_json_file_path,
+                "results_store": detection_artifact.results_store_path,
+                # Pages OCR'd, read from the text layer, skipped as blank or reused from an identical page
+                "page_counts": detection_artifact.page_counts
+            },
+            # Per-stage item counts and seconds of this run
+            "timings": progress.timings()
         }
         return JSONResponse(status_code=200, content=response)
     except WordSearchException as e:
@@ -48,30 +119,186 @@ async def run_pipeline_api(folder_path: str = Form(..., description="Path to the
         logger.logger.error(f"Unexpected error: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.post(
+    "/jobs",
+    status_code=202,
+    summary="Queue a Document Processing Pipeline Run",
+    description="Queues a pipeline run for the specified folder path and returns a job id immediately; poll GET /jobs/{job_id} for its progress and result."
+)
+async def create_job_api(
+    folder_path: str = Form(..., description="Path to the folder containing documents to process"),
+    streaming: bool | None = Form(None, description="Overlap conversion, rasterization and OCR instead of running them one after another")
+):
+    try:
+        logger.logger.info(f"Received job for folder path: {folder_path}")
+        if not os.path.exists(folder_path):
+            return JSONResponse(status_code=400, content={"error": "Folder path does not exist"})
+
+        job_id = app.state.job_manager.submit(folder_path, streaming=streaming)
+        return JSONResponse(status_code=202, content={"job_id": job_id, "state": "queued"})
+    except Exception as e:
+        logger.logger.error(f"Unexpected error: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post(
+    "/uploads",
+    status_code=202,
+    summary="Upload Documents and Queue a Pipeline Run",
+    description="Streams the uploaded files straight into a new run's input folder, extracting zip and tar archives as they arrive, and queues the run; poll GET /jobs/{job_id} for its progress and result.",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["files"],
+                        "properties": {
+                            "files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                            "streaming": {"type": "boolean"}
+                        }
+                    }
+                }
+            }
+        }
+    }
+)
+async def upload_documents_api(request: Request):
+    # The body is parsed here instead of through UploadFile so file data is never spooled twice
+    config_entity = ConfigEntity(run_id=TrainPipeline.new_run_id())
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            return JSONResponse(status_code=400, content={"error": "Content-Length must be a non-negative integer"})
+    if config_entity.upload_max_bytes and content_length and content_length > config_entity.upload_max_bytes:
+        return JSONResponse(status_code=413, content={"error": f"Upload exceeds {config_entity.upload_max_bytes} bytes"})
+
+    config = UploadIngestionConfig(config=config_entity)
+    ingestion = UploadIngestion(config)
+    try:
+        ingestion.begin(request.headers.get("content-type"))
+        async for chunk in request.stream():
+            await run_in_threadpool(ingestion.feed, chunk)
+        await run_in_threadpool(ingestion.finalize)
+    except ValueError as e:
+        await run_in_threadpool(ingestion.discard)
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        await run_in_threadpool(ingestion.discard)
+        logger.logger.error(f"Upload failed with error: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+    streaming = ingestion.fields.get("streaming")
+    if streaming is not None:
+        streaming = streaming.strip().lower() in ("1", "true", "yes", "on")
+    job_id = app.state.job_manager.submit(
+        config.input_folder, streaming=streaming, job_id=config.run_id, source=config.manifest_source
+    )
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "state": "queued",
+        "files": ingestion.saved_files,
+        "skipped_files": ingestion.skipped_files
+    })
+
+
+@app.get(
+    "/jobs/{job_id}",
+    summary="Get Pipeline Job Status",
+    description="Reports the state of a queued pipeline run, its per-stage progress (files converted, pages rasterized, pages OCR'd) and, once finished, its result artifact paths."
+)
+async def get_job_api(job_id: str):
+    job = app.state.job_manager.store.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return JSONResponse(status_code=200, content=job)
+
+
 @app.post(
     "/search-word",
     summary="Search for a Word in OCR Results",
-    description="Searches for a specific word in the OCR results JSON file (automatically sourced from artifacts/data_detection/annotated_images/output_json/final_output.json) and returns matching entries."
+    description="Searches for a specific word in the OCR results (automatically sourced from the results store under artifacts/data_detection/annotated_images/results_store) and returns matching entries."
 )
-async def search_word_api(search_word: str = Form(..., description="The word to search for in the OCR results")):
+def search_word_api(
+    search_word: str = Form(..., description="The word to search for in the OCR results"),
+    match_mode: str = Form("any", description="'any' matches terms independently, 'phrase' adjacently in order on one line, 'proximity' near each other on one page"),
+    proximity: int | None = Form(None, ge=0, description="Maximum word distance between terms for proximity queries"),
+    limit: int | None = Form(None, ge=1, description="Return at most this many matches; the response carries a next_cursor for the rest"),
+    cursor: str | None = Form(None, description="next_cursor of the previous page"),
+    response_format: str = Form("json", description="'json' for one response, 'ndjson' to stream one match per line"),
+    count_only: bool = Form(False, description="Only return the number of matches"),
+    document: str | None = Form(None, description="Only search documents with this name or glob, e.g. 'contract_*.pdf'"),
+    page_from: int | None = Form(None, ge=0, description="Only search from this page number on"),
+    page_to: int | None = Form(None, ge=0, description="Only search up to this page number"),
+    min_confidence: float | None = Form(None, ge=0, le=1, description="Only match words recognised with at least this confidence"),
+    region: str | None = Form(None, description="Only match words centred in this page region, 'x_min,y_min,x_max,y_max' relative to the page, e.g. '0,0,1,0.2' for the top fifth")
+):
     try:
         logger.logger.info(f"Received search word: {search_word}")
         if not search_word.strip():
             return JSONResponse(status_code=400, content={"error": "Search word cannot be empty"})
+        if match_mode not in SEARCH_MATCH_MODES:
+            return JSONResponse(status_code=400, content={"error": f"match_mode must be one of {list(SEARCH_MATCH_MODES)}"})
+        if response_format not in ("json", "ndjson"):
+            return JSONResponse(status_code=400, content={"error": "response_format must be 'json' or 'ndjson'"})
+        try:
+            search_filter = SearchFilter(
+                document=document, page_from=page_from, page_to=page_to,
+                min_confidence=min_confidence, region=SearchFilter.parse_region(region)
+            )
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
 
+        # Matches are served from the in-memory cache when the query was seen for the current corpus
         searcher = DataSearch()
-        search_artifact = searcher.initiate_data_search(search_word)
+        if count_only:
+            _, matches = searcher.find_matches(
+                search_word, match_mode=match_mode, proximity=proximity, search_filter=search_filter
+            )
+            return JSONResponse(status_code=200, content={
+                "message": "Search executed successfully",
+                "data_search": {"count": len(matches)}
+            })
+
+        try:
+            store, matches, start, stop, next_cursor = searcher.search_page(
+                search_word, match_mode=match_mode, proximity=proximity, limit=limit, cursor=cursor,
+                search_filter=search_filter
+            )
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
 
-        with open(search_artifact.search_result_file_path, "r", encoding="utf-8") as f:
-            search_results = json.load(f)
+        if response_format == "ndjson":
+            # Records are built while the response is written, so memory stays flat for any hit count
+            lines = (
+                json.dumps(result, ensure_ascii=False) + "\n"
+                for result in DataSearch.iter_results(store, matches, search_word, start, stop)
+            )
+            headers = {"X-Total-Count": str(len(matches))}
+            if next_cursor:
+                headers["X-Next-Cursor"] = next_cursor
+            return StreamingResponse(lines, media_type="application/x-ndjson", headers=headers)
+
+        search_results = list(DataSearch.iter_results(store, matches, search_word, start, stop))
+        if searcher.config.eager_annotation:
+            searcher.annotate_results(store, search_results)
 
         response = {
             "message": "Search executed successfully",
             "data_search": {
-                "results": search_results
+                "results": search_results,
+                "total": len(matches),
+                "next_cursor": next_cursor
             }
         }
         return JSONResponse(status_code=200, content=response)
+    except ResultsNotFoundError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
     except WordSearchException as e:
         logger.logger.error(f"Search failed with error: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -80,6 +307,154 @@ async def search_word_api(search_word: str = Form(..., description="The word to
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+class SearchFilters(BaseModel):
+    document: str | None = Field(None, description="Document name or glob, e.g. 'contract_*.pdf'")
+    page_from: int | None = Field(None, ge=0, description="First page number searched")
+    page_to: int | None = Field(None, ge=0, description="Last page number searched")
+    min_confidence: float | None = Field(None, ge=0, le=1, description="Lowest recognition confidence of a matched word")
+    region: list[float] | None = Field(None, description="[x_min, y_min, x_max, y_max] relative to the page; matched words are centred in it")
+
+    def to_search_filter(self):
+        return SearchFilter(
+            document=self.document, page_from=self.page_from, page_to=self.page_to,
+            min_confidence=self.min_confidence, region=self.region
+        )
+
+
+class BatchSearchQuery(BaseModel):
+    query: str = Field(..., description="Word or words to search for")
+    fuzzy_threshold: int = Field(80, ge=0, le=100, description="Fuzzy match threshold of this query")
+    partial_match: bool = Field(True, description="Also match words containing a query term")
+    match_mode: Literal[SEARCH_MATCH_MODES] = Field("any", description="'any', 'phrase' or 'proximity', as for /search-word")
+    proximity: int | None = Field(None, ge=0, description="Maximum word distance between terms for proximity queries")
+    filters: SearchFilters | None = Field(None, description="Filters of this query, replacing the batch-wide ones")
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[BatchSearchQuery] = Field(..., description="Queries evaluated together, each with its own options")
+    filters: SearchFilters | None = Field(None, description="Filters applied to every query without its own")
+    limit: int | None = Field(None, ge=1, description="Return at most this many matches per query; totals are always exact")
+    count_only: bool = Field(False, description="Only return the number of matches per query")
+
+
+@app.post(
+    "/search/batch",
+    summary="Search for Many Queries at Once",
+    description="Evaluates a list of queries (e.g. a keyword list) against the OCR results in one pass over the search index, sharing term normalization, vocabulary matching and postings between queries, and returns the matches grouped per query in request order."
+)
+def batch_search_api(request: BatchSearchRequest):
+    try:
+        searcher = DataSearch()
+        if not request.queries:
+            return JSONResponse(status_code=400, content={"error": "At least one query is required"})
+        if len(request.queries) > searcher.config.search_batch_max_queries:
+            return JSONResponse(status_code=400, content={
+                "error": f"At most {searcher.config.search_batch_max_queries} queries per batch"
+            })
+        search_filters = []
+        for position, query in enumerate(request.queries):
+            if not query.query.strip():
+                return JSONResponse(status_code=400, content={"error": f"Query {position} is empty"})
+            filters = query.filters or request.filters
+            try:
+                search_filters.append(filters.to_search_filter() if filters is not None else None)
+            except ValueError as e:
+                return JSONResponse(status_code=400, content={"error": f"Query {position}: {str(e)}"})
+        logger.logger.info(f"Received batch search of {len(request.queries)} queries")
+
+        store, batch_matches = searcher.find_matches_batch([
+            {
+                "search_query": query.query,
+                "fuzzy_threshold": query.fuzzy_threshold,
+                "partial_match": query.partial_match,
+                "match_mode": query.match_mode,
+                "proximity": query.proximity,
+                "search_filter": search_filter
+            }
+            for query, search_filter in zip(request.queries, search_filters)
+        ])
+
+        query_results = []
+        for query, matches in zip(request.queries, batch_matches):
+            entry = {"query": query.query, "total": len(matches)}
+            if not request.count_only:
+                stop = len(matches) if request.limit is None else min(request.limit, len(matches))
+                entry["results"] = list(DataSearch.iter_results(store, matches, query.query, 0, stop))
+            query_results.append(entry)
+
+        return JSONResponse(status_code=200, content={
+            "message": "Batch search executed successfully",
+            "data_search": {"queries": query_results}
+        })
+    except ResultsNotFoundError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+    except WordSearchException as e:
+        logger.logger.error(f"Batch search failed with error: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    except Exception as e:
+        logger.logger.error(f"Unexpected error: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get(
+    "/documents/{document}/pages/{page}/annotated",
+    summary="Render an Annotated Page",
+    description="Draws the OCR word boxes on a page image on request; with a query only the matching words are boxed and labelled. Rendered pages are cached in memory."
+)
+def annotated_page_api(
+    document: str,
+    page: int,
+    query: str | None = Query(None, description="Only box the words matching this search query"),
+    fuzzy_threshold: int = Query(80, ge=0, le=100, description="Fuzzy match threshold used with the query"),
+    partial_match: bool = Query(True, description="Also match words containing a query term"),
+    match_mode: str = Query("any", description="Match mode of the query, as for /search-word"),
+    proximity: int | None = Query(None, ge=0, description="Maximum word distance between terms for proximity queries"),
+    max_size: int | None = Query(None, gt=0, description="Downscale to a thumbnail fitting this many pixels per side")
+):
+    try:
+        if match_mode not in SEARCH_MATCH_MODES:
+            return JSONResponse(status_code=400, content={"error": f"match_mode must be one of {list(SEARCH_MATCH_MODES)}"})
+        rendered = PageRenderer().render(
+            document, page, query=query, fuzzy_threshold=fuzzy_threshold,
+            partial_match=partial_match, max_size=max_size, match_mode=match_mode, proximity=proximity
+        )
+        if rendered is None:
+            return JSONResponse(status_code=404, content={"error": "Page not found"})
+        return Response(content=rendered, media_type="image/jpeg")
+    except ResultsNotFoundError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except WordSearchException as e:
+        logger.logger.error(f"Annotation failed with error: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    except Exception as e:
+        logger.logger.error(f"Unexpected error: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get(
+    "/results/export",
+    summary="Export OCR Results as JSON",
+    description="Writes the current OCR results store out as the legacy final_output.json and returns it."
+)
+def export_results_api():
+    try:
+        config = DataDetectionConfig(config=ConfigEntity())
+        store = ResultsStore.load(config.results_store_folder)
+        if store is None:
+            return JSONResponse(status_code=404, content={"error": "No OCR results have been published yet"})
+
+        json_path = store.export_json(os.path.join(config.output_json_folder, "final_output.json"))
+        return FileResponse(json_path, media_type="application/json", filename="final_output.json")
+    except WordSearchException as e:
+        logger.logger.error(f"Export failed with error: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    except Exception as e:
+        logger.logger.error(f"Unexpected error: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
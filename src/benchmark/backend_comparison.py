@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import argparse
+import platform
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+
+from src.constants import ARTIFACTS_FOLDER_PATH
+from src.entity.config_entity import DataDetectionConfig, ConfigEntity
+from src.components.page_preprocessing import PagePreprocessor
+from src.benchmark.synthetic_corpus import SyntheticCorpus
+from src.benchmark.benchmark_runner import latency_summary
+from src.utils.memory_utils import RssSampler, current_rss_mb
+
+# (backend, quantized) pairs compared; the first one is the reference for agreement
+VARIANTS = (("pytorch", False), ("onnx", False), ("onnx", True))
+
+
+def evaluate_backend(backend, quantized, pages, batch_size):
+    """Load one backend in this (fresh) process, OCR the pages and return timings, memory and words read."""
+    from src.components.inference_backend import InferenceBackend
+
+    config = DataDetectionConfig(config=ConfigEntity())
+    config.ocr_backend = backend
+    config.onnx_quantized = quantized
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    model = InferenceBackend.create(config).load()
+    load_seconds = time.perf_counter() - start
+    model([np.full((512, 512, 3), 255, dtype=np.uint8)])
+    model_rss_mb = current_rss_mb() - rss_before
+
+    latencies_ms, words = [], []
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        for first in range(0, len(pages), batch_size):
+            batch = pages[first:first + batch_size]
+            batch_start = time.perf_counter()
+            result = model(batch)
+            latencies_ms.extend([(time.perf_counter() - batch_start) * 1000 / len(batch)] * len(batch))
+            for page in result.pages:
+                words.append([word.value for block in page.blocks for line in block.lines for word in line.words])
+        seconds = time.perf_counter() - start
+
+    return {
+        "load_seconds": load_seconds,
+        "model_rss_mb": model_rss_mb,
+        "peak_rss_mb": sampler.peak_mb,
+        "seconds": seconds,
+        "pages_per_second": len(pages) / seconds if seconds > 0 else None,
+        "latency_ms_per_page": latency_summary(latencies_ms),
+        "words": words
+    }
+
+
+def word_overlap(predicted_pages, reference_pages):
+    """(recall, precision) of predicted words against reference words, matched per page, ignoring case."""
+    matched = predicted = reference = 0
+    for predicted_words, reference_words in zip(predicted_pages, reference_pages):
+        predicted_counts = Counter(word.lower() for word in predicted_words)
+        reference_counts = Counter(word.lower() for word in reference_words)
+        matched += sum((predicted_counts & reference_counts).values())
+        predicted += len(predicted_words)
+        reference += len(reference_words)
+    return (matched / reference if reference else None), (matched / predicted if predicted else None)
+
+
+def compare_backends(pages=8, batch_size=None, seed=0, variants=VARIANTS):
+    """Accuracy against the synthetic ground truth and against the first variant, plus speed and memory."""
+    config = DataDetectionConfig(config=ConfigEntity())
+    batch_size = batch_size or max(1, config.detection_batch_size)
+    corpus = SyntheticCorpus(seed=seed, vocabulary_size=5000)
+    preprocessor = PagePreprocessor(
+        auto_crop=config.preprocess_auto_crop,
+        crop_threshold=config.preprocess_crop_threshold,
+        crop_padding=config.preprocess_crop_padding
+    )
+    labelled = [corpus.labelled_page() for _ in range(pages)]
+    arrays = [preprocessor.prepare(img)[0] for img, _ in labelled]
+    truth = [words for _, words in labelled]
+
+    report = {
+        "environment": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "detection_model": config.data_detection_model,
+            "recognition_model": config.data_recognition_model,
+            "pages": pages,
+            "batch_size": batch_size
+        },
+        "backends": []
+    }
+    reference_words = None
+    for backend, quantized in variants:
+        entry = {"backend": backend, "quantized": quantized}
+        # One fresh process per backend, so memory figures and thread pools don't mix
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            try:
+                result = executor.submit(evaluate_backend, backend, quantized, arrays, batch_size).result()
+            except Exception as e:
+                entry["error"] = str(e)
+                report["backends"].append(entry)
+                continue
+
+        words = result.pop("words")
+        entry.update(result)
+        entry["word_recall"], entry["word_precision"] = word_overlap(words, truth)
+        if reference_words is None:
+            reference_words = words
+        entry["agreement_with_reference"] = word_overlap(words, reference_words)[0]
+        report["backends"].append(entry)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare OCR inference backends for accuracy, speed and memory.")
+    parser.add_argument("--pages", type=int, default=8, help="Synthetic labelled pages to OCR")
+    parser.add_argument("--batch-size", type=int, default=None, help="Pages per predictor call (default DETECTION_BATCH_SIZE)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON report path (default artifacts/benchmark/backends_<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    report = compare_backends(pages=args.pages, batch_size=args.batch_size, seed=args.seed)
+
+    output_path = args.output or os.path.join(
+        ARTIFACTS_FOLDER_PATH, "benchmark", f"backends_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'backend':16s} {'pages/s':>8s} {'p50 ms':>8s} {'model MB':>9s} {'recall':>7s} {'precision':>9s} {'agreement':>9s}")
+    for entry in report["backends"]:
+        name = f"{entry['backend']}{' int8' if entry['quantized'] else ''}"
+        if "error" in entry:
+            print(f"{name:16s} failed: {entry['error']}")
+            continue
+        scores = (entry["word_recall"], entry["word_precision"], entry["agreement_with_reference"])
+        recall, precision, agreement = ("-" if score is None else f"{score:.3f}" for score in scores)
+        print(
+            f"{name:16s} {entry['pages_per_second']:8.2f} {entry['latency_ms_per_page']['p50']:8.1f} "
+            f"{entry['model_rss_mb']:9.0f} {recall:>7s} {precision:>9s} {agreement:>9s}"
+        )
+    print(f"Report written to {output_path}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
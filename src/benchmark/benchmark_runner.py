@@ -0,0 +1,353 @@
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import platform
+import threading
+import subprocess
+from datetime import datetime
+import numpy as np
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.constants import ARTIFACTS_FOLDER_PATH, PROJECT_ROOT
+from src.entity.config_entity import ConfigEntity
+from src.components.data_transformation import DataTransformation
+from src.components.data_detection import DataDetection
+from src.components.page_filter import PageWordCache
+from src.components.data_search import DataSearch
+from src.components.model_registry import ModelRegistry
+from src.benchmark.synthetic_corpus import SyntheticCorpus
+from src.benchmark.stub_predictor import StubPredictor
+from src.utils.memory_utils import RssSampler, peak_rss_mb
+from src.utils.progress import ProgressTracker
+
+STAGES = ("transformation", "detection", "search")
+
+
+def latency_summary(samples_ms):
+    """Percentiles of latency samples in milliseconds."""
+    if not samples_ms:
+        return None
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "count": int(len(samples)),
+        "mean": float(samples.mean()),
+        "p50": float(np.percentile(samples, 50)),
+        "p90": float(np.percentile(samples, 90)),
+        "p99": float(np.percentile(samples, 99)),
+        "max": float(samples.max())
+    }
+
+
+class StageRecorder:
+    """Progress listener timestamping every advance of a stage, for per-item completion intervals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.progress = ProgressTracker(listener=self)
+        self.last = {}
+        self.intervals_ms = {}
+
+    def mark(self, stage):
+        """Start timing `stage` from now."""
+        done = self.progress.snapshot().get(stage, {}).get("done", 0)
+        with self._lock:
+            self.last[stage] = (time.perf_counter(), done)
+            self.intervals_ms[stage] = []
+
+    def __call__(self, snapshot):
+        now = time.perf_counter()
+        with self._lock:
+            for stage, (last_time, last_done) in list(self.last.items()):
+                done = snapshot.get(stage, {}).get("done", 0)
+                if done > last_done:
+                    # A batch advancing several items counts as that many equal intervals
+                    interval = (now - last_time) * 1000 / (done - last_done)
+                    self.intervals_ms[stage].extend([interval] * (done - last_done))
+                    self.last[stage] = (now, done)
+
+
+class BenchmarkRunner:
+    """Time the transformation, detection and search stages on synthetic corpora.
+
+    Everything is written under a throwaway workspace and a dedicated pipeline run, and detection
+    publishes to its own results store, so the published corpus of the deployment is untouched.
+    """
+
+    def __init__(self, workspace, model=None, seed=0):
+        try:
+            self.workspace = workspace
+            shutil.rmtree(workspace, ignore_errors=True)
+            os.makedirs(workspace, exist_ok=True)
+
+            self.model = model
+            self.corpus = SyntheticCorpus(seed=seed)
+            self.random = random.Random(seed)
+            self.config_entity = ConfigEntity(run_id=f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            self.recorder = StageRecorder()
+            self.report = {"environment": self.environment(), "stages": {}}
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    def environment(self):
+        try:
+            revision = subprocess.run(
+                ["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=10
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            revision = None
+        config = ConfigEntity()
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": revision,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "model": type(self.model).__name__ if self.model is not None else None,
+            "ocr_backend": config.ocr_backend,
+            "settings": {
+                "detection_batch_size": config.detection_batch_size,
+                "detection_num_workers": config.detection_num_workers,
+                "conversion_max_workers": config.conversion_max_workers,
+                "raster_dpi": config.raster_dpi,
+                "raster_detection_scale": config.raster_detection_scale,
+                "preprocess_auto_crop": config.preprocess_auto_crop,
+                "raster_thread_count": config.raster_thread_count,
+                "text_layer_enabled": config.text_layer_enabled,
+                "page_filter_enabled": config.page_filter_enabled
+            }
+        }
+
+    def record(self, name, seconds, peak_mb, counts, latencies_ms=None):
+        stage = {
+            "seconds": seconds,
+            "peak_rss_mb": peak_mb,
+            "counts": counts,
+            "throughput": {
+                f"{unit}_per_second": (count / seconds if seconds > 0 else None)
+                for unit, count in counts.items()
+            },
+            "latency_ms": latency_summary(latencies_ms)
+        }
+        self.report["stages"][name] = stage
+        logger.logger.info(f"Benchmark stage {name}: {seconds:.3f}s, {counts}, peak RSS {peak_mb:.1f} MB")
+        return stage
+
+    def timed(self, func, *args, **kwargs):
+        """Run `func`, returning its result, wall seconds and the peak RSS reached meanwhile."""
+        with RssSampler() as sampler:
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            seconds = time.perf_counter() - start
+        return result, seconds, sampler.peak_mb
+
+    def bench_transformation(self, documents, pages_per_document, images):
+        """preprocess_files and render_documents on synthetic PDFs and page images."""
+        input_folder = os.path.join(self.workspace, "input")
+        self.corpus.write_pdfs(input_folder, documents, pages_per_document)
+        self.corpus.write_images(input_folder, images)
+
+        transformer = DataTransformation(
+            data_folder_path=input_folder, progress=self.recorder.progress, config_entity=self.config_entity
+        )
+        tasks = transformer.collect_input_files()
+
+        self.recorder.mark("convert")
+        pdf_paths, seconds, peak_mb = self.timed(transformer.preprocess_files, tasks)
+        self.record("preprocess_files", seconds, peak_mb, {"files": len(pdf_paths)}, self.recorder.intervals_ms["convert"])
+
+        self.recorder.mark("rasterize")
+        _, seconds, peak_mb = self.timed(lambda: sum(1 for _ in transformer.render_documents(pdf_paths)))
+        self.record(
+            "render_documents", seconds, peak_mb,
+            {"pages": len(self.recorder.intervals_ms["rasterize"])}, self.recorder.intervals_ms["rasterize"]
+        )
+        return transformer, pdf_paths
+
+    def bench_detection(self, transformer, pdf_paths):
+        """OCR (detect_documents) and publishing (save_results) of the transformed documents.
+
+        Pages are rendered again into memory while they are OCR'd, as the pipeline does, so the
+        detect_documents time includes rasterization.
+        """
+        detector = DataDetection(model=self.model, progress=self.recorder.progress, config_entity=self.config_entity)
+        detector.config.results_store_folder = os.path.join(self.workspace, "detection_results_store")
+        os.makedirs(detector.config.results_store_folder, exist_ok=True)
+        # Start from an empty page cache, pages cached by earlier runs would skip OCR
+        detector.page_cache = PageWordCache(
+            os.path.join(self.workspace, "page_cache"),
+            max_hash_distance=detector.config.page_hash_max_distance,
+            max_pixel_difference=detector.config.page_pixel_max_difference
+        )
+        if isinstance(self.model, StubPredictor):
+            # Worker processes load the real predictor themselves
+            detector.config.detection_num_workers = 1
+
+        self.recorder.mark("ocr")
+        results, seconds, peak_mb = self.timed(
+            detector.detect_documents, transformer.render_documents(pdf_paths)
+        )
+        pages = len(self.recorder.intervals_ms["ocr"])
+        self.record(
+            "detect_documents", seconds, peak_mb, {"pages": pages, "words": len(results)},
+            self.recorder.intervals_ms["ocr"]
+        )
+
+        _, seconds, peak_mb = self.timed(detector.save_results, results)
+        self.record("save_results", seconds, peak_mb, {"words": len(results)})
+
+    def make_queries(self, store, count):
+        """Mix of common words, rare words, misspellings and two-word phrases taken from the store."""
+        frequencies = np.bincount(np.asarray(store.word_ids), minlength=len(store.tokens))
+        by_frequency = np.argsort(-frequencies, kind="stable")
+        common = [store.tokens[i] for i in by_frequency[:50]]
+        rare = [store.tokens[i] for i in by_frequency[-500:] if frequencies[i] > 0]
+
+        def misspell(word):
+            position = self.random.randrange(len(word))
+            return word[:position] + self.random.choice("abcdefghijklmnopqrstuvwxyz") + word[position + 1:]
+
+        def phrase():
+            row = self.random.randrange(len(store) - 1)
+            return f"{store.tokens[int(store.word_ids[row])]} {store.tokens[int(store.word_ids[row + 1])]}"
+
+        makers = [
+            lambda: ("word", self.random.choice(common)),
+            lambda: ("word", self.random.choice(rare)),
+            lambda: ("word", misspell(self.random.choice(common + rare))),
+            lambda: ("phrase", phrase())
+        ]
+        return [makers[i % len(makers)]() for i in range(count)]
+
+    def run_queries(self, searcher, queries, repeats):
+        latencies_ms, hits = [], 0
+        for _ in range(repeats):
+            for kind, query in queries:
+                start = time.perf_counter()
+                results = searcher.search(query, annotate=False, match_mode="phrase" if kind == "phrase" else "any")
+                latencies_ms.append((time.perf_counter() - start) * 1000)
+                hits += len(results)
+        return latencies_ms, hits
+
+    def bench_search(self, json_words, query_count, repeats):
+        """Import of a synthetic final_output.json, then query latency with and without the cache."""
+        json_path = self.corpus.write_word_records_json(os.path.join(self.workspace, "final_output.json"), json_words)
+
+        searcher = DataSearch()
+        searcher.config.input_json_path = json_path
+        searcher.config.results_store_folder = os.path.join(self.workspace, "search_results_store")
+        searcher.config.search_disk_cache = False
+        os.makedirs(searcher.config.results_store_folder, exist_ok=True)
+
+        store, seconds, peak_mb = self.timed(searcher.load_store)
+        self.record("import_final_output_json", seconds, peak_mb, {"words": len(store)})
+
+        _, seconds, peak_mb = self.timed(lambda: store.index.fuzzy_matcher)
+        self.record("open_search_index", seconds, peak_mb, {"terms": len(store.index.terms)})
+
+        queries = self.make_queries(store, query_count)
+        cache_size = searcher.config.search_cache_size
+
+        searcher.config.search_cache_size = 0
+        (latencies_ms, hits), seconds, peak_mb = self.timed(self.run_queries, searcher, queries, repeats)
+        self.record("search_uncached", seconds, peak_mb, {"queries": len(latencies_ms), "hits": hits}, latencies_ms)
+
+        # The same queries as one batch, as POST /search/batch evaluates them
+        batch = [
+            {"search_query": query, "match_mode": "phrase" if kind == "phrase" else "any"}
+            for kind, query in queries
+        ]
+        (_, batch_matches), seconds, peak_mb = self.timed(searcher.find_matches_batch, batch)
+        self.record(
+            "search_batch_uncached", seconds, peak_mb,
+            {"queries": len(batch), "hits": sum(len(matches) for matches in batch_matches)}
+        )
+
+        searcher.config.search_cache_size = max(cache_size, len(queries))
+        self.run_queries(searcher, queries, 1)
+        (latencies_ms, hits), seconds, peak_mb = self.timed(self.run_queries, searcher, queries, repeats)
+        self.record("search_cached", seconds, peak_mb, {"queries": len(latencies_ms), "hits": hits}, latencies_ms)
+
+    def run(self, stages=STAGES, documents=4, pages_per_document=5, images=4, json_words=1000000,
+            query_count=200, repeats=3):
+        try:
+            if "transformation" in stages or "detection" in stages:
+                transformer, pdf_paths = self.bench_transformation(documents, pages_per_document, images)
+                if "detection" in stages:
+                    self.bench_detection(transformer, pdf_paths)
+            if "search" in stages:
+                self.bench_search(json_words, query_count, repeats)
+
+            self.report["peak_rss_mb"] = peak_rss_mb()
+            self.report["peak_rss_children_mb"] = peak_rss_mb(children=True)
+            return self.report
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+        finally:
+            shutil.rmtree(self.config_entity.run_artifact_folder_path, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the transformation, detection and search stages.")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument("--documents", type=int, default=4, help="Synthetic PDFs to generate")
+    parser.add_argument("--pages-per-document", type=int, default=5)
+    parser.add_argument("--images", type=int, default=4, help="Synthetic page images to generate")
+    parser.add_argument("--json-words", type=int, default=1000000, help="Words in the synthetic final_output.json")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the query set per search stage")
+    parser.add_argument("--model", choices=("stub", "pretrained"), default="stub",
+                        help="'pretrained' loads the configured OCR backend's models, which must be available locally when offline")
+    parser.add_argument("--stub-page-latency", type=float, default=0.0, help="Seconds the stub predictor sleeps per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workspace", default=os.path.join(ARTIFACTS_FOLDER_PATH, "benchmark", "workspace"))
+    parser.add_argument("--output", default=None, help="JSON report path (default artifacts/benchmark/benchmark_<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+
+    model = None
+    if "detection" in stages:
+        model = StubPredictor(page_latency=args.stub_page_latency, seed=args.seed) if args.model == "stub" else ModelRegistry.load()
+
+    runner = BenchmarkRunner(args.workspace, model=model, seed=args.seed)
+    report = runner.run(
+        stages=stages,
+        documents=args.documents,
+        pages_per_document=args.pages_per_document,
+        images=args.images,
+        json_words=args.json_words,
+        query_count=args.queries,
+        repeats=args.repeats
+    )
+
+    output_path = args.output or os.path.join(
+        ARTIFACTS_FOLDER_PATH, "benchmark", f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for name, stage in report["stages"].items():
+        throughput = ", ".join(f"{unit} {value:.1f}" for unit, value in stage["throughput"].items() if value is not None)
+        latency = stage["latency_ms"]
+        latency = f", p50 {latency['p50']:.2f} ms, p99 {latency['p99']:.2f} ms" if latency else ""
+        print(f"{name:28s} {stage['seconds']:9.3f}s  {throughput}{latency}  peak {stage['peak_rss_mb']:.0f} MB")
+    print(f"Report written to {output_path}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
+
+
+#  python -m src.benchmark.benchmark_runner --json-words 2000000  command to run
@@ -0,0 +1,154 @@
+import os
+import sys
+import argparse
+import tempfile
+import numpy as np
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.entity.config_entity import DataDetectionConfig, ConfigEntity
+from src.components.inference_backend import OnnxBackend
+from src.benchmark.synthetic_corpus import SyntheticCorpus
+
+
+def calibration_reader(input_name, batches):
+    """onnxruntime calibration data reader over a list of preprocessed input batches."""
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class BatchReader(CalibrationDataReader):
+        def __init__(self):
+            self.batches = iter(batches)
+
+        def get_next(self):
+            batch = next(self.batches, None)
+            return None if batch is None else {input_name: batch}
+
+    return BatchReader()
+
+
+class OnnxExporter:
+    """Export the configured docTR models to ONNX and quantize them to int8 for the onnx backend.
+
+    Needs torch, docTR with locally cached pretrained weights, onnx and onnxruntime; the API
+    itself only needs OnnxTR afterwards. Activations are calibrated on synthetic pages and word
+    crops run through docTR's own preprocessing, so quantization sees the input ranges the
+    pipeline produces.
+    """
+
+    def __init__(self, output_folder=None, calibration_pages=16, calibration_words=512, seed=0):
+        try:
+            self.config = DataDetectionConfig(config=ConfigEntity())
+            self.output_folder = output_folder or self.config.onnx_models_folder
+            os.makedirs(self.output_folder, exist_ok=True)
+            self.calibration_pages = calibration_pages
+            self.calibration_words = calibration_words
+            self.corpus = SyntheticCorpus(seed=seed, vocabulary_size=5000)
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    @staticmethod
+    def preprocess(model, images, batch_size=1):
+        """Batches of `images` as docTR's predictor feeds them to `model`."""
+        from doctr.models.preprocessor import PreProcessor
+
+        pre_processor = PreProcessor(
+            model.cfg["input_shape"][-2:],
+            batch_size=batch_size,
+            mean=model.cfg["mean"],
+            std=model.cfg["std"],
+            preserve_aspect_ratio=True,
+            symmetric_pad=True
+        )
+        return [batch.numpy() for batch in pre_processor([np.asarray(img) for img in images])]
+
+    def export(self, model, arch):
+        import torch
+        from doctr.models.utils import export_model_to_onnx
+
+        model.eval()
+        dummy_input = torch.rand((1, *model.cfg["input_shape"]), dtype=torch.float32)
+        path = export_model_to_onnx(model, os.path.join(self.output_folder, arch), dummy_input)
+        logger.logger.info(f"Exported {arch} to {path}")
+        return path
+
+    def quantize(self, float_path, int8_path, calibration_batches):
+        import onnxruntime
+        from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+
+        input_name = onnxruntime.InferenceSession(
+            float_path, providers=["CPUExecutionProvider"]
+        ).get_inputs()[0].name
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            prepared_path = os.path.join(tmp_folder, "prepared.onnx")
+            quant_pre_process(float_path, prepared_path)
+            # QDQ with per-channel weights keeps accuracy closest to float; ops without int8 kernels stay float
+            quantize_static(
+                prepared_path,
+                int8_path,
+                calibration_reader(input_name, calibration_batches),
+                quant_format=QuantFormat.QDQ,
+                per_channel=True,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8
+            )
+        logger.logger.info(f"Quantized {float_path} to {int8_path}")
+        return int8_path
+
+    def run(self, quantize=True):
+        """Write <arch>.onnx (and <arch>_int8.onnx) for the configured detection and recognition models."""
+        try:
+            from doctr.models import detection, recognition
+
+            det_arch = self.config.data_detection_model
+            reco_arch = self.config.data_recognition_model
+            written = []
+
+            det_model = getattr(detection, det_arch)(pretrained=True, exportable=True)
+            if det_arch.startswith("fast"):
+                # Fold FAST's re-parameterizable branches like docTR's own predictor does
+                from doctr.models.detection.fast import reparameterize
+                det_model = reparameterize(det_model)
+            written.append(self.export(det_model, det_arch))
+            if quantize:
+                pages = [self.corpus.labelled_page()[0] for _ in range(self.calibration_pages)]
+                written.append(self.quantize(
+                    written[-1], OnnxBackend.model_path(self.output_folder, det_arch, True),
+                    self.preprocess(det_model, pages)
+                ))
+
+            reco_model = getattr(recognition, reco_arch)(pretrained=True, exportable=True)
+            written.append(self.export(reco_model, reco_arch))
+            if quantize:
+                crops = [self.corpus.word_image(word) for word in self.corpus.sample_words(self.calibration_words)]
+                written.append(self.quantize(
+                    written[-1], OnnxBackend.model_path(self.output_folder, reco_arch, True),
+                    self.preprocess(reco_model, crops, batch_size=64)
+                ))
+            return written
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the configured OCR models for the onnx backend.")
+    parser.add_argument("--output-folder", default=None, help="Defaults to ONNX_MODELS_FOLDER")
+    parser.add_argument("--no-quantize", action="store_true", help="Only write the float32 models")
+    parser.add_argument("--calibration-pages", type=int, default=16, help="Synthetic pages used to calibrate detection")
+    parser.add_argument("--calibration-words", type=int, default=512, help="Synthetic word crops used to calibrate recognition")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    exporter = OnnxExporter(
+        output_folder=args.output_folder,
+        calibration_pages=args.calibration_pages,
+        calibration_words=args.calibration_words,
+        seed=args.seed
+    )
+    for path in exporter.run(quantize=not args.no_quantize):
+        print(f"{path}  {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
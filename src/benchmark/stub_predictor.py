@@ -0,0 +1,40 @@
+import time
+from types import SimpleNamespace
+
+from src.benchmark.synthetic_corpus import SyntheticCorpus
+
+
+class StubPredictor:
+    """Stand-in for docTR's ocr_predictor that returns a grid of words without running a model.
+
+    Output mirrors the pages -> blocks -> lines -> words structure DataDetection reads, so the
+    benchmark measures everything around inference. `page_latency` seconds of sleep per page
+    can simulate a model of known cost.
+    """
+
+    def __init__(self, words_per_line=10, lines_per_page=40, page_latency=0.0, seed=0):
+        self.words_per_line = words_per_line
+        self.lines_per_page = lines_per_page
+        self.page_latency = page_latency
+        self.corpus = SyntheticCorpus(seed=seed, vocabulary_size=5000)
+
+    def make_page(self):
+        lines = []
+        for line in range(self.lines_per_page):
+            y_min = (line + 0.2) / self.lines_per_page
+            y_max = (line + 0.8) / self.lines_per_page
+            words = []
+            for position, value in enumerate(self.corpus.sample_words(self.words_per_line)):
+                x_min = (position + 0.1) / self.words_per_line
+                words.append(SimpleNamespace(
+                    value=value,
+                    geometry=((x_min, y_min), (x_min + 0.8 / self.words_per_line, y_max)),
+                    confidence=0.99
+                ))
+            lines.append(SimpleNamespace(words=words))
+        return SimpleNamespace(blocks=[SimpleNamespace(lines=lines)])
+
+    def __call__(self, pages):
+        if self.page_latency:
+            time.sleep(self.page_latency * len(pages))
+        return SimpleNamespace(pages=[self.make_page() for _ in pages])
@@ -0,0 +1,122 @@
+import os
+import json
+import random
+import string
+import itertools
+from PIL import Image, ImageDraw, ImageFont
+
+
+class SyntheticCorpus:
+    """Deterministic benchmark inputs: text page images, multi-page PDFs and OCR word records.
+
+    Words are drawn from a random vocabulary with Zipf-like frequencies, so a few words are very
+    common and most are rare, roughly like real documents.
+    """
+
+    def __init__(self, seed=0, vocabulary_size=50000):
+        self.random = random.Random(seed)
+
+        words = set()
+        while len(words) < vocabulary_size:
+            words.add("".join(
+                self.random.choice(string.ascii_lowercase) for _ in range(self.random.randint(2, 12))
+            ))
+        self.vocabulary = sorted(words)
+        self.random.shuffle(self.vocabulary)
+        # vocabulary[rank] has weight 1 / (rank + 1)
+        self.cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(vocabulary_size)))
+
+    def sample_words(self, count):
+        return self.random.choices(self.vocabulary, cum_weights=self.cum_weights, k=count)
+
+    def page_image(self, size=(1240, 1754), lines=40, words_per_line=8):
+        """A white page with `lines` rows of black vocabulary words."""
+        img = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(img)
+        font = ImageFont.load_default()
+        line_height = (size[1] - 120) // max(1, lines)
+        for line in range(lines):
+            draw.text((60, 60 + line * line_height), " ".join(self.sample_words(words_per_line)), fill="black", font=font)
+        return img
+
+    @staticmethod
+    def ocr_font(font_size):
+        try:
+            return ImageFont.load_default(size=font_size)
+        except TypeError:
+            # Pillow < 10.1 only has the small bitmap font
+            return ImageFont.load_default()
+
+    def labelled_page(self, size=(1240, 1754), lines=30, words_per_line=8, font_size=28):
+        """A page in a font large enough to OCR, returned with its words in reading order for scoring."""
+        img = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(img)
+        font = self.ocr_font(font_size)
+        line_height = (size[1] - 120) // max(1, lines)
+        words = []
+        for line in range(lines):
+            line_words = self.sample_words(words_per_line)
+            draw.text((60, 60 + line * line_height), " ".join(line_words), fill="black", font=font)
+            words.extend(line_words)
+        return img, words
+
+    def word_image(self, word, font_size=28):
+        """A tight white crop around one word, like the crops the recognition model reads."""
+        font = self.ocr_font(font_size)
+        left, top, right, bottom = font.getbbox(word)
+        img = Image.new("RGB", (right - left + 8, bottom - top + 8), "white")
+        ImageDraw.Draw(img).text((4 - left, 4 - top), word, fill="black", font=font)
+        return img
+
+    def write_images(self, folder, count, size=(1240, 1754)):
+        os.makedirs(folder, exist_ok=True)
+        paths = []
+        for i in range(count):
+            path = os.path.join(folder, f"synthetic_image_{i}.png")
+            self.page_image(size).save(path)
+            paths.append(path)
+        return paths
+
+    def write_pdfs(self, folder, documents, pages_per_document, size=(1240, 1754)):
+        os.makedirs(folder, exist_ok=True)
+        paths = []
+        for i in range(documents):
+            path = os.path.join(folder, f"synthetic_document_{i}.pdf")
+            pages = [self.page_image(size) for _ in range(pages_per_document)]
+            pages[0].save(path, "PDF", save_all=True, append_images=pages[1:], resolution=150)
+            paths.append(path)
+        return paths
+
+    def iter_word_records(self, words, words_per_line=10, lines_per_page=40, pages_per_document=20):
+        """Yield `words` OCR word records laid out line by line, page by page, document by document."""
+        words_per_page = words_per_line * lines_per_page
+        words_per_document = words_per_page * pages_per_document
+        for start in range(0, words, words_per_line):
+            line_words = self.sample_words(min(words_per_line, words - start))
+            document = start // words_per_document
+            page = (start % words_per_document) // words_per_page
+            line = (start % words_per_page) // words_per_line
+            y_min = (line + 0.2) / lines_per_page
+            y_max = (line + 0.8) / lines_per_page
+            for position, word in enumerate(line_words):
+                x_min = (position + 0.1) / words_per_line
+                yield {
+                    "document": f"synthetic_document_{document}",
+                    "page_image": f"img_{page + 1}.jpg",
+                    "word": word,
+                    "bounding_box": [x_min, y_min, x_min + 0.8 / words_per_line, y_max],
+                    "confidence": round(self.random.uniform(0.5, 1.0), 4),
+                    "line": line
+                }
+
+    def write_word_records_json(self, json_path, words, **layout):
+        """Write records in the final_output.json format without holding them all in memory."""
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for i, record in enumerate(self.iter_word_records(words, **layout)):
+                if i:
+                    f.write(",")
+                json.dump(record, f)
+            f.write("]")
+        return json_path
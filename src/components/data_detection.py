@@ -1,22 +1,42 @@
 import os
 import sys
 import json
-from PIL import Image, ImageDraw
-from doctr.io import DocumentFile
-from doctr.models import ocr_predictor
+import glob
+import time
+import hashlib
+from collections import deque
+from PIL import Image
 from tqdm import tqdm
 
 from src.exception.exception import WordSearchException
 from src.logging import logger
 from src.entity.config_entity import DataDetectionConfig, ConfigEntity
 from src.entity.artifact_entity import DataDetectionArtifact
+from src.components.model_registry import ModelRegistry
+from src.components.parallel_detection import ParallelDetectionEngine
+from src.components.search_index import SearchIndex
+from src.components.results_store import ResultsStore
+from src.components.page_renderer import PageRenderer
+from src.components.data_transformation import DataTransformation
+from src.components.inference_backend import InferenceBackend
+from src.components.text_layer import TextLayerExtractor
+from src.components.page_preprocessing import PagePreprocessor
+from src.components.page_filter import PageFilter, NearDuplicateIndex, PageWordCache
+from src.components.processing_manifest import ProcessingManifest
+from src.utils.progress import ProgressTracker
+from src.utils.metrics import (
+    OCR_BATCH_SECONDS, OCR_PAGE_SECONDS, TEXT_LAYER_SECONDS, PAGE_FILTER_SECONDS, ANNOTATION_SECONDS,
+    INDEX_BUILD_SECONDS, PAGES_TOTAL, WORDS_TOTAL
+)
 
 
 class DataDetection:
-    def __init__(self):
+    def __init__(self, model=None, progress=None, config_entity: ConfigEntity = None):
         try:
             logger.logger.info("Initializing Data Detection component...")
-            self.config = DataDetectionConfig(config=ConfigEntity())
+            self.config_entity = config_entity or ConfigEntity()
+            self.config = DataDetectionConfig(config=self.config_entity)
+            self.progress = progress or ProgressTracker()
 
             os.makedirs(self.config.annotated_images_folder, exist_ok=True)
             os.makedirs(self.config.output_json_folder, exist_ok=True)
@@ -24,102 +44,414 @@ class DataDetection:
             logger.logger.info(f"Annotated images folder: {self.config.annotated_images_folder}")
             logger.logger.info(f"Output folder: {self.config.output_json_folder}")
 
-            # Initialize OCR model
-            self.model = ocr_predictor(
-                det_arch=self.config.data_detection_model,
-                reco_arch=self.config.data_recognition_model,
-                pretrained=self.config.pretrained,
-                assume_straight_pages=self.config.assume_straight_text,
-                export_as_straight_boxes=self.config.export_as_straingt_boxes
+            # Reuse the process-wide OCR model instead of loading weights per instance
+            self.model = model if model is not None else ModelRegistry.get_model()
+            self.preprocessor = PagePreprocessor(
+                auto_crop=self.config.preprocess_auto_crop,
+                crop_threshold=self.config.preprocess_crop_threshold,
+                crop_padding=self.config.preprocess_crop_padding
             )
+            self.text_layer = TextLayerExtractor(
+                min_words=self.config.text_layer_min_words, timeout=self.config.text_layer_timeout
+            )
+            self.page_filter = None
+            if self.config.page_filter_enabled:
+                self.page_filter = PageFilter(
+                    blank_ink_ratio=self.config.blank_page_ink_ratio, hash_size=self.config.page_hash_size
+                )
+            page_cache_folder = None
+            if self.config.page_cache_folder:
+                page_cache_folder = os.path.join(self.config.page_cache_folder, self.ocr_settings_key())
+            self.page_cache = PageWordCache(
+                page_cache_folder,
+                max_hash_distance=self.config.page_hash_max_distance,
+                max_pixel_difference=self.config.page_pixel_max_difference
+            )
+            # Keys of pages screened but not OCR'd yet, to store their words under once they are
+            self.page_keys = {}
+            # The reverse, so near-duplicates of a page still being OCR'd wait for its words
+            self.pending_pages = NearDuplicateIndex(
+                self.config.page_hash_max_distance, self.config.page_pixel_max_difference
+            )
+            # page id -> (document, page image) of those pages
+            self.pending_jobs = {}
+            # How the words of this run's pages were obtained
+            self.page_counts = {"ocr": 0, "text_layer": 0, "blank": 0, "duplicate": 0}
 
         except Exception as e:
             raise WordSearchException(str(e), sys) from e
 
+    def ocr_settings_key(self):
+        """Short digest of the settings that change what OCR reads from a given page image."""
+        return hashlib.sha256(json.dumps([
+            ProcessingManifest.RECORD_VERSION,
+            self.config.data_detection_model,
+            self.config.data_recognition_model,
+            self.config.pretrained,
+            InferenceBackend.assume_straight_pages(self.config),
+            self.config.export_as_straingt_boxes,
+            self.config.ocr_backend,
+            self.config.onnx_quantized if self.config.ocr_backend == "onnx" else None,
+            self.config.preprocess_auto_crop,
+            self.config.preprocess_crop_threshold,
+            self.config.preprocess_crop_padding,
+            self.config.page_hash_size,
+            PageWordCache.LAYOUT_VERSION
+        ]).encode("utf-8")).hexdigest()[:16]
+
     def annotate_page(self, image_path, words, output_path):
         """Draw bounding boxes on the image for all detected words."""
         with Image.open(image_path) as img:
-            draw = ImageDraw.Draw(img)
-            img_width, img_height = img.size
+            PageRenderer.draw_boxes(img, words)
+            img.save(output_path, "JPEG")
 
-            for word in words:
-                bbox = word['bounding_box']
-                x_min = bbox[0] * img_width
-                y_min = bbox[1] * img_height
-                x_max = bbox[2] * img_width
-                y_max = bbox[3] * img_height
-                draw.rectangle([(x_min, y_min), (x_max, y_max)], outline='red', width=2)
+    def extract_page_words(self, page, doc_name, img_file, crop=None):
+        """Flatten a docTR page into the word records kept in the results store.
 
-            img.save(output_path, "JPEG")
+        Words stay in docTR reading order and keep the page-level index of their text line,
+        which phrase and proximity search rely on. Boxes of an auto-cropped page are mapped
+        back to the whole page.
+        """
+        page_words = []
+        lines = (line for block in page.blocks for line in block.lines)
+        for line_index, line in enumerate(lines):
+            for word in line.words:
+                page_words.append({
+                    "document": doc_name,
+                    "page_image": img_file,
+                    "word": word.value,
+                    "bounding_box": self.preprocessor.remap_box([
+                        word.geometry[0][0],
+                        word.geometry[0][1],
+                        word.geometry[1][0],
+                        word.geometry[1][1]
+                    ], crop),
+                    "confidence": word.confidence,
+                    "line": line_index
+                })
+        return page_words
 
-    def initiate_data_detection(self):
-        """Run OCR on all images from data_transformation and save results."""
+    def text_layer_words(self, lines, doc_name, img_file):
+        """Word records of a page read from the PDF text layer, in the same schema as OCR output."""
+        page_words = []
+        for line_index, line in enumerate(lines):
+            for text, bounding_box in line:
+                page_words.append({
+                    "document": doc_name,
+                    "page_image": img_file,
+                    "word": text,
+                    "bounding_box": bounding_box,
+                    # Embedded text is exact
+                    "confidence": 1.0,
+                    "line": line_index
+                })
+        return page_words
+
+    def document_text_layer(self, pdf_path):
+        """Word records of the pages of a PDF whose text layer replaces OCR, keyed by (document, page_image)."""
+        if not self.config.text_layer_enabled or not os.path.exists(pdf_path):
+            return {}
+
+        doc_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        start = time.perf_counter()
         try:
-            results = []
+            text_pages = self.text_layer.extract(pdf_path)
+        except FileNotFoundError:
+            logger.logger.warning("pdftotext not found, every page goes through OCR")
+            self.config.text_layer_enabled = False
+            return {}
+        except Exception as e:
+            logger.logger.warning(f"Could not read the text layer of {pdf_path}, OCR'ing it instead: {str(e)}")
+            return {}
+        seconds = time.perf_counter() - start
+        TEXT_LAYER_SECONDS.observe(seconds)
+        self.progress.add_time("text_layer", seconds, count=len(text_pages))
 
-            # Path to images from data_transformation
-            images_root = os.path.join(
-                self.config.artifact_folder_path, "data_transformation", "images" #need to add it in constants
-            )
+        pages = {}
+        for page_number, lines in text_pages.items():
+            # Same page image naming as data_transformation's rasterizer
+            img_file = f"img_{page_number}.jpg"
+            pages[(doc_name, img_file)] = self.text_layer_words(lines, doc_name, img_file)
+        PAGES_TOTAL.inc(len(pages), stage="text_layer")
+        self.page_counts["text_layer"] += len(pages)
+        WORDS_TOTAL.inc(sum(len(page_words) for page_words in pages.values()), source="text_layer")
+        if pages:
+            logger.logger.info(f"Read {len(pages)} pages of {doc_name} from the PDF text layer")
+        return pages
 
-            if not os.path.exists(images_root):
-                raise WordSearchException(
-                    f"Images folder not found: {images_root}", sys
-                )
+    def make_batches(self, page_jobs):
+        """Group page jobs into batches bounded by page count and total pixel budget."""
+        batch_size = max(1, self.config.detection_batch_size)
+        pixel_budget = self.config.detection_batch_pixel_budget
 
-            for doc_name in tqdm(os.listdir(images_root), desc="Processing documents"):
-                doc_folder = os.path.join(images_root, doc_name)
-                if not os.path.isdir(doc_folder):
-                    continue
+        batches, batch, batch_pixels = [], [], 0
+        for job in page_jobs:
+            page_pixels = job[3].width * job[3].height if pixel_budget else 0
 
-                logger.logger.info(f"Processing document: {doc_name}")
+            if batch and (len(batch) >= batch_size or (pixel_budget and batch_pixels + page_pixels > pixel_budget)):
+                batches.append(batch)
+                batch, batch_pixels = [], 0
 
-                annotated_doc_folder = os.path.join(
-                    self.config.annotated_images_folder, doc_name
-                )
-                os.makedirs(annotated_doc_folder, exist_ok=True)
-
-                for img_file in sorted(os.listdir(doc_folder)):
-                    img_path = os.path.join(doc_folder, img_file)
-
-                    # Load image into docTR
-                    doc = DocumentFile.from_images(img_path)
-                    ocr_result = self.model(doc)
-
-                    page_words = []
-                    for block in ocr_result.pages[0].blocks:
-                        for line in block.lines:
-                            for word in line.words:
-                                word_data = {
-                                    "document": doc_name,
-                                    "page_image": img_file,
-                                    "word": word.value,
-                                    "bounding_box": [
-                                        word.geometry[0][0],
-                                        word.geometry[0][1],
-                                        word.geometry[1][0],
-                                        word.geometry[1][1]
-                                    ],
-                                    "confidence": word.confidence
-                                }
-                                page_words.append(word_data)
-                                results.append(word_data)
-
-                    # Save annotated image
-                    annotated_img_path = os.path.join(annotated_doc_folder, img_file)
-                    self.annotate_page(img_path, page_words, annotated_img_path)
-
-            # Save all results to JSON
+            batch.append(job)
+            batch_pixels += page_pixels
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def screen_pages(self, page_jobs):
+        """Take blank pages and near-duplicates of an already OCR'd page out of `page_jobs`.
+
+        Returns (jobs still to OCR, [(job, word records)] of pages resolved here, [(job, key)] of
+        near-duplicates of the page `key` among the jobs still to OCR, of this call or an earlier
+        one whose words have not come back yet). Resolved duplicates carry the reused words
+        re-labelled with their own document and page image.
+        """
+        if self.page_filter is None or not page_jobs:
+            return page_jobs, [], []
+
+        start = time.perf_counter()
+        ocr_jobs, screened, duplicates = [], [], []
+        blank = 0
+        for job in page_jobs:
+            is_blank, page_key = self.page_filter.inspect(job[3])
+            if is_blank:
+                screened.append((job, []))
+                blank += 1
+                continue
+            # Close dHash and close downsampled pixels, a page with other words never matches
+            cached_words = self.page_cache.get(page_key)
+            if cached_words is not None:
+                screened.append((job, PageWordCache.relabel(cached_words, job[0], job[1])))
+                continue
+            twin_id = self.pending_pages.find(page_key)
+            if twin_id is not None:
+                duplicates.append((job, self.pending_jobs[twin_id]))
+            else:
+                page_id = PageFilter.page_id(page_key)
+                self.pending_pages.add(page_id, *page_key)
+                self.pending_jobs[page_id] = job[:2]
+                self.page_keys[job[:2]] = page_key
+                ocr_jobs.append(job)
+        seconds = time.perf_counter() - start
+        PAGE_FILTER_SECONDS.observe(seconds)
+        self.progress.add_time("page_filter", seconds, count=len(page_jobs))
+
+        reused = len(page_jobs) - len(ocr_jobs) - blank
+        PAGES_TOTAL.inc(blank, stage="blank")
+        PAGES_TOTAL.inc(reused, stage="duplicate")
+        WORDS_TOTAL.inc(sum(len(page_words) for _, page_words in screened), source="duplicate")
+        self.page_counts["blank"] += blank
+        self.page_counts["duplicate"] += reused
+        return ocr_jobs, screened, duplicates
+
+    def remember_pages(self, batch, batch_words):
+        """Keep the words of freshly OCR'd pages for their later near-duplicates."""
+        for job, page_words in zip(batch, batch_words):
+            page_key = self.page_keys.pop(job[:2], None)
+            if page_key is not None:
+                page_id = PageFilter.page_id(page_key)
+                self.pending_pages.remove(page_id)
+                self.pending_jobs.pop(page_id, None)
+                self.page_cache.put(page_key, page_words)
+
+    def duplicate_words(self, duplicates, pages):
+        """Word records of duplicate pages, copied from their OCR'd twins in `pages`."""
+        words = [PageWordCache.relabel(pages[key], job[0], job[1]) for job, key in duplicates]
+        WORDS_TOTAL.inc(sum(len(page_words) for page_words in words), source="duplicate")
+        return words
+
+    def load_page(self, job):
+        """Predictor input of a page job: the full-resolution page it carries, not its downscaled copy on disk."""
+        return self.preprocessor.prepare(job[3])
+
+    def run_ocr(self, batch):
+        """Run one predictor call over a batch of pages; returns the word records per page and its seconds."""
+        start = time.perf_counter()
+        pages, crops = zip(*(self.load_page(job) for job in batch))
+        ocr_result = self.model(list(pages))
+        seconds = time.perf_counter() - start
+
+        return [
+            self.extract_page_words(page, job[0], job[1], crop)
+            for page, job, crop in zip(ocr_result.pages, batch, crops)
+        ], seconds
+
+    def record_ocr(self, batch, batch_words, seconds):
+        OCR_BATCH_SECONDS.observe(seconds)
+        for _ in batch:
+            OCR_PAGE_SECONDS.observe(seconds / len(batch))
+        PAGES_TOTAL.inc(len(batch), stage="ocr")
+        self.page_counts["ocr"] += len(batch)
+        WORDS_TOTAL.inc(sum(len(page_words) for page_words in batch_words), source="ocr")
+        self.progress.add_time("ocr", seconds, count=len(batch))
+
+    def ocr_batch(self, batch):
+        """OCR a batch of pages in this process and return the word records per page."""
+        batch_words, seconds = self.run_ocr(batch)
+        self.record_ocr(batch, batch_words, seconds)
+        self.remember_pages(batch, batch_words)
+        return batch_words
+
+    def annotate_job(self, job, page_words):
+        """Save the annotated copy of a page job's image, unless pages are only rendered on request."""
+        if not self.config.eager_annotation:
+            return
+        doc_name, img_file, img_path = job[:3]
+        annotated_doc_folder = os.path.join(
+            self.config.annotated_images_folder, doc_name
+        )
+        os.makedirs(annotated_doc_folder, exist_ok=True)
+        annotated_img_path = os.path.join(annotated_doc_folder, img_file)
+        start = time.perf_counter()
+        self.annotate_page(img_path, page_words, annotated_img_path)
+        seconds = time.perf_counter() - start
+        ANNOTATION_SECONDS.observe(seconds, source="detection")
+        self.progress.add_time("annotate", seconds)
+
+    def save_results(self, results, image_folders=None):
+        """Publish all word records as a new results store version and build the detection artifact.
+
+        Callers running concurrently with other pipeline runs hold the publish lock around this.
+        """
+        if image_folders is None:
+            image_folders = {
+                entry["document"]: os.path.join(self.config.images_folder, entry["document"])
+                for entry in results
+            }
+        start = time.perf_counter()
+        store_folder = ResultsStore.write(
+            self.config.results_store_folder, results, image_folders=image_folders, run_id=self.config.run_id
+        )
+        # Searches read this index instead of scanning the results
+        SearchIndex.build(store_folder)
+        ResultsStore.publish(self.config.results_store_folder, store_folder)
+        seconds = time.perf_counter() - start
+        INDEX_BUILD_SECONDS.observe(seconds)
+        self.progress.add_time("publish", seconds)
+
+        logger.logger.info(f"OCR results saved to {store_folder}")
+
+        json_path = None
+        if self.config.export_json_results:
             json_path = os.path.join(self.config.output_json_folder, "final_output.json") # need to add it in constants
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+            ResultsStore.load(self.config.results_store_folder).export_json(json_path)
+
+        return DataDetectionArtifact(
+            annotated_image_file_path=self.config.annotated_images_folder,
+            output_json_file_path=json_path,
+            results_store_path=store_folder,
+            run_id=self.config.run_id,
+            page_counts=dict(self.page_counts)
+        )
+
+    @staticmethod
+    def chunked(page_jobs, chunk_size):
+        chunk = []
+        for job in page_jobs:
+            chunk.append(job)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def detect_documents(self, page_jobs):
+        """Run OCR on the given page jobs and return the word records.
+
+        `page_jobs` are (document, page_image, image_path, decoded page) jobs as yielded by
+        DataTransformation.render_documents; their pages are OCR'd from memory, a few batches
+        at a time, so only those are ever held decoded.
+        """
+        results = []
+        chunk_size = max(1, self.config.detection_batch_size) * max(1, self.config.detection_num_workers)
+
+        pages, page_order, duplicates = {}, [], []
+        # Batches handed to OCR whose words have not come back yet, in order
+        in_flight = deque()
+        text_layer_documents = set()
+        counts = {"text_layer": 0, "skipped": 0, "ocr": 0}
 
-            logger.logger.info(f"OCR results saved to {json_path}")
+        def ocr_batches():
+            for chunk in self.chunked(page_jobs, chunk_size):
+                page_order.extend(job[:2] for job in chunk)
+                self.progress.set_total("ocr", len(page_order))
 
-            return DataDetectionArtifact(
-                annotated_image_file_path=self.config.annotated_images_folder,
-                output_json_file_path=json_path
+                # Pages with a usable embedded text layer skip the model entirely
+                for doc_name in dict.fromkeys(job[0] for job in chunk):
+                    if doc_name not in text_layer_documents:
+                        text_layer_documents.add(doc_name)
+                        pages.update(self.document_text_layer(
+                            os.path.join(self.config.documents_folder, f"{doc_name}.pdf")
+                        ))
+                ocr_jobs = []
+                for job in chunk:
+                    if job[:2] in pages:
+                        self.annotate_job(job, pages[job[:2]])
+                        self.progress.advance("ocr")
+                        counts["text_layer"] += 1
+                    else:
+                        ocr_jobs.append(job)
+
+                # So do blank pages and near-duplicates of a page OCR'd before
+                ocr_jobs, screened, chunk_duplicates = self.screen_pages(ocr_jobs)
+                for job, page_words in screened:
+                    pages[job[:2]] = page_words
+                    self.annotate_job(job, page_words)
+                self.progress.advance("ocr", len(screened))
+                # Rendered pages are dropped here, twins are annotated from their saved copies
+                duplicates.extend((job[:3], key) for job, key in chunk_duplicates)
+                counts["skipped"] += len(screened) + len(chunk_duplicates)
+                counts["ocr"] += len(ocr_jobs)
+
+                for batch in self.make_batches(ocr_jobs):
+                    in_flight.append(batch)
+                    yield batch
+
+        if self.config.detection_num_workers > 1:
+            engine = ParallelDetectionEngine(
+                num_workers=self.config.detection_num_workers,
+                torch_threads=self.config.detection_torch_threads
             )
+            batch_outputs = engine.run(ocr_batches())
+        else:
+            batch_outputs = (self.run_ocr(batch) for batch in ocr_batches())
+
+        for batch_words, seconds in tqdm(batch_outputs, desc="Processing batches"):
+            batch = in_flight.popleft()
+            self.record_ocr(batch, batch_words, seconds)
+            self.remember_pages(batch, batch_words)
+            for job, page_words in zip(batch, batch_words):
+                pages[job[:2]] = page_words
+                self.annotate_job(job, page_words)
+            self.progress.advance("ocr", len(batch))
+
+        for (job, _), page_words in zip(duplicates, self.duplicate_words(duplicates, pages)):
+            pages[job[:2]] = page_words
+            self.annotate_job(job, page_words)
+        self.progress.advance("ocr", len(duplicates))
+
+        logger.logger.info(
+            f"Ran OCR on {counts['ocr']} pages, "
+            f"{counts['text_layer']} pages read from the text layer, "
+            f"{counts['skipped']} blank or duplicate pages skipped"
+        )
+
+        for key in page_order:
+            results.extend(pages[key])
+        return results
+
+    def initiate_data_detection(self):
+        """Render and OCR all converted PDFs from data_transformation and save results."""
+        try:
+            documents_folder = self.config.documents_folder
+            if not os.path.exists(documents_folder):
+                raise FileNotFoundError(f"Documents folder not found: {documents_folder}")
+
+            pdf_paths = sorted(glob.glob(os.path.join(documents_folder, "*.pdf")))
+            transformer = DataTransformation(progress=self.progress, config_entity=self.config_entity)
+            results = self.detect_documents(transformer.render_documents(pdf_paths))
+            return self.save_results(results)
 
         except Exception as e:
             raise WordSearchException(str(e), sys) from e
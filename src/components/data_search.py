@@ -1,12 +1,19 @@
 import os
 import sys
 import json
-from PIL import Image, ImageDraw
-from fuzzywuzzy import fuzz
-from src.exception.exception import WordSearchException
+import base64
+from PIL import Image
+from src.exception.exception import WordSearchException, ResultsNotFoundError
 from src.logging import logger
 from src.entity.config_entity import DataSearchConfig, ConfigEntity
 from src.entity.artifact_entity import DataSearchArtifact
+from src.components.search_index import SearchIndex
+from src.components.results_store import ResultsStore
+from src.components.page_renderer import PageRenderer
+from src.components.phrase_matcher import PhraseMatcher
+from src.components.search_cache import SearchCache
+from src.components.search_filter import SearchFilter
+from src.utils.metrics import SEARCH_MATCH_SECONDS, ANNOTATION_SECONDS, CACHE_REQUESTS_TOTAL
 
 
 class DataSearch:
@@ -26,98 +33,300 @@ class DataSearch:
         """Draw bounding boxes on the image for matched words only."""
         try:
             with Image.open(image_path) as img:
-                draw = ImageDraw.Draw(img)
-                img_width, img_height = img.size
-
-                for word in words:
-                    bbox = word['bounding_box']
-                    x_min = bbox[0] * img_width
-                    y_min = bbox[1] * img_height
-                    x_max = bbox[2] * img_width
-                    y_max = bbox[3] * img_height
-                    draw.rectangle([(x_min, y_min), (x_max, y_max)], outline='red', width=2)
-                    # Optionally, add text label for matched word
-                    draw.text((x_min, y_min - 10), word['word'], fill='red')
-
+                # Text label for each matched word
+                PageRenderer.draw_boxes(img, words, label=True)
                 img.save(output_path, "JPEG")
                 logger.logger.info(f"Annotated image saved to {output_path}")
 
         except Exception as e:
             raise WordSearchException(f"Failed to annotate image: {str(e)}", sys) from e
 
-    def initiate_data_search(self, search_query: str, fuzzy_threshold: int = 80, partial_match: bool = True):
-        """Search for words in the OCR results JSON with dynamic matching options."""
-        try:
-            input_json_path = self.config.input_json_path
-            if not os.path.exists(input_json_path):
-                raise WordSearchException(
-                    f"OCR results JSON not found: {input_json_path}", sys
-                )
-
-            with open(input_json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            # Split search query into individual terms
-            search_terms = search_query.strip().split()
-            results = []
-            annotated_images = {}
-
-            for entry in data:
-                entry_word = entry["word"].lower()
-                document = entry["document"]
-                if not document.endswith(".pdf"):
-                    document += ".pdf"
-                page_str = entry["page_image"].split("_")[1].split(".")[0]
-                page = int(page_str)
-
-                # Check each search term
-                for term in search_terms:
-                    term_lower = term.lower()
-                    match = False
-
-                    # Exact or partial match
-                    if partial_match and term_lower in entry_word:
-                        match = True
-                    # Fuzzy match
-                    elif fuzz.ratio(term_lower, entry_word) >= fuzzy_threshold:
-                        match = True
-
-                    if match:
-                        result = {
-                            "document": document,
-                            "page": page,
-                            "word": entry["word"],
-                            "bounding_box": entry["bounding_box"],
-                            "confidence": entry["confidence"],
-                            "matched_term": term  # Track which term matched
-                        }
-                        results.append(result)
-
-                        # Track images for annotation
-                        image_key = (document, page)
-                        if image_key not in annotated_images:
-                            annotated_images[image_key] = []
-                        annotated_images[image_key].append(result)
-
-            # Generate annotated images for matched words
-            images_root = os.path.join(
-                self.config.artifact_folder_path, "data_transformation", "images"
+    def load_store(self):
+        """Return the process-wide results store, importing a legacy final_output.json if needed."""
+        store = ResultsStore.load(self.config.results_store_folder)
+        if store is not None:
+            return store
+
+        input_json_path = self.config.input_json_path
+        if not os.path.exists(input_json_path):
+            raise ResultsNotFoundError(f"OCR results not found: {self.config.results_store_folder}")
+
+        logger.logger.info(f"No results store found, importing {input_json_path}")
+        with open(input_json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        store_folder = ResultsStore.write(self.config.results_store_folder, data)
+        SearchIndex.build(store_folder)
+        ResultsStore.publish(self.config.results_store_folder, store_folder)
+        return ResultsStore.load(self.config.results_store_folder)
+
+    def match_term_rows(self, store, term_queries, search_filter: SearchFilter = None):
+        """Rows matching each (term, fuzzy_threshold, partial_match), limited to rows passing `search_filter`.
+
+        Selective filters are resolved to their rows first and only those are searched; broad
+        ones cost less applied to the postings of the matched terms.
+        """
+        if not search_filter:
+            return store.index.match_rows_many(term_queries)
+        candidate_rows = search_filter.candidate_rows(store, self.config.search_filter_scan_ratio)
+        if candidate_rows is not None:
+            return store.index.match_rows_many(term_queries, candidate_rows)
+        page_ids = search_filter.page_ids(store)
+        return [search_filter.apply(store, rows, page_ids) for rows in store.index.match_rows_many(term_queries)]
+
+    def match_rows(self, store, search_terms, fuzzy_threshold, partial_match, match_mode, proximity,
+                   search_filter: SearchFilter = None):
+        """(row, term_position) pairs of the store matching the query terms, in store order."""
+        # Exact or partial match, else fuzzy match; scored once per distinct term, then expanded to postings
+        term_rows = self.match_term_rows(
+            store, [(term, fuzzy_threshold, partial_match) for term in search_terms], search_filter
+        )
+        return self.combine_term_rows(store, term_rows, match_mode, proximity)
+
+    @staticmethod
+    def cache_key(search_query, fuzzy_threshold, partial_match, match_mode, proximity, search_filter=None):
+        options = {
+            "fuzzy_threshold": fuzzy_threshold,
+            "partial_match": partial_match,
+            "match_mode": match_mode,
+            "proximity": proximity if match_mode == "proximity" else None
+        }
+        if search_filter:
+            options["filters"] = search_filter.options()
+        return SearchCache.make_key(search_query, **options)
+
+    @staticmethod
+    def combine_term_rows(store, term_rows, match_mode, proximity):
+        """Sorted (row, term_position) matches of a query from the matching rows of each of its terms."""
+        return PhraseMatcher(store).combine(term_rows, match_mode, proximity)
+
+    def annotate_results(self, store, results):
+        """Write an annotated copy of every page with matches to the data_search folder."""
+        renderer = PageRenderer(self.config)
+        annotated_images = {}
+        for result in results:
+            annotated_images.setdefault((result["document"], result["page"]), []).append(result)
+
+        for (document, page), matched_words in annotated_images.items():
+            page_id = renderer.resolve_page(store, document, page)
+            if page_id is None:
+                continue
+            # Page images live in the workspace of the run that rendered them
+            img_path = renderer.page_image_path(store, page_id)
+            if not os.path.exists(img_path):
+                logger.logger.warning(f"Image not found: {img_path}")
+                continue
+
+            annotated_doc_folder = os.path.join(
+                self.config.data_search_folder_path, "annotated_images", document.replace(".pdf", "")
             )
-            for (document, page), matched_words in annotated_images.items():
-                doc_folder = os.path.join(images_root, document.replace(".pdf", ""))
-                img_file = f"img_{page}.jpg"
-                img_path = os.path.join(doc_folder, img_file)
-                if not os.path.exists(img_path):
-                    logger.logger.warning(f"Image not found: {img_path}")
-                    continue
-
-                annotated_doc_folder = os.path.join(
-                    self.config.data_search_folder_path, "annotated_images", document.replace(".pdf", "")
-                )
-                os.makedirs(annotated_doc_folder, exist_ok=True)
-                annotated_img_path = os.path.join(annotated_doc_folder, img_file)
+            os.makedirs(annotated_doc_folder, exist_ok=True)
+            annotated_img_path = os.path.join(annotated_doc_folder, f"img_{page}.jpg")
+            with ANNOTATION_SECONDS.time(source="search"):
                 self.annotate_page(img_path, matched_words, annotated_img_path)
 
+    def find_matches(self, search_query: str, fuzzy_threshold: int = 80, partial_match: bool = True,
+                     match_mode: str = "any", proximity: int = None, search_filter: SearchFilter = None):
+        """Return the store and the sorted (row, term_position) matches of a query.
+
+        `match_mode` "any" returns every match of every term; "phrase" only terms appearing
+        adjacently, in order, on one line; "proximity" only terms within `proximity` words
+        (default SEARCH_PROXIMITY_WORDS) of each other on one page. With `search_filter` only
+        words passing its document, page, confidence and region predicates match.
+
+        Matches are cached per results store version as compact row pairs, so every page,
+        stream or count of a repeated query is served without matching again. Raises ValueError
+        for an unknown match mode and ResultsNotFoundError when no results exist.
+        """
+        if match_mode not in self.config.search_match_modes:
+            raise ValueError(f"Unknown match mode: {match_mode}")
+        if proximity is None:
+            proximity = self.config.search_proximity_words
+        try:
+            store = self.load_store()
+
+            cache = SearchCache(self.config)
+            cache_key = self.cache_key(search_query, fuzzy_threshold, partial_match, match_mode, proximity, search_filter)
+            matches = cache.get(store.version, cache_key)
+
+            if matches is None:
+                CACHE_REQUESTS_TOTAL.inc(cache="search", result="miss")
+                # Split search query into individual terms
+                search_terms = search_query.strip().split()
+                with SEARCH_MATCH_SECONDS.time(match_mode=match_mode):
+                    matches = self.match_rows(
+                        store, search_terms, fuzzy_threshold, partial_match, match_mode, proximity, search_filter
+                    )
+                cache.put(store.version, cache_key, matches)
+            else:
+                CACHE_REQUESTS_TOTAL.inc(cache="search", result="hit")
+                logger.logger.info(f"Search cache hit for '{search_query}'")
+
+            return store, matches
+
+        except (WordSearchException, ResultsNotFoundError):
+            raise
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    def find_matches_batch(self, queries):
+        """Return the store and the sorted matches of each of many queries, evaluated together.
+
+        `queries` are dicts with find_matches' arguments: "search_query" and optionally
+        "fuzzy_threshold", "partial_match", "match_mode", "proximity" and "search_filter". Cached
+        queries are served from the cache; the terms of all others are matched against the
+        vocabulary in one SearchIndex.match_rows_many call per distinct filter, so normalization,
+        candidate generation and postings are shared by every query using a term.
+        """
+        options = []
+        for query in queries:
+            match_mode = query.get("match_mode") or "any"
+            if match_mode not in self.config.search_match_modes:
+                raise ValueError(f"Unknown match mode: {match_mode}")
+            proximity = query.get("proximity")
+            if proximity is None:
+                proximity = self.config.search_proximity_words
+            fuzzy_threshold = query.get("fuzzy_threshold")
+            partial_match = query.get("partial_match")
+            options.append((
+                query["search_query"],
+                80 if fuzzy_threshold is None else fuzzy_threshold,
+                True if partial_match is None else partial_match,
+                match_mode,
+                proximity,
+                query.get("search_filter")
+            ))
+        try:
+            store = self.load_store()
+
+            cache = SearchCache(self.config)
+            cache_keys = [self.cache_key(*query_options) for query_options in options]
+            results = [cache.get(store.version, cache_key) for cache_key in cache_keys]
+            pending = [i for i, matches in enumerate(results) if matches is None]
+            CACHE_REQUESTS_TOTAL.inc(len(results) - len(pending), cache="search", result="hit")
+            CACHE_REQUESTS_TOTAL.inc(len(pending), cache="search", result="miss")
+            if not pending:
+                return store, results
+
+            search_terms = {i: options[i][0].strip().split() for i in pending}
+            # Queries sharing a filter share its candidate rows too
+            by_filter = {}
+            for i in pending:
+                search_filter = options[i][5]
+                filter_key = json.dumps(search_filter.options(), sort_keys=True) if search_filter else None
+                by_filter.setdefault(filter_key, (search_filter, []))[1].append(i)
+
+            with SEARCH_MATCH_SECONDS.time(match_mode="batch"):
+                for search_filter, group in by_filter.values():
+                    term_rows = iter(self.match_term_rows(store, [
+                        (term, options[i][1], options[i][2]) for i in group for term in search_terms[i]
+                    ], search_filter))
+                    for i in group:
+                        rows = [next(term_rows) for _ in search_terms[i]]
+                        results[i] = self.combine_term_rows(store, rows, options[i][3], options[i][4])
+                        cache.put(store.version, cache_keys[i], results[i])
+
+            logger.logger.info(f"Batch search: {len(pending)} of {len(results)} queries evaluated, the rest cached")
+            return store, results
+
+        except (WordSearchException, ResultsNotFoundError):
+            raise
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    @staticmethod
+    def iter_results(store, matches, search_query, start=0, stop=None):
+        """Build the result records of matches[start:stop] one at a time."""
+        search_terms = search_query.strip().split()
+        stop = len(matches) if stop is None else min(stop, len(matches))
+        for i in range(start, stop):
+            row, term_position = matches[i]
+            entry = store.entry(row)
+            document = entry["document"]
+            if not document.endswith(".pdf"):
+                document += ".pdf"
+            page_str = entry["page_image"].split("_")[1].split(".")[0]
+            page = int(page_str)
+
+            yield {
+                "document": document,
+                "page": page,
+                "word": entry["word"],
+                "bounding_box": entry["bounding_box"],
+                "confidence": entry["confidence"],
+                "matched_term": search_terms[term_position]  # Track which term matched
+            }
+
+    @staticmethod
+    def encode_cursor(version, offset):
+        return base64.urlsafe_b64encode(json.dumps([version, offset]).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor, version):
+        """Offset of a cursor, raising ValueError if it is malformed or from another corpus version."""
+        if not cursor:
+            return 0
+        try:
+            cursor_version, offset = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            offset = int(offset)
+        except Exception as e:
+            raise ValueError("Invalid cursor") from e
+        if cursor_version != version:
+            raise ValueError("Cursor belongs to an older version of the OCR results, restart the search")
+        if offset < 0:
+            raise ValueError("Invalid cursor")
+        return offset
+
+    def search_page(self, search_query: str, fuzzy_threshold: int = 80, partial_match: bool = True,
+                    match_mode: str = "any", proximity: int = None, limit: int = None, cursor: str = None,
+                    search_filter: SearchFilter = None):
+        """Return (store, matches, start, stop, next_cursor) for one page of a query's matches.
+
+        `cursor` is the opaque next_cursor of the previous page. Callers build only the page's
+        records, with iter_results(store, matches, search_query, start, stop).
+        """
+        store, matches = self.find_matches(
+            search_query, fuzzy_threshold, partial_match, match_mode, proximity, search_filter
+        )
+        start = self.decode_cursor(cursor, store.version)
+        stop = len(matches) if limit is None else min(start + limit, len(matches))
+        next_cursor = self.encode_cursor(store.version, stop) if stop < len(matches) else None
+        return store, matches, start, stop, next_cursor
+
+    def search(self, search_query: str, fuzzy_threshold: int = 80, partial_match: bool = True,
+               annotate: bool = None, match_mode: str = "any", proximity: int = None,
+               search_filter: SearchFilter = None):
+        """Search for words in the OCR results store and return all matching word records.
+
+        Annotated page images are only written when `annotate` (default EAGER_ANNOTATION) is set;
+        otherwise clients render them on request through PageRenderer.
+        """
+        try:
+            if annotate is None:
+                annotate = self.config.eager_annotation
+            store, matches = self.find_matches(
+                search_query, fuzzy_threshold, partial_match, match_mode, proximity, search_filter
+            )
+            results = list(self.iter_results(store, matches, search_query))
+
+            if annotate:
+                self.annotate_results(store, results)
+
+            return results
+
+        except (WordSearchException, ResultsNotFoundError):
+            raise
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    def initiate_data_search(self, search_query: str, fuzzy_threshold: int = 80, partial_match: bool = True,
+                             annotate: bool = None, match_mode: str = "any", proximity: int = None,
+                             search_filter: SearchFilter = None):
+        """Search the OCR results store and save the matches to search_{query}.json."""
+        try:
+            results = self.search(
+                search_query, fuzzy_threshold, partial_match, annotate, match_mode, proximity, search_filter
+            )
+
             # Save search results to JSON
             search_query_safe = search_query.replace(" ", "_")
             output_json_path = os.path.join(
@@ -129,8 +338,9 @@ class DataSearch:
             logger.logger.info(f"Search results saved to {output_json_path}")
 
             return DataSearchArtifact(
-                search_result_file_path=output_json_path
+                search_result_file_path=output_json_path,
+                run_id=self.load_store().run_id
             )
 
         except Exception as e:
-            raise WordSearchException(str(e), sys) from e
\ No newline at end of file
+            raise WordSearchException(str(e), sys) from e
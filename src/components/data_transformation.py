@@ -1,92 +1,161 @@
 import os
 import sys
 import glob
+import time
 import shutil
+import tempfile
 import subprocess
+from collections import Counter
 from PIL import Image
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 
 from src.exception.exception import WordSearchException
 from src.logging import logger
 from src.entity.config_entity import DataTransformationConfig, ConfigEntity
 from src.entity.artifact_entity import DataTransformationArtifact
+from src.components.document_conversion import ConversionScheduler
+from src.utils.memory_utils import peak_rss_mb
+from src.utils.progress import ProgressTracker
+from src.utils.metrics import CONVERSION_SECONDS, FILES_TOTAL, RASTERIZE_PAGE_SECONDS, PAGES_TOTAL
 
 
 
 class DataTransformation:
-    def __init__(self, data_folder_path=None):
+    def __init__(self, data_folder_path=None, progress=None, config_entity: ConfigEntity = None):
         
         try:
             logger.logger.info("Initializing Data Transformation component...")
-            self.config = DataTransformationConfig(config=ConfigEntity())
+            self.config = DataTransformationConfig(config=config_entity or ConfigEntity())
+            self.progress = progress or ProgressTracker()
 
             if data_folder_path:
                 self.config.data_folder_path = data_folder_path
 
+            self.scheduler = ConversionScheduler(
+                max_workers=self.config.conversion_max_workers,
+                timeout=self.config.conversion_timeout,
+                profiles_root=self.config.libreoffice_profiles_folder
+            )
+
             logger.logger.info(f"Documents folder: {self.config.documents_folder}")
             logger.logger.info(f"Images folder: {self.config.images_folder}")
 
         except Exception as e:
             raise WordSearchException(str(e), sys) from e
 
-    def preprocess_files(self):
+    def convert_file(self, task):
+        """Convert a single input file to PDF; returns the PDF path or None if it was skipped."""
+        file_path, ext, doc_name = task
+        pdf_path = os.path.join(self.config.documents_folder, f"{doc_name}.pdf")
+        kind = "document" if ext in self.config.supported_doc_extenctions else (
+            "image" if ext in self.config.supported_img_extenctions else ext
+        )
+        outcome = "failed"
+        start = time.perf_counter()
+
+        try:
+            if ext in self.config.supported_doc_extenctions:
+                logger.logger.info(f"Converting {file_path} to PDF via LibreOffice...")
+                # LibreOffice names its output after the file; convert apart, then move it to the document name
+                outdir = tempfile.mkdtemp(dir=self.config.documents_folder)
+                try:
+                    self.scheduler.convert_to_pdf(file_path, outdir)
+                    base_name = os.path.splitext(os.path.basename(file_path))[0]
+                    os.replace(os.path.join(outdir, f"{base_name}.pdf"), pdf_path)
+                finally:
+                    shutil.rmtree(outdir, ignore_errors=True)
+
+            elif ext in self.config.supported_img_extenctions:
+                logger.logger.info(f"Converting image {file_path} to PDF...")
+                with Image.open(file_path) as img:
+                    rgb_img = img.convert("RGB")
+                    rgb_img.save(pdf_path)
+
+            elif ext == "pdf":
+                logger.logger.info(f"Copying existing PDF {file_path}...")
+                shutil.copy(file_path, pdf_path)
+
+            else:
+                logger.logger.warning(f"Unsupported file skipped: {file_path}")
+                outcome = "skipped"
+                return None
+
+            logger.logger.info(f"Processed: {file_path}")
+            outcome = "converted"
+            return pdf_path
+
+        except subprocess.CalledProcessError as e:
+            logger.logger.error(
+                f"LibreOffice failed for {file_path}: {e.stderr.decode()}"
+            )
+        except subprocess.TimeoutExpired:
+            outcome = "timeout"
+            logger.logger.error(
+                f"LibreOffice timed out after {self.scheduler.timeout}s for {file_path}"
+            )
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+        finally:
+            seconds = time.perf_counter() - start
+            CONVERSION_SECONDS.observe(seconds, kind=kind, outcome=outcome)
+            FILES_TOTAL.inc(kind=kind, outcome=outcome)
+            self.progress.add_time("convert", seconds)
+            self.progress.advance("convert")
+
+        return None
+
+    def collect_input_files(self):
+        """List (file_path, ext, document name) for every supported file in the data folder.
+
+        A document is named after its file. Files sharing a name (report.docx, report.pdf) would
+        all convert to the same PDF, so they keep their extension in it (report_docx, report_pdf).
+        """
+        tasks = []
+        supported_extensions = (
+            self.config.supported_doc_extenctions
+            + self.config.supported_img_extenctions  # it supposed ot add in config_entity
+            + ["pdf"]
+        )
+
+        for ext in supported_extensions:
+            files = glob.glob(os.path.join(self.config.data_folder_path, f"*.{ext}"))
+
+            if not files:
+                continue
+
+            logger.logger.info(f"Found {len(files)} .{ext} files to process.")
+            tasks.extend((file_path, ext) for file_path in files)
+
+        stems = [os.path.splitext(os.path.basename(file_path))[0] for file_path, _ in tasks]
+        shared = {stem for stem, count in Counter(stems).items() if count > 1}
+        if shared:
+            logger.logger.warning(f"Input files share the names {sorted(shared)}, suffixing them with their extension")
+
+        named_tasks, taken = [], set(stems) - shared
+        for (file_path, ext), stem in zip(tasks, stems):
+            doc_name = stem
+            if stem in shared:
+                doc_name, counter = f"{stem}_{ext}", 1
+                while doc_name in taken:
+                    doc_name, counter = f"{stem}_{ext}_{counter}", counter + 1
+            taken.add(doc_name)
+            named_tasks.append((file_path, ext, doc_name))
+        return named_tasks
+
+    def preprocess_files(self, tasks=None):
         """Convert supported documents/images to PDFs."""
         try:
             logger.logger.info("Starting file preprocessing...")
 
-            pdf_paths = []
-            supported_extensions = (
-                self.config.supported_doc_extenctions
-                + self.config.supported_img_extenctions  # it supposed ot add in config_entity
-                + ["pdf"]
-            )
-
-            for ext in supported_extensions:
-                files = glob.glob(os.path.join(self.config.data_folder_path, f"*.{ext}"))
-
-                if not files:
-                    continue
-
-                logger.logger.info(f"Found {len(files)} .{ext} files to process.")
+            if tasks is None:
+                tasks = self.collect_input_files()
+            self.progress.set_total("convert", len(tasks))
 
-                for file_path in files:
-                    base_name = os.path.splitext(os.path.basename(file_path))[0]
-                    pdf_path = os.path.join(self.config.documents_folder, f"{base_name}.pdf")
-
-                    try:
-                        if ext in self.config.supported_doc_extenctions:
-                            logger.logger.info(f"Converting {file_path} to PDF via LibreOffice...")
-                            subprocess.run(
-                                [
-                                    "soffice", "--headless", "--convert-to", "pdf",
-                                    file_path, "--outdir", self.config.documents_folder
-                                ],
-                                check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-                            )
-
-                        elif ext in self.config.supported_img_extenctions:
-                            logger.logger.info(f"Converting image {file_path} to PDF...")
-                            img = Image.open(file_path)
-                            rgb_img = img.convert("RGB")
-                            rgb_img.save(pdf_path)
-
-                        elif ext == "pdf":
-                            logger.logger.info(f"Copying existing PDF {file_path}...")
-                            shutil.copy(file_path, pdf_path)
-
-                        else:
-                            logger.logger.warning(f"Unsupported file skipped: {file_path}")
-                            continue
-
-                        pdf_paths.append(pdf_path)
-                        logger.logger.info(f"Processed: {file_path}")
-
-                    except subprocess.CalledProcessError as e:
-                        logger.logger.error(
-                            f"LibreOffice failed for {file_path}: {e.stderr.decode()}"
-                        )
-                    except Exception as e:
-                        raise WordSearchException(str(e), sys) from e
+            # Conversions run concurrently, results keep the discovery order
+            pdf_paths = [
+                pdf_path for pdf_path in self.scheduler.map(self.convert_file, tasks)
+                if pdf_path is not None
+            ]
 
             logger.logger.info("File preprocessing completed.")
             return pdf_paths
@@ -94,52 +163,115 @@ class DataTransformation:
         except Exception as e:
             raise WordSearchException(str(e), sys) from e
 
-    def extract_images_from_pdfs(self, pdf_paths):
-        """Extract images from PDFs page by page."""
-        try:
-            logger.logger.info("Starting image extraction from PDFs...")
-
-            image_file_paths = []
-
-            for pdf_path in pdf_paths:
-                base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-                doc_image_folder = os.path.join(self.config.images_folder, base_name)
-                os.makedirs(doc_image_folder, exist_ok=True)
-
-                logger.logger.info(f"Extracting from {pdf_path} to {doc_image_folder}")
-
-                try:
-                    pages = convert_from_path(pdf_path)
-                    for idx, page in enumerate(pages, start=1):
-                        image_filename = f"img_{idx}.jpg"
-                        image_path = os.path.join(doc_image_folder, image_filename)
-                        page.save(image_path, "JPEG")
-                        image_file_paths.append(image_path)
-
-                    logger.logger.info(f"Extracted {len(pages)} images from {pdf_path}.")
-
-                except Exception as e:
-                    raise WordSearchException(str(e), sys) from e
-
-            logger.logger.info("Image extraction completed.")
-            return image_file_paths
-
-        except Exception as e:
-            raise WordSearchException(str(e), sys) from e
+    def document_image_folder(self, pdf_path):
+        """Create an empty folder for the page images of one PDF and return it."""
+        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        doc_image_folder = os.path.join(self.config.images_folder, base_name)
+        # Pages left over from an older, longer version of the document must not be OCR'd again
+        shutil.rmtree(doc_image_folder, ignore_errors=True)
+        os.makedirs(doc_image_folder, exist_ok=True)
+        return doc_image_folder
+
+    def render_options(self):
+        """pdftoppm resolution and colour options."""
+        options = {"grayscale": self.config.preprocess_grayscale}
+        if self.config.raster_detection_scale:
+            # An int size makes pdftoppm scale the long side of every page to it, whatever the page size
+            options["size"] = int(self.config.detection_input_size * self.config.raster_detection_scale)
+        else:
+            options["dpi"] = self.config.raster_dpi
+        return options
+
+    def render_chunks(self, pdf_path, doc_image_folder, fmt):
+        """Render a PDF chunk by chunk into temporary folders, yielding (page number, file path) in order."""
+        page_count = pdfinfo_from_path(pdf_path)["Pages"]
+        chunk_size = max(1, self.config.raster_chunk_pages)
+
+        for first_page in range(1, page_count + 1, chunk_size):
+            last_page = min(first_page + chunk_size - 1, page_count)
+
+            # pdftoppm writes the pages itself, so no chunk is ever held as PIL images here
+            with tempfile.TemporaryDirectory(dir=doc_image_folder) as chunk_folder:
+                start = time.perf_counter()
+                chunk_paths = convert_from_path(
+                    pdf_path,
+                    first_page=first_page,
+                    last_page=last_page,
+                    thread_count=self.config.raster_thread_count,
+                    output_folder=chunk_folder,
+                    fmt=fmt,
+                    # A fixed prefix makes pdf2image number the per-thread files in page order
+                    output_file="page",
+                    paths_only=True,
+                    **self.render_options()
+                )
+                seconds = time.perf_counter() - start
+                for _ in chunk_paths:
+                    RASTERIZE_PAGE_SECONDS.observe(seconds / len(chunk_paths))
+                PAGES_TOTAL.inc(len(chunk_paths), stage="rasterize")
+                self.progress.add_time("rasterize", seconds, count=len(chunk_paths))
+
+                yield from enumerate(chunk_paths, start=first_page)
+
+    def render_pages(self, pdf_path, doc_image_folder):
+        """Render a PDF for in-memory OCR, yielding (page image path, decoded page) in order.
+
+        pdftoppm writes uncompressed PPM, so the page OCR sees is decoded without a JPEG round-trip.
+        Only a copy downscaled to ANNOTATION_IMAGE_MAX_SIDE is kept on disk, for annotation.
+        """
+        max_side = self.config.annotation_image_max_side
+        for idx, chunk_path in self.render_chunks(pdf_path, doc_image_folder, "ppm"):
+            with Image.open(chunk_path) as img:
+                page = img.copy()
+            os.remove(chunk_path)
+
+            image_path = os.path.join(doc_image_folder, f"img_{idx}.jpg")
+            annotation_copy = page
+            if max_side and max(page.size) > max_side:
+                annotation_copy = page.copy()
+                annotation_copy.thumbnail((max_side, max_side))
+            annotation_copy.save(image_path, "JPEG", quality=self.config.annotation_jpeg_quality)
+            self.progress.advance("rasterize")
+            yield image_path, page
+
+    def render_documents(self, pdf_paths):
+        """Render PDFs one after another for in-memory OCR, yielding (document, page image, image path, decoded page) jobs."""
+        for pdf_path in pdf_paths:
+            doc_name = os.path.splitext(os.path.basename(pdf_path))[0]
+            doc_image_folder = self.document_image_folder(pdf_path)
+
+            logger.logger.info(f"Extracting from {pdf_path} to {doc_image_folder}")
+
+            page_count = 0
+            try:
+                for image_path, page in self.render_pages(pdf_path, doc_image_folder):
+                    page_count += 1
+                    yield doc_name, os.path.basename(image_path), image_path, page
+            except Exception as e:
+                raise WordSearchException(str(e), sys) from e
+
+            logger.logger.info(
+                f"Extracted {page_count} images from {pdf_path}. "
+                f"Peak RSS: {peak_rss_mb():.1f} MB (pdftoppm: {peak_rss_mb(children=True):.1f} MB)"
+            )
 
-    def initiate_data_transformation(self):
-        """Run full pipeline: convert to PDFs, then extract images."""
+    def initiate_data_transformation(self, tasks=None):
+        """Convert the input files to PDFs; detection renders their pages with render_documents while it OCRs them."""
         try:
             logger.logger.info("Starting full data transformation pipeline...")
 
-            pdf_paths = self.preprocess_files()
-            self.extract_images_from_pdfs(pdf_paths)
+            pdf_paths = self.preprocess_files(tasks)
 
             logger.logger.info("Data transformation completed successfully.")
 
             return DataTransformationArtifact(
                 image_file_path=self.config.images_folder,
-                converted_document_file_path=self.config.documents_folder
+                converted_document_file_path=self.config.documents_folder,
+                peak_rss_mb=peak_rss_mb(),
+                converted_documents=[
+                    os.path.splitext(os.path.basename(pdf_path))[0] for pdf_path in pdf_paths
+                ],
+                run_id=self.config.run_id
             )
 
         except Exception as e:
@@ -0,0 +1,71 @@
+import os
+import sys
+import queue
+import signal
+import threading
+import pathlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from src.exception.exception import WordSearchException
+
+
+class ConversionScheduler:
+    """Run LibreOffice conversions concurrently, giving each slot its own user profile."""
+
+    # Profile slots are shared by every pipeline run in this process, so concurrent runs
+    # neither collide on a profile nor exceed the configured number of soffice processes
+    _pools_lock = threading.Lock()
+    _profile_pools = {}
+
+    def __init__(self, max_workers, timeout, profiles_root):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.profiles = self._profile_pool(profiles_root, self.max_workers)
+
+    @classmethod
+    def _profile_pool(cls, profiles_root, max_workers):
+        with cls._pools_lock:
+            if profiles_root not in cls._profile_pools:
+                # soffice instances sharing a profile lock each other out, so every slot gets its own;
+                # the pid keeps API worker processes apart too
+                profiles = queue.Queue()
+                for slot in range(max_workers):
+                    profile_dir = os.path.join(profiles_root, f"pid_{os.getpid()}", f"worker_{slot}")
+                    os.makedirs(profile_dir, exist_ok=True)
+                    profiles.put(profile_dir)
+                cls._profile_pools[profiles_root] = profiles
+            return cls._profile_pools[profiles_root]
+
+    def convert_to_pdf(self, file_path, outdir):
+        """Convert one document to PDF inside `outdir` using a free LibreOffice profile."""
+        profile_dir = self.profiles.get()
+        try:
+            command = [
+                "soffice", f"-env:UserInstallation={pathlib.Path(profile_dir).as_uri()}",
+                "--headless", "--convert-to", "pdf", file_path, "--outdir", outdir
+            ]
+            # New session so a timeout can kill soffice.bin along with its launcher script
+            process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True
+            )
+            try:
+                stdout, stderr = process.communicate(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.communicate()
+                raise
+
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+
+        finally:
+            self.profiles.put(profile_dir)
+
+    def map(self, func, tasks):
+        """Apply `func` to every task with bounded concurrency, keeping the input order."""
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                return list(executor.map(func, tasks))
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
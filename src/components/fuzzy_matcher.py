@@ -0,0 +1,146 @@
+from collections import Counter
+import numpy as np
+from fuzzywuzzy import fuzz
+
+
+class FuzzyMatcher:
+    """Match query terms against a deduplicated vocabulary, pruning candidates before fuzz.ratio.
+
+    fuzz.ratio is 2 * M / (len(a) + len(b)) scaled to 0-100, where M counts matching characters.
+    M can never exceed the number of characters the two strings have in common (as a multiset),
+    which in turn is at most the shorter length. Both bounds are checked with vectorised numpy
+    over the vocabulary, and only the survivors are scored, so results equal a full fuzz.ratio scan.
+    """
+
+    # Characters get their own count column by frequency; the rest share the last column,
+    # which keeps the per-term bound an upper bound
+    ALPHABET_SIZE = 64
+
+    def __init__(self, terms):
+        self.terms = terms
+
+        lengths = np.asarray([len(term) for term in terms], dtype=np.int32)
+        # Term ids ordered by length, so every length window is one contiguous slice
+        self.ids_by_length = np.argsort(lengths, kind="stable").astype(np.int32)
+        self.sorted_lengths = lengths[self.ids_by_length]
+        self.lengths = lengths
+
+        char_frequency = Counter(char for term in terms for char in term)
+        self.char_columns = {
+            char: column
+            for column, (char, _) in enumerate(char_frequency.most_common(self.ALPHABET_SIZE - 1))
+        }
+        self.char_counts = np.zeros((len(terms), self.ALPHABET_SIZE), dtype=np.uint16)
+        for term_id, term in enumerate(terms):
+            self.char_counts[term_id] = self.char_vector(term)
+
+        self._vocabulary_text = None
+
+    def char_vector(self, text):
+        vector = np.zeros(self.ALPHABET_SIZE, dtype=np.uint16)
+        for char in text:
+            vector[self.char_columns.get(char, self.ALPHABET_SIZE - 1)] += 1
+        return vector
+
+    def length_slice(self, min_length, max_length=None):
+        start = np.searchsorted(self.sorted_lengths, min_length, side="left")
+        end = len(self.sorted_lengths) if max_length is None else np.searchsorted(
+            self.sorted_lengths, max_length, side="right"
+        )
+        return self.ids_by_length[start:end]
+
+    def fuzzy_candidates(self, term, fuzzy_threshold, term_ids=None):
+        """Term ids (of `term_ids` when given) whose upper-bound ratio can still reach the threshold."""
+        all_ids = self.ids_by_length if term_ids is None else term_ids
+        # fuzz.ratio rounds, so a raw ratio of threshold - 0.5 may still pass
+        required = fuzzy_threshold - 0.5
+        if required <= 0:
+            return all_ids
+        if required > 100:
+            return all_ids[:0]
+
+        term_length = len(term)
+        # 200 * min(a, b) / (a + b) >= required bounds the candidate length to [low, high]
+        low = int(np.floor(required * term_length / (200 - required)))
+        high = int(np.ceil((200 - required) * term_length / required))
+        if term_ids is None:
+            candidates = self.length_slice(low, high)
+        else:
+            lengths = self.lengths[term_ids]
+            candidates = term_ids[(lengths >= low) & (lengths <= high)]
+        if len(candidates) == 0:
+            return candidates
+
+        common = np.minimum(self.char_counts[candidates], self.char_vector(term)).sum(axis=1)
+        possible = 200 * common >= required * (self.lengths[candidates] + term_length)
+        return candidates[possible]
+
+    @property
+    def vocabulary_text(self):
+        """The vocabulary joined by NUL characters, and the offset each term starts at in it."""
+        if self._vocabulary_text is None:
+            starts = np.zeros(len(self.terms), dtype=np.int64)
+            starts[1:] = np.cumsum(self.lengths[:-1] + 1)
+            self._vocabulary_text = ("\0".join(self.terms), starts)
+        return self._vocabulary_text
+
+    def substring_term_ids(self, term):
+        """Ids of vocabulary terms containing `term`, ascending.
+
+        str.find over the joined vocabulary scans it at C speed and only returns to Python per hit.
+        """
+        if "\0" in term:
+            # Could match across the separator, and can't occur inside a term anyway
+            return []
+        text, starts = self.vocabulary_text
+        term_ids = []
+        position = text.find(term)
+        while position != -1:
+            term_id = int(np.searchsorted(starts, position, side="right")) - 1
+            term_ids.append(term_id)
+            if term_id + 1 >= len(starts):
+                break
+            # Continue at the next term, one hit per term is enough
+            position = text.find(term, int(starts[term_id + 1]))
+        return term_ids
+
+    def match(self, term, fuzzy_threshold, partial_match=False):
+        """Ids of vocabulary terms matching `term` by substring (if enabled) or fuzzy ratio, ascending."""
+        return self.match_many([(term, fuzzy_threshold, partial_match)])[0]
+
+    def match_many(self, queries, term_ids=None):
+        """match() for a list of (term, fuzzy_threshold, partial_match), sharing work between queries.
+
+        Terms are lowercased and deduplicated first. Substring hits are found once per distinct
+        term, and fuzzy candidates are generated and scored once per distinct term at the lowest
+        threshold any query asks of it, then filtered per query. With `term_ids` (an int array)
+        only those vocabulary terms are considered, at a cost proportional to their number.
+        """
+        queries = [(term.lower(), fuzzy_threshold, partial_match) for term, fuzzy_threshold, partial_match in queries]
+
+        substring_ids, lowest_thresholds, always_partial = {}, {}, {}
+        for term, fuzzy_threshold, partial_match in queries:
+            if partial_match and term not in substring_ids:
+                substring_ids[term] = set(
+                    self.substring_term_ids(term) if term_ids is None
+                    else (int(term_id) for term_id in term_ids if term in self.terms[term_id])
+                )
+            lowest_thresholds[term] = min(fuzzy_threshold, lowest_thresholds.get(term, fuzzy_threshold))
+            always_partial[term] = always_partial.get(term, True) and partial_match
+
+        ratios = {}
+        for term, fuzzy_threshold in lowest_thresholds.items():
+            # Substring hits match anyway when every query of the term accepts them
+            skip = substring_ids[term] if always_partial[term] else ()
+            ratios[term] = [
+                (term_id, fuzz.ratio(term, self.terms[term_id]))
+                for term_id in map(int, self.fuzzy_candidates(term, fuzzy_threshold, term_ids))
+                if term_id not in skip
+            ]
+
+        matches = []
+        for term, fuzzy_threshold, partial_match in queries:
+            matched = set(substring_ids[term]) if partial_match else set()
+            matched.update(term_id for term_id, ratio in ratios[term] if ratio >= fuzzy_threshold)
+            matches.append(sorted(matched))
+        return matches
@@ -0,0 +1,118 @@
+import os
+
+from src.logging import logger
+from src.entity.config_entity import DataDetectionConfig
+
+
+class InferenceBackend:
+    """Builds the OCR predictor for one inference runtime.
+
+    Every backend returns a callable taking a list of H x W x 3 uint8 pages and returning a
+    docTR-style document (pages -> blocks -> lines -> words with value, geometry and confidence),
+    which is all DataDetection reads.
+    """
+
+    name = None
+    # Whether the backend runs the page and crop orientation classifiers for ASSUME_STRAIGHT_TEXT = False
+    detects_orientation = True
+
+    def __init__(self, config: DataDetectionConfig):
+        self.config = config
+
+    def load(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def create(config: DataDetectionConfig):
+        backends = {backend.name: backend for backend in (PytorchBackend, OnnxBackend)}
+        if config.ocr_backend not in backends:
+            raise ValueError(f"Unknown OCR backend '{config.ocr_backend}', expected one of {sorted(backends)}")
+        return backends[config.ocr_backend](config)
+
+    @staticmethod
+    def assume_straight_pages(config):
+        """Whether the configured backend OCRs pages as straight, part of the OCR cache keys."""
+        backend = OnnxBackend if config.ocr_backend == OnnxBackend.name else PytorchBackend
+        return config.assume_straight_text or not backend.detects_orientation
+
+
+class PytorchBackend(InferenceBackend):
+    """docTR's PyTorch ocr_predictor with the configured detection and recognition models."""
+
+    name = "pytorch"
+
+    def load(self):
+        from doctr.models import ocr_predictor
+
+        return ocr_predictor(
+            det_arch=self.config.data_detection_model,
+            reco_arch=self.config.data_recognition_model,
+            pretrained=self.config.pretrained,
+            assume_straight_pages=self.config.assume_straight_text,
+            export_as_straight_boxes=self.config.export_as_straingt_boxes
+        )
+
+
+class OnnxBackend(InferenceBackend):
+    """OnnxTR predictor running exported float32 or int8 models on onnxruntime's CPU provider.
+
+    Models are only read from ONNX_MODELS_FOLDER, as written by `python -m src.benchmark.onnx_export`.
+    OnnxTR downloads its orientation classifiers whenever pages are not assumed straight, so
+    this backend always OCRs pages as straight and never builds them; rotated scans need the
+    pytorch backend.
+    """
+
+    name = "onnx"
+    detects_orientation = False
+
+    @staticmethod
+    def model_path(models_folder, arch, quantized):
+        return os.path.join(models_folder, f"{arch}_int8.onnx" if quantized else f"{arch}.onnx")
+
+    def engine_config(self):
+        import onnxruntime
+        from onnxtr.models import EngineConfig
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.config.onnx_intra_op_threads:
+            session_options.intra_op_num_threads = self.config.onnx_intra_op_threads
+        return EngineConfig(providers=["CPUExecutionProvider"], session_options=session_options)
+
+    def load(self):
+        try:
+            from onnxtr import models as onnx_models
+        except ImportError as e:
+            raise ImportError("The onnx OCR backend needs OnnxTR: pip install \"onnxtr[cpu]\"") from e
+
+        det_path = self.model_path(
+            self.config.onnx_models_folder, self.config.data_detection_model, self.config.onnx_quantized
+        )
+        reco_path = self.model_path(
+            self.config.onnx_models_folder, self.config.data_recognition_model, self.config.onnx_quantized
+        )
+        for path in (det_path, reco_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"ONNX model not found: {path}; export it with python -m src.benchmark.onnx_export")
+        logger.logger.info(f"Loading ONNX models {det_path} and {reco_path}")
+        if not self.config.assume_straight_text:
+            logger.logger.warning(
+                "The onnx backend does not detect page orientation, pages are OCR'd as straight "
+                "despite ASSUME_STRAIGHT_TEXT = False"
+            )
+
+        engine_config = self.engine_config()
+        # A local path makes OnnxTR load that file instead of downloading its published weights
+        det_model = getattr(onnx_models, self.config.data_detection_model)(det_path, engine_cfg=engine_config)
+        reco_model = getattr(onnx_models, self.config.data_recognition_model)(reco_path, engine_cfg=engine_config)
+        # Straight pages without orientation detection or straightening build no classifier
+        return onnx_models.ocr_predictor(
+            det_arch=det_model,
+            reco_arch=reco_model,
+            assume_straight_pages=True,
+            detect_orientation=False,
+            straighten_pages=False,
+            export_as_straight_boxes=self.config.export_as_straingt_boxes,
+            det_engine_cfg=engine_config,
+            reco_engine_cfg=engine_config
+        )
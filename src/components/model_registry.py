@@ -0,0 +1,72 @@
+import sys
+import threading
+import numpy as np
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.entity.config_entity import DataDetectionConfig, ConfigEntity
+from src.components.inference_backend import InferenceBackend
+
+
+class ModelRegistry:
+    """Process-wide holder for the OCR predictor so weights are loaded once per worker."""
+
+    _lock = threading.Lock()
+    _model = None
+    _ready = False
+    _error = None
+
+    @classmethod
+    def load(cls, config: DataDetectionConfig = None):
+        """Build the OCR predictor on first use and return the shared instance."""
+        if cls._model is not None:
+            return cls._model
+
+        with cls._lock:
+            if cls._model is None:
+                try:
+                    config = config or DataDetectionConfig(config=ConfigEntity())
+                    logger.logger.info(
+                        f"Loading OCR predictor ({config.data_detection_model} / {config.data_recognition_model}) "
+                        f"on the {config.ocr_backend} backend..."
+                    )
+                    cls._model = InferenceBackend.create(config).load()
+                    logger.logger.info("OCR predictor loaded.")
+                except Exception as e:
+                    raise WordSearchException(str(e), sys) from e
+
+        return cls._model
+
+    @classmethod
+    def warm_up(cls, config: DataDetectionConfig = None):
+        """Run one inference on a blank page so the first real request doesn't pay for lazy init."""
+        try:
+            config = config or DataDetectionConfig(config=ConfigEntity())
+            model = cls.load(config)
+
+            height, width = config.warmup_page_size
+            dummy_page = np.full((height, width, 3), 255, dtype=np.uint8)
+            model([dummy_page])
+
+            cls._ready = True
+            cls._error = None
+            logger.logger.info("OCR predictor warm-up completed.")
+            return model
+
+        except Exception as e:
+            cls._error = str(e)
+            raise WordSearchException(str(e), sys) from e
+
+    @classmethod
+    def is_ready(cls):
+        return cls._ready
+
+    @classmethod
+    def last_error(cls):
+        """Why the last warm-up failed, None when it succeeded or has not run."""
+        return cls._error
+
+    @classmethod
+    def get_model(cls):
+        """Return the shared predictor, loading it lazily when no startup hook ran (e.g. CLI usage)."""
+        return cls._model if cls._model is not None else cls.load()
@@ -0,0 +1,246 @@
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+from PIL import Image
+
+from src.utils.file_lock import file_lock
+
+# Set bits of every byte value, for Hamming distances between packed hashes
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+
+class PageFilter:
+    """Cheap checks run on a page before OCR: near-blank detection and near-duplicate page keys.
+
+    Everything reads a small grayscale thumbnail. The key of a page is its perceptual hash (dHash)
+    and its gray pixels downsampled to PIXELS_SIDE squared. A dHash is coarse: pages differing
+    only in a few words (another total, another name) often share it, so it only selects candidate
+    pages, and NearDuplicateIndex confirms a duplicate on the downsampled pixels.
+    """
+
+    THUMBNAIL_SIDE = 512
+    # Thumbnail pixels darker than this (0-255) count as ink
+    INK_LEVEL = 192
+    # Side of the downsampled pixels compared between candidate pages; a changed word shows in a
+    # few of its cells, JPEG re-encoding barely moves any
+    PIXELS_SIDE = 128
+
+    def __init__(self, blank_ink_ratio=0.0005, hash_size=32):
+        self.blank_ink_ratio = blank_ink_ratio
+        self.hash_size = hash_size
+
+    def thumbnail(self, img: Image.Image):
+        gray = img.convert("L")
+        gray.thumbnail((self.THUMBNAIL_SIDE, self.THUMBNAIL_SIDE))
+        return gray
+
+    def ink_ratio(self, gray):
+        return float((np.asarray(gray) < self.INK_LEVEL).mean())
+
+    def difference_hash(self, gray):
+        """dHash: whether each pixel of a (size + 1) x size thumbnail is brighter than its left neighbour, as hex."""
+        pixels = np.asarray(gray.resize((self.hash_size + 1, self.hash_size), Image.BILINEAR), dtype=np.int16)
+        return np.packbits(pixels[:, 1:] > pixels[:, :-1]).tobytes().hex()
+
+    def downsampled_pixels(self, gray):
+        """Thumbnail averaged down to PIXELS_SIDE x PIXELS_SIDE gray levels, as bytes."""
+        return gray.resize((self.PIXELS_SIDE, self.PIXELS_SIDE), Image.BOX).tobytes()
+
+    @staticmethod
+    def page_id(page_key):
+        """sha256 of a page key, naming the page in caches."""
+        page_hash, pixels = page_key
+        return hashlib.sha256(page_hash.encode("ascii") + pixels).hexdigest()
+
+    def inspect(self, img: Image.Image):
+        """Return (is_blank, page key); the key of a non-blank page is (dHash, downsampled pixels)."""
+        gray = self.thumbnail(img)
+        if self.ink_ratio(gray) < self.blank_ink_ratio:
+            return True, None
+        return False, (self.difference_hash(gray), self.downsampled_pixels(gray))
+
+
+class NearDuplicateIndex:
+    """Page ids searchable by the key of a near-duplicate page.
+
+    A stored page matches a key when their dHashes differ in at most `max_hash_distance` bits,
+    computed against all stored pages at once, and no cell of their downsampled pixels differs by
+    more than `max_pixel_difference` gray levels; the closest match wins. Pages added without their
+    pixels have them read by `load_pixels(page_id)` when they are a candidate.
+    """
+
+    def __init__(self, max_hash_distance=0, max_pixel_difference=0, load_pixels=None):
+        self.max_hash_distance = max_hash_distance
+        self.max_pixel_difference = max_pixel_difference
+        self.load_pixels = load_pixels
+        self.page_ids = []
+        # page id -> row of self.hashes
+        self.rows = {}
+        self.hashes = np.zeros((0, 0), dtype=np.uint8)
+        self.pixels = {}
+
+    def __len__(self):
+        return len(self.page_ids)
+
+    def __contains__(self, page_id):
+        return page_id in self.rows
+
+    def add(self, page_id, page_hash, pixels=None):
+        if page_id in self.rows:
+            return
+        hash_bytes = np.frombuffer(bytes.fromhex(page_hash), dtype=np.uint8)
+        row = len(self.page_ids)
+        if row == len(self.hashes):
+            grown = np.zeros((max(64, 2 * row), hash_bytes.size), dtype=np.uint8)
+            if row:
+                grown[:row] = self.hashes
+            self.hashes = grown
+        self.hashes[row] = hash_bytes
+        self.rows[page_id] = row
+        self.page_ids.append(page_id)
+        if pixels is not None:
+            self.pixels[page_id] = pixels
+
+    def remove(self, page_id):
+        row = self.rows.pop(page_id, None)
+        if row is None:
+            return
+        self.pixels.pop(page_id, None)
+        # The last page takes the freed row
+        last_id = self.page_ids.pop()
+        if last_id != page_id:
+            self.page_ids[row] = last_id
+            self.rows[last_id] = row
+            self.hashes[row] = self.hashes[len(self.page_ids)]
+
+    def pixel_difference(self, pixels, other):
+        return int(np.abs(
+            np.frombuffer(pixels, dtype=np.uint8).astype(np.int16) - np.frombuffer(other, dtype=np.uint8)
+        ).max())
+
+    def find(self, page_key):
+        """Id of the stored page closest to `page_key` within the tolerances, or None."""
+        if not self.page_ids:
+            return None
+        page_hash, pixels = page_key
+        hash_bytes = np.frombuffer(bytes.fromhex(page_hash), dtype=np.uint8)
+        distances = POPCOUNT[self.hashes[:len(self.page_ids)] ^ hash_bytes].sum(axis=1)
+
+        best_id, best_difference = None, None
+        for row in np.flatnonzero(distances <= self.max_hash_distance):
+            page_id = self.page_ids[row]
+            candidate = self.pixels.get(page_id)
+            if candidate is None and self.load_pixels is not None:
+                candidate = self.load_pixels(page_id)
+            if candidate is None or len(candidate) != len(pixels):
+                continue
+            difference = self.pixel_difference(pixels, candidate)
+            if difference <= self.max_pixel_difference and (best_difference is None or difference < best_difference):
+                best_id, best_difference = page_id, difference
+        return best_id
+
+
+class PageWordCache:
+    """Word records of OCR'd pages, found again for near-duplicate pages.
+
+    Pages of the current run are kept in memory (the lists are the ones already held for the
+    results, so nothing is copied). With a folder they are also written there, for later runs:
+    words as <page id>.json and downsampled pixels as <page id>.pixels, listed with their dHash
+    in index.jsonl, which is read again for pages other runs added. Only the hashes are held for
+    pages on disk. The folder must be specific to the OCR settings.
+    """
+
+    # Part of the cache folder name; bump when the file layout changes
+    LAYOUT_VERSION = 3
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(self, folder=None, max_hash_distance=0, max_pixel_difference=0):
+        self.folder = folder
+        self.index = NearDuplicateIndex(
+            max_hash_distance, max_pixel_difference, load_pixels=self.load_pixels if folder else None
+        )
+        # page id -> word records
+        self.pages = {}
+        # Bytes of the index file read so far
+        self.index_offset = 0
+
+    @staticmethod
+    def relabel(page_words, document, page_image):
+        """Copies of a page's word records attributed to another document page."""
+        return [{**word, "document": document, "page_image": page_image} for word in page_words]
+
+    def page_path(self, page_id, ext):
+        return os.path.join(self.folder, page_id[:2], f"{page_id}.{ext}")
+
+    def load_pixels(self, page_id):
+        try:
+            with open(self.page_path(page_id, "pixels"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def read_index(self):
+        """Add the pages other runs listed in the index file since it was last read."""
+        index_path = os.path.join(self.folder, self.INDEX_FILE)
+        try:
+            with open(index_path, "rb") as f:
+                f.seek(self.index_offset)
+                lines = f.read().split(b"\n")
+        except FileNotFoundError:
+            return
+        # A line being appended right now is read next time
+        self.index_offset += sum(len(line) + 1 for line in lines[:-1])
+        for line in lines[:-1]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self.index.add(entry["page"], entry["hash"])
+
+    def get(self, page_key):
+        """Words of the cached page closest to `page_key` within the index tolerances, or None."""
+        if self.folder is not None:
+            self.read_index()
+        page_id = self.index.find(page_key)
+        if page_id is None:
+            return None
+        if page_id in self.pages:
+            return self.pages[page_id]
+        try:
+            with open(self.page_path(page_id, "json"), "r", encoding="utf-8") as f:
+                page_words = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        self.pages[page_id] = page_words
+        return page_words
+
+    def put(self, page_key, page_words):
+        page_hash, pixels = page_key
+        page_id = PageFilter.page_id(page_key)
+        self.pages[page_id] = page_words
+        if self.folder is None:
+            self.index.add(page_id, page_hash, pixels)
+            return
+        self.index.add(page_id, page_hash)
+        words_path = self.page_path(page_id, "json")
+        if os.path.exists(words_path):
+            return
+        os.makedirs(os.path.dirname(words_path), exist_ok=True)
+        # Write then rename; concurrent runs may store the same page at once
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(words_path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pixels)
+        os.replace(tmp_path, self.page_path(page_id, "pixels"))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(words_path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump([
+                {key: value for key, value in word.items() if key not in ("document", "page_image")}
+                for word in page_words
+            ], f, ensure_ascii=False)
+        os.replace(tmp_path, words_path)
+        # Listed once its files are in place
+        with file_lock(os.path.join(self.folder, "index.lock")):
+            with open(os.path.join(self.folder, self.INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"page": page_id, "hash": page_hash}) + "\n")
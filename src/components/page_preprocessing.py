@@ -0,0 +1,60 @@
+import numpy as np
+from PIL import Image
+
+
+class PagePreprocessor:
+    """Turn a rendered page into the array handed to the predictor.
+
+    Blank margins are optionally cropped so text fills more of the detector input. The crop box
+    is returned with the array so word boxes found on the cropped page can be mapped back to
+    page-relative coordinates, which the results store and annotation use.
+    """
+
+    def __init__(self, auto_crop=True, crop_threshold=240, crop_padding=16):
+        self.auto_crop = auto_crop
+        self.crop_padding = crop_padding
+        # Lookup table marking content (darker than the threshold) for Image.point
+        self.content_table = [255 if value < crop_threshold else 0 for value in range(256)]
+
+    def content_box(self, img):
+        """Pixel box around the page content plus padding, or None when nothing would be cropped."""
+        box = img.convert("L").point(self.content_table).getbbox()
+        if box is None:
+            # Blank page, nothing to crop to
+            return None
+        width, height = img.size
+        left, top, right, bottom = box
+        box = (
+            max(0, left - self.crop_padding),
+            max(0, top - self.crop_padding),
+            min(width, right + self.crop_padding),
+            min(height, bottom + self.crop_padding)
+        )
+        return None if box == (0, 0, width, height) else box
+
+    def prepare(self, img: Image.Image):
+        """Return (H x W x 3 uint8 array, crop) for one page; crop is None or (box, page size)."""
+        crop = None
+        if self.auto_crop:
+            box = self.content_box(img)
+            if box is not None:
+                crop = (box, img.size)
+                img = img.crop(box)
+
+        # docTR's predictors take three channels, grayscale renders are expanded here
+        array = np.asarray(img.convert("RGB"))
+        return array, crop
+
+    @staticmethod
+    def remap_box(bounding_box, crop):
+        """Map a box relative to the cropped page back to relative coordinates of the whole page."""
+        if crop is None:
+            return bounding_box
+        (left, top, right, bottom), (width, height) = crop
+        crop_width, crop_height = right - left, bottom - top
+        return [
+            (left + bounding_box[0] * crop_width) / width,
+            (top + bounding_box[1] * crop_height) / height,
+            (left + bounding_box[2] * crop_width) / width,
+            (top + bounding_box[3] * crop_height) / height
+        ]
@@ -0,0 +1,154 @@
+import io
+import os
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageDraw
+
+from src.exception.exception import WordSearchException, ResultsNotFoundError
+from src.logging import logger
+from src.entity.config_entity import DataSearchConfig, ConfigEntity
+from src.components.results_store import ResultsStore
+from src.components.phrase_matcher import PhraseMatcher
+from src.utils.metrics import ANNOTATION_SECONDS, CACHE_REQUESTS_TOTAL
+
+
+class PageRenderer:
+    """Draw word boxes on page images on request instead of re-encoding every page up front.
+
+    Rendered JPEGs are kept in a process-wide LRU cache keyed by results store version, page,
+    query hash and thumbnail size, so repeated views of the same hits cost no image I/O.
+    """
+
+    _cache_lock = threading.Lock()
+    _cache = OrderedDict()
+
+    def __init__(self, config: DataSearchConfig = None):
+        try:
+            self.config = config or DataSearchConfig(config=ConfigEntity())
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    @staticmethod
+    def draw_boxes(img, words, label=False):
+        """Draw the relative bounding boxes of `words` onto `img`, optionally with the word text."""
+        draw = ImageDraw.Draw(img)
+        img_width, img_height = img.size
+
+        for word in words:
+            bbox = word['bounding_box']
+            x_min = bbox[0] * img_width
+            y_min = bbox[1] * img_height
+            x_max = bbox[2] * img_width
+            y_max = bbox[3] * img_height
+            draw.rectangle([(x_min, y_min), (x_max, y_max)], outline='red', width=2)
+            if label:
+                draw.text((x_min, y_min - 10), word['word'], fill='red')
+
+    @staticmethod
+    def query_key(query, fuzzy_threshold, partial_match, match_mode="any", proximity=None):
+        normalized = " ".join(query.lower().split()) if query else ""
+        return hashlib.sha1(
+            f"{normalized}|{fuzzy_threshold}|{int(partial_match)}|{match_mode}|{proximity}".encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def resolve_page(store, document, page):
+        """Page id of `img_{page}.jpg` of a document, accepting the ".pdf" names search results use."""
+        names = [document]
+        if document.endswith(".pdf"):
+            names.append(document[:-len(".pdf")])
+        for name in names:
+            page_id = store.page_lookup.get((name, f"img_{page}.jpg"))
+            if page_id is not None:
+                return page_id
+        return None
+
+    def page_image_path(self, store, page_id):
+        image_path = store.page_id_image_path(page_id)
+        if image_path is None:
+            # Stores written before run workspaces keep images in the shared folder
+            document_id, page_image = store.pages[page_id][:2]
+            image_path = os.path.join(
+                self.config.artifact_folder_path, "data_transformation", "images",
+                store.documents[document_id], page_image
+            )
+        return image_path
+
+    @staticmethod
+    def page_words(store, page_id, query=None, fuzzy_threshold=80, partial_match=True, match_mode="any", proximity=None):
+        """Word records of a page, only those a search with the same query and options matches.
+
+        Only the page's rows are matched, so the cost follows the page rather than the corpus.
+        """
+        rows = store.page_rows(page_id)
+        if query:
+            search_terms = query.strip().split()
+            term_rows = store.index.match_rows_many(
+                [(term, fuzzy_threshold, partial_match) for term in search_terms], rows
+            )
+            matches = PhraseMatcher(store).combine(term_rows, match_mode, proximity)
+            rows = np.unique(np.asarray([row for row, _ in matches], dtype=np.int64))
+        return [store.entry(row) for row in rows]
+
+    def render(self, document, page, query=None, fuzzy_threshold=80, partial_match=True, max_size=None,
+               match_mode="any", proximity=None):
+        """JPEG bytes of an annotated page, or None if the page or its image does not exist.
+
+        With a query, the boxed words are those /search-word returns on this page for the same
+        query, `match_mode` and `proximity`. Raises ValueError for an unknown match mode and
+        ResultsNotFoundError before any results are published.
+        """
+        if match_mode not in self.config.search_match_modes:
+            raise ValueError(f"Unknown match mode: {match_mode}")
+        if proximity is None:
+            proximity = self.config.search_proximity_words
+        try:
+            store = ResultsStore.load(self.config.results_store_folder)
+            if store is None:
+                raise ResultsNotFoundError("No OCR results have been published yet")
+
+            page_id = self.resolve_page(store, document, page)
+            if page_id is None:
+                return None
+
+            cache_key = (
+                store.version, page_id,
+                self.query_key(query, fuzzy_threshold, partial_match, match_mode, proximity), max_size
+            )
+            with self._cache_lock:
+                if cache_key in self._cache:
+                    self._cache.move_to_end(cache_key)
+                    CACHE_REQUESTS_TOTAL.inc(cache="annotation", result="hit")
+                    return self._cache[cache_key]
+            CACHE_REQUESTS_TOTAL.inc(cache="annotation", result="miss")
+
+            image_path = self.page_image_path(store, page_id)
+            if not os.path.exists(image_path):
+                logger.logger.warning(f"Image not found: {image_path}")
+                return None
+
+            words = self.page_words(store, page_id, query, fuzzy_threshold, partial_match, match_mode, proximity)
+            with ANNOTATION_SECONDS.time(source="render"), Image.open(image_path) as img:
+                img = img.convert("RGB")
+                if max_size:
+                    # Boxes are relative, so downscale first and draw on the small image
+                    img.thumbnail((max_size, max_size))
+                self.draw_boxes(img, words, label=bool(query))
+                buffer = io.BytesIO()
+                img.save(buffer, "JPEG", quality=self.config.annotation_jpeg_quality)
+            rendered = buffer.getvalue()
+
+            with self._cache_lock:
+                self._cache[cache_key] = rendered
+                self._cache.move_to_end(cache_key)
+                while len(self._cache) > max(0, self.config.annotation_cache_size):
+                    self._cache.popitem(last=False)
+            return rendered
+
+        except (WordSearchException, ResultsNotFoundError):
+            raise
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
@@ -0,0 +1,67 @@
+import sys
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+
+# Detector owned by the current worker process, created once by _init_worker
+_worker_detector = None
+
+
+def _init_worker(torch_threads):
+    """Pin the intra-op thread count and load this worker's own predictor."""
+    global _worker_detector
+
+    from src.components.data_detection import DataDetection
+    from src.components.model_registry import ModelRegistry
+    from src.entity.config_entity import DataDetectionConfig, ConfigEntity
+
+    config = DataDetectionConfig(config=ConfigEntity())
+    if config.ocr_backend == "pytorch":
+        import torch
+        torch.set_num_threads(torch_threads)
+    else:
+        config.onnx_intra_op_threads = torch_threads
+    _worker_detector = DataDetection(model=ModelRegistry.load(config))
+
+
+def _run_batch(batch):
+    # Metrics are recorded by the parent, worker registries are never scraped
+    return _worker_detector.run_ocr(batch)
+
+
+class ParallelDetectionEngine:
+    """Fan OCR batches out to a pool of worker processes, each holding a loaded predictor."""
+
+    def __init__(self, num_workers, torch_threads):
+        self.num_workers = num_workers
+        self.torch_threads = max(1, torch_threads)
+
+    def run(self, batches):
+        """Yield (per-page word records, OCR seconds) of each batch, in the same order as `batches` (any iterable)."""
+        try:
+            logger.logger.info(
+                f"Starting {self.num_workers} OCR workers with {self.torch_threads} intra-op threads each"
+            )
+
+            # spawn keeps torch's thread pools out of the children; fork may deadlock them
+            with ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.torch_threads,)
+            ) as executor:
+                # Two batches per worker in flight keep every worker busy; unlike map(), batches
+                # produced lazily (pages rendered in memory) are only drawn as they are needed
+                pending = deque()
+                for batch in batches:
+                    pending.append(executor.submit(_run_batch, batch))
+                    if len(pending) >= 2 * self.num_workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
@@ -0,0 +1,116 @@
+import numpy as np
+
+
+class PhraseMatcher:
+    """Combine the matched rows of several query terms by word order and position on the page.
+
+    A results store keeps each page's words contiguous and in reading order, so the word after
+    row r is row r + 1. Phrase and proximity checks are therefore intersections and binary
+    searches over the sorted row lists of each term, and never touch non-matching words.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def combine(self, term_rows, match_mode, proximity):
+        """Sorted (row, term_position) matches of a query from the matching rows of each of its terms."""
+        if match_mode == "phrase" and len(term_rows) > 1:
+            matches = self.phrase(term_rows)
+        elif match_mode == "proximity" and len(term_rows) > 1:
+            matches = self.proximity(term_rows, proximity)
+        else:
+            matches = [
+                (int(row), term_position)
+                for term_position, rows in enumerate(term_rows)
+                for row in rows
+            ]
+
+        # Same order as a scan of final_output.json: by word, then by query term
+        matches.sort()
+        return matches
+
+    def phrase(self, term_rows):
+        """(row, term_position) pairs of the terms occurring adjacently, in query order, on one line."""
+        count = len(term_rows)
+        # Intersect candidate phrase starts, rarest term first so the set shrinks fastest
+        order = sorted(range(count), key=lambda i: len(term_rows[i]))
+        starts = np.asarray(term_rows[order[0]], dtype=np.int64) - order[0]
+        for i in order[1:]:
+            if len(starts) == 0:
+                break
+            starts = np.intersect1d(starts, np.asarray(term_rows[i], dtype=np.int64) - i, assume_unique=True)
+
+        starts = starts[(starts >= 0) & (starts + count - 1 < len(self.store))]
+        if len(starts):
+            line_ids = self.store.line_ids
+            # Line ids never decrease along rows, so a phrase ending on its first line stays on it
+            starts = starts[line_ids[starts] == line_ids[starts + count - 1]]
+
+        return sorted({(int(start) + i, i) for start in starts for i in range(count)})
+
+    def page_bounds(self, rows):
+        """First and one-past-last row of the page of each row."""
+        page_ids = np.asarray(self.store.page_ids)
+        pages = page_ids[rows]
+        return np.searchsorted(page_ids, pages, side="left"), np.searchsorted(page_ids, pages, side="right")
+
+    @staticmethod
+    def distinct_rows(candidates):
+        """Whether every term position can take a row of its own from its candidate rows.
+
+        A bipartite matching by augmenting paths; queries have a few terms, so this is cheap.
+        """
+        owners = {}
+
+        def assign(term_position, seen):
+            for row in candidates[term_position]:
+                if row in seen:
+                    continue
+                seen.add(row)
+                if row not in owners or assign(owners[row], seen):
+                    owners[row] = term_position
+                    return True
+            return False
+
+        return all(assign(term_position, set()) for term_position in range(len(candidates)))
+
+    def proximity(self, term_rows, distance):
+        """(row, term_position) pairs of every term within `distance` words of the rarest term, same page.
+
+        Each term needs a word of its own, so a repeated term ("e e") needs as many occurrences.
+        """
+        count = len(term_rows)
+        anchor = min(range(count), key=lambda i: len(term_rows[i]))
+        anchors = np.asarray(term_rows[anchor], dtype=np.int64)
+        if len(anchors) == 0:
+            return []
+
+        page_start, page_end = self.page_bounds(anchors)
+        low = np.maximum(anchors - distance, page_start)
+        high = np.minimum(anchors + distance, page_end - 1)
+
+        # Window [first, last) of each term's rows around every anchor
+        windows = []
+        found = np.ones(len(anchors), dtype=bool)
+        for rows in term_rows:
+            rows = np.asarray(rows)
+            first = np.searchsorted(rows, low, side="left")
+            last = np.searchsorted(rows, high, side="right")
+            windows.append((rows, first, last))
+            found &= last > first
+
+        # Only terms sharing rows (repeated or overlapping terms) can compete for one word
+        overlapping = any(
+            len(np.intersect1d(term_rows[i], term_rows[j])) for i in range(count) for j in range(i + 1, count)
+        )
+
+        matches = set()
+        for a in np.flatnonzero(found):
+            if overlapping and not self.distinct_rows([
+                [int(anchors[a])] if term_position == anchor else rows[first[a]:last[a]].tolist()
+                for term_position, (rows, first, last) in enumerate(windows)
+            ]):
+                continue
+            for term_position, (rows, first, last) in enumerate(windows):
+                matches.update((int(row), term_position) for row in rows[first[a]:last[a]])
+        return sorted(matches)
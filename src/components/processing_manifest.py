@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.entity.config_entity import ConfigEntity
+from src.components.inference_backend import InferenceBackend
+
+
+class ProcessingManifest:
+    """Content-addressed record of which input files were already OCR'd, and with what settings."""
+
+    # Bump whenever the fields of cached word records change
+    RECORD_VERSION = 2
+    # Written into a run workspace once its pipeline run has ended, successfully or not
+    FINISHED_MARKER = ".finished"
+
+    def __init__(self, config: ConfigEntity = None):
+        try:
+            config = config or ConfigEntity()
+            self.manifest_path = os.path.join(config.artifact_folder_path, "manifest.json")
+            self.cache_folder = os.path.join(config.artifact_folder_path, "ocr_cache")
+            self.runs_folder = os.path.join(config.artifact_folder_path, "runs")
+            os.makedirs(self.cache_folder, exist_ok=True)
+
+            # Anything that changes the OCR output must invalidate cached results
+            self.fingerprint = hashlib.sha256(json.dumps([
+                self.RECORD_VERSION,
+                config.data_detection_model,
+                config.data_recognition_model,
+                config.pretrained,
+                InferenceBackend.assume_straight_pages(config),
+                config.export_as_straingt_boxes,
+                config.ocr_backend,
+                # Quantized models read differently from float ones
+                config.onnx_quantized if config.ocr_backend == "onnx" else None,
+                config.raster_dpi,
+                config.detection_input_size,
+                config.raster_detection_scale,
+                config.preprocess_grayscale,
+                config.preprocess_auto_crop,
+                config.preprocess_crop_threshold,
+                config.preprocess_crop_padding,
+                config.text_layer_enabled,
+                config.text_layer_min_words,
+                # Blank pages drop whatever little they hold
+                config.blank_page_ink_ratio if config.page_filter_enabled else None
+            ]).encode("utf-8")).hexdigest()
+
+            self.sources = self._read_sources()
+            # Entries planned by this run, re-applied on top of whatever other runs published meanwhile
+            self.planned_sources = {}
+            # Source key of each planned folder, and the keys of sources runs add files to
+            self.source_keys = {}
+            self.added_sources = set()
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    def _read_sources(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("sources", {})
+
+    @staticmethod
+    def file_hash(file_path, chunk_size=1024 * 1024):
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def cache_path(self, cache_key):
+        return os.path.join(self.cache_folder, f"{cache_key}.json")
+
+    def plan(self, source_folder, tasks, source=None):
+        """Split input tasks into those needing processing and those with reusable cached OCR results.
+
+        A folder is its own source and its entries mirror it. With `source`, the folder's files are
+        added to that named source instead (uploads), replacing any earlier entry of the same name.
+        """
+        try:
+            source_key = source or os.path.abspath(source_folder)
+            self.source_keys[os.path.abspath(source_folder)] = source_key
+            previous_entries = self.sources.get(source_key, {})
+            entries, pending = {}, []
+            # Page images of reused results stay in the workspace of the run that rendered them;
+            # identical content under another name can point at the same images
+            image_folders = {
+                entry["cache_key"]: entry["image_folder"]
+                for source_entries in self.sources.values()
+                for entry in source_entries.values()
+                if entry.get("image_folder")
+            }
+
+            for task in tasks:
+                file_path, _, doc_name = task
+                cache_key = hashlib.sha256(
+                    (self.file_hash(file_path) + self.fingerprint).encode("utf-8")
+                ).hexdigest()
+                entry = {
+                    "document": doc_name,
+                    "cache_key": cache_key
+                }
+                if not os.path.exists(self.cache_path(cache_key)):
+                    pending.append(task)
+                elif cache_key in image_folders:
+                    entry["image_folder"] = image_folders[cache_key]
+                entries[os.path.basename(file_path)] = entry
+
+            if source is None:
+                # Entries of files no longer in the folder are dropped here
+                dropped = set(previous_entries) - set(entries)
+                if dropped:
+                    logger.logger.info(f"Dropping {len(dropped)} deleted files from the manifest: {sorted(dropped)}")
+                self.sources[source_key] = entries
+            else:
+                replaced = set(previous_entries) & set(entries)
+                if replaced:
+                    logger.logger.info(f"Replacing {len(replaced)} files of {source_key}: {sorted(replaced)}")
+                self.sources[source_key] = {**previous_entries, **entries}
+                self.added_sources.add(source_key)
+            self.planned_sources[source_key] = entries
+            logger.logger.info(
+                f"Incremental plan for {source_key}: {len(pending)} to process, "
+                f"{len(tasks) - len(pending)} reused from cache"
+            )
+            return pending
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    def store_results(self, source_folder, processed_tasks, converted_documents, results, images_folder):
+        """Write freshly OCR'd word records of the processed tasks into the content-addressed cache."""
+        by_document = {}
+        for word in results:
+            by_document.setdefault(word["document"], []).append(word)
+
+        converted_documents = set(converted_documents)
+        source_folder = os.path.abspath(source_folder)
+        entries = self.sources.get(self.source_keys.get(source_folder, source_folder), {})
+        for task in processed_tasks:
+            entry = entries[os.path.basename(task[0])]
+            if entry["document"] not in converted_documents:
+                # Conversion failed, leave it uncached so the next run retries it
+                continue
+            # Documents without any recognised word are cached too, so they aren't re-OCR'd next time
+            words = by_document.get(entry["document"], [])
+            entry["image_folder"] = os.path.join(images_folder, entry["document"])
+            cache_path = self.cache_path(entry["cache_key"])
+            if os.path.exists(cache_path):
+                continue
+
+            # Write then rename so a crashed run never leaves a truncated cache entry behind
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(words, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+
+    def collect_results(self):
+        """Assemble the word records of every document in the manifest, in document order.
+
+        Documents are named after their file; files of the same name in different sources (or
+        differing only in extension) each get a suffix from their source path, so none shadows
+        another. Also returns where each document's page images live, which may be an earlier
+        run's workspace.
+        """
+        holders = {}
+        for source_key in sorted(self.sources):
+            for file_name, entry in sorted(self.sources[source_key].items()):
+                holders.setdefault(entry["document"], []).append((source_key, file_name, entry))
+
+        documents = {}
+        for document, files in holders.items():
+            if len(files) == 1:
+                documents[document] = files[0][2]
+                continue
+            logger.logger.warning(
+                f"{len(files)} input files are named {document}, suffixing them with their source: "
+                f"{[os.path.join(source_key, file_name) for source_key, file_name, _ in files]}"
+            )
+            for source_key, file_name, entry in files:
+                suffix = hashlib.sha256(os.path.join(source_key, file_name).encode("utf-8")).hexdigest()[:8]
+                documents[f"{document}~{suffix}"] = entry
+
+        results, image_folders = [], {}
+        for document in sorted(documents):
+            entry = documents[document]
+            cache_path = self.cache_path(entry["cache_key"])
+            if not os.path.exists(cache_path):
+                # Conversion failed for this file, it is retried on the next run
+                continue
+            with open(cache_path, "r", encoding="utf-8") as f:
+                words = json.load(f)
+            # Identical content may have been cached under a different file name
+            for word in words:
+                word["document"] = document
+            results.extend(words)
+            if entry.get("image_folder"):
+                image_folders[document] = entry["image_folder"]
+        return results, image_folders
+
+    def record_run(self, source_folder, processed_tasks, converted_documents, results, images_folder):
+        """Cache this run's results, persist the manifest and return the full corpus.
+
+        Callers hold the publish lock, so re-reading here picks up runs that finished meanwhile.
+        """
+        self.sources = self._read_sources()
+        for source_key, entries in self.planned_sources.items():
+            if source_key in self.added_sources:
+                self.sources[source_key] = {**self.sources.get(source_key, {}), **entries}
+            else:
+                self.sources[source_key] = entries
+        self.store_results(source_folder, processed_tasks, converted_documents, results, images_folder)
+        self.save()
+        self.remove_unreferenced_runs()
+        return self.collect_results()
+
+    @classmethod
+    def mark_run_finished(cls, config: ConfigEntity):
+        """Let later runs delete this run's workspace once no manifest entry references it."""
+        if config.run_id and os.path.isdir(config.run_artifact_folder_path):
+            open(os.path.join(config.run_artifact_folder_path, cls.FINISHED_MARKER), "w").close()
+
+    def remove_unreferenced_runs(self):
+        """Delete the workspaces of finished runs whose page images no manifest entry points at.
+
+        Workspaces of queued or running runs carry no finished marker and are kept, as is the
+        current run's, which still publishes from it. Callers hold the publish lock, so the
+        manifest cannot gain a reference meanwhile.
+        """
+        if not os.path.isdir(self.runs_folder):
+            return
+        referenced = set()
+        for entries in self.sources.values():
+            for entry in entries.values():
+                if entry.get("image_folder"):
+                    relative = os.path.relpath(os.path.abspath(entry["image_folder"]), self.runs_folder)
+                    if not relative.startswith(os.pardir):
+                        referenced.add(relative.split(os.sep)[0])
+
+        removed = []
+        for run_id in os.listdir(self.runs_folder):
+            run_folder = os.path.join(self.runs_folder, run_id)
+            if run_id in referenced or not os.path.exists(os.path.join(run_folder, self.FINISHED_MARKER)):
+                continue
+            shutil.rmtree(run_folder, ignore_errors=True)
+            removed.append(run_id)
+        if removed:
+            logger.logger.info(f"Removed {len(removed)} run workspaces no document references: {sorted(removed)}")
+
+    def save(self):
+        """Persist the manifest and delete cache entries no document references anymore."""
+        try:
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"sources": self.sources}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+
+            referenced = {
+                f"{entry['cache_key']}.json"
+                for entries in self.sources.values()
+                for entry in entries.values()
+            }
+            for file_name in os.listdir(self.cache_folder):
+                if file_name.endswith(".json") and file_name not in referenced:
+                    os.remove(os.path.join(self.cache_folder, file_name))
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
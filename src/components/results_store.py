@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import uuid
+import shutil
+import threading
+import numpy as np
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.components.search_index import SearchIndex
+
+
+class ResultsStore:
+    """Columnar, memory-mapped store of OCR word records, replacing the indented final_output.json.
+
+    Layout of one version folder (the search index adds its own files next to these):
+        meta.json         documents, pages [document_id, page_image, image_path], the `tokens` string table
+                          and the id of the run that published it
+        word_ids.npy      int32 per row, index into `tokens` (the original-cased word)
+        page_ids.npy      int32 per row, index into `pages`
+        bboxes.npy        float32 (rows, 4) [x_min, y_min, x_max, y_max]
+        confidences.npy   float32 per row
+        line_ids.npy      int32 per row, store-wide id of the text line a word belongs to
+
+    Rows of a page are contiguous and in reading order, so adjacent words have adjacent row ids.
+
+    Versions live under one root; current.json names the published one.
+    """
+
+    _cache_lock = threading.Lock()
+    _cache = {}
+
+    def __init__(self, folder, version):
+        self.folder = folder
+        self.version = version
+
+        with open(os.path.join(folder, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.documents = meta["documents"]
+        self.pages = meta["pages"]
+        self.tokens = meta["tokens"]
+        self.run_id = meta.get("run_id")
+        self.page_lookup = {
+            (self.documents[page[0]], page[1]): page_id for page_id, page in enumerate(self.pages)
+        }
+
+        # Memory-mapped: only the pages touched by a lookup are read from disk
+        self.word_ids = np.load(os.path.join(folder, "word_ids.npy"), mmap_mode="r")
+        self.page_ids = np.load(os.path.join(folder, "page_ids.npy"), mmap_mode="r")
+        self.bboxes = np.load(os.path.join(folder, "bboxes.npy"), mmap_mode="r")
+        self.confidences = np.load(os.path.join(folder, "confidences.npy"), mmap_mode="r")
+        line_ids_path = os.path.join(folder, "line_ids.npy")
+        # Stores written before lines were tracked treat each page as a single line
+        self.line_ids = np.load(line_ids_path, mmap_mode="r") if os.path.exists(line_ids_path) else self.page_ids
+
+        self._index = None
+
+    def __len__(self):
+        return len(self.word_ids)
+
+    @property
+    def index(self):
+        """Inverted index stored alongside this version, opened on first use."""
+        if self._index is None:
+            self._index = SearchIndex(self)
+        return self._index
+
+    @staticmethod
+    def write(store_root, results, image_folders=None, run_id=None):
+        """Write word records into a new, not yet published, version folder and return it.
+
+        `image_folders` maps a document to the folder holding its page images, which may sit in
+        any run's workspace.
+        """
+        try:
+            image_folders = image_folders or {}
+            version = uuid.uuid4().hex
+            folder = os.path.join(store_root, version)
+            os.makedirs(folder, exist_ok=True)
+
+            documents, document_ids = [], {}
+            pages, page_ids_by_key = [], {}
+            tokens, token_ids = [], {}
+            row_word_ids, row_page_ids, row_line_ids = [], [], []
+            line_key, line_id = None, -1
+
+            for entry in results:
+                document = entry["document"]
+                if document not in document_ids:
+                    document_ids[document] = len(documents)
+                    documents.append(document)
+
+                page_key = (document, entry["page_image"])
+                if page_key not in page_ids_by_key:
+                    page_ids_by_key[page_key] = len(pages)
+                    image_folder = image_folders.get(document)
+                    image_path = os.path.join(image_folder, entry["page_image"]) if image_folder else None
+                    pages.append([document_ids[document], entry["page_image"], image_path])
+
+                word = entry["word"]
+                if word not in token_ids:
+                    token_ids[word] = len(tokens)
+                    tokens.append(word)
+
+                # Records without a line (legacy JSON) put the whole page on one line
+                if (page_key, entry.get("line")) != line_key:
+                    line_key, line_id = (page_key, entry.get("line")), line_id + 1
+
+                row_word_ids.append(token_ids[word])
+                row_page_ids.append(page_ids_by_key[page_key])
+                row_line_ids.append(line_id)
+
+            np.save(os.path.join(folder, "word_ids.npy"), np.asarray(row_word_ids, dtype=np.int32))
+            np.save(os.path.join(folder, "page_ids.npy"), np.asarray(row_page_ids, dtype=np.int32))
+            np.save(os.path.join(folder, "line_ids.npy"), np.asarray(row_line_ids, dtype=np.int32))
+            np.save(
+                os.path.join(folder, "bboxes.npy"),
+                np.asarray([entry["bounding_box"] for entry in results], dtype=np.float32).reshape(-1, 4)
+            )
+            np.save(
+                os.path.join(folder, "confidences.npy"),
+                np.asarray([entry["confidence"] for entry in results], dtype=np.float32)
+            )
+            with open(os.path.join(folder, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(
+                    {"documents": documents, "pages": pages, "tokens": tokens, "run_id": run_id},
+                    f, ensure_ascii=False
+                )
+
+            logger.logger.info(
+                f"Results store {version} written: {len(results)} words, {len(tokens)} distinct, {len(pages)} pages"
+            )
+            return folder
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    @staticmethod
+    def publish(store_root, folder):
+        """Atomically make a written version the current one and drop the versions before the previous one.
+
+        The previous version stays on disk: its readers open search index tables lazily, so they
+        may still read from it until their next load() picks up the new version.
+        """
+        try:
+            version = os.path.basename(folder)
+            previous_version = ResultsStore.current_version(store_root)
+            current_path = os.path.join(store_root, "current.json")
+            tmp_path = f"{current_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": version}, f)
+            os.replace(tmp_path, current_path)
+
+            # Readers that already mapped an older version keep their data until they unmap it
+            for name in os.listdir(store_root):
+                if name not in (version, previous_version) and os.path.isdir(os.path.join(store_root, name)):
+                    shutil.rmtree(os.path.join(store_root, name), ignore_errors=True)
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    @staticmethod
+    def current_version(store_root):
+        current_path = os.path.join(store_root, "current.json")
+        if not os.path.exists(current_path):
+            return None
+        with open(current_path, "r", encoding="utf-8") as f:
+            return json.load(f)["version"]
+
+    @classmethod
+    def load(cls, store_root):
+        """Return the published store, opening it only once per process and version."""
+        try:
+            version = cls.current_version(store_root)
+            if version is None:
+                return None
+
+            with cls._cache_lock:
+                store = cls._cache.get(store_root)
+                if store is None or store.version != version:
+                    store = cls(os.path.join(store_root, version), version)
+                    cls._cache[store_root] = store
+                    logger.logger.info(f"Loaded results store {version} from {store_root}")
+                return store
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    def entry(self, row):
+        """Rebuild the word record of one row in the final_output.json schema."""
+        document_id, page_image = self.pages[int(self.page_ids[row])][:2]
+        return {
+            "document": self.documents[document_id],
+            "page_image": page_image,
+            "word": self.tokens[int(self.word_ids[row])],
+            # float32 storage: round away the widening noise (0.1 -> 0.10000000149...)
+            "bounding_box": [round(float(value), 6) for value in self.bboxes[row]],
+            "confidence": round(float(self.confidences[row]), 6)
+        }
+
+    def page_image_path(self, row):
+        """Where the page image of a row lives, None for stores written before images were tracked."""
+        return self.page_id_image_path(int(self.page_ids[row]))
+
+    def page_id_image_path(self, page_id):
+        page = self.pages[page_id]
+        return page[2] if len(page) > 2 else None
+
+    def page_rows(self, page_id):
+        """Rows of one page, ascending."""
+        page_offsets = self.index.page_offsets
+        return np.arange(page_offsets[page_id], page_offsets[page_id + 1], dtype=np.int64)
+
+    def iter_entries(self):
+        for row in range(len(self)):
+            yield self.entry(row)
+
+    def export_json(self, json_path):
+        """Write the whole store out in the legacy final_output.json format."""
+        try:
+            tmp_path = f"{json_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self.iter_entries()), f, ensure_ascii=False)
+            os.replace(tmp_path, json_path)
+
+            logger.logger.info(f"Results store {self.version} exported to {json_path}")
+            return json_path
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.entity.config_entity import DataSearchConfig
+
+
+class SearchCache:
+    """Process-wide LRU of search matches, with an optional on-disk tier shared by worker processes.
+
+    Matches are (row, term_position) pairs into the results store rather than built records,
+    which keeps entries small however many words a query hits.
+
+    Entries belong to one results store version. When detection publishes a new version every
+    cached entry of the old one is dropped, so a cache hit always reflects the current corpus.
+    """
+
+    _lock = threading.Lock()
+    _entries = OrderedDict()
+    _version = None
+
+    def __init__(self, config: DataSearchConfig):
+        self.max_entries = max(0, config.search_cache_size)
+        self.disk_folder = config.search_cache_folder if config.search_disk_cache else None
+
+    @staticmethod
+    def make_key(search_query, **options):
+        """Hash of the whitespace-normalized query and every option that changes its matches."""
+        normalized = " ".join(search_query.split())
+        return hashlib.sha256(
+            json.dumps([normalized, options], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _use_version(self, version):
+        # Called with the lock held
+        if SearchCache._version != version:
+            SearchCache._entries.clear()
+            SearchCache._version = version
+
+    def _remember(self, version, key, matches):
+        with self._lock:
+            self._use_version(version)
+            if self.max_entries == 0:
+                return
+            self._entries[key] = matches
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, version, key):
+        """Cached matches of a query against a store version, or None."""
+        with self._lock:
+            self._use_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if self.disk_folder is None:
+            return None
+        cache_path = os.path.join(self.disk_folder, version, f"{key}.json")
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                matches = [tuple(match) for match in json.load(f)]
+        except (OSError, ValueError):
+            # Removed or replaced by another worker meanwhile; recompute
+            return None
+        self._remember(version, key, matches)
+        return matches
+
+    def put(self, version, key, matches):
+        try:
+            self._remember(version, key, matches)
+            if self.disk_folder is None:
+                return
+
+            version_folder = os.path.join(self.disk_folder, version)
+            os.makedirs(version_folder, exist_ok=True)
+            cache_path = os.path.join(version_folder, f"{key}.json")
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(matches, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+
+            # Results of superseded corpus versions can never be served again
+            for name in os.listdir(self.disk_folder):
+                if name != version:
+                    shutil.rmtree(os.path.join(self.disk_folder, name), ignore_errors=True)
+                    logger.logger.info(f"Dropped search cache of results store version {name}")
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
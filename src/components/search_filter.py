@@ -0,0 +1,133 @@
+from fnmatch import fnmatchcase
+import numpy as np
+
+
+class SearchFilter:
+    """Document, page range, confidence and region predicates restricting which words a query matches.
+
+    `document` is a name or glob, matched with or without the .pdf suffix; `page_from` and
+    `page_to` bound the page number inclusively; `region` is (x_min, y_min, x_max, y_max) in
+    page-relative coordinates and keeps words whose box centre lies inside it, e.g.
+    (0, 0, 1, 0.2) for the top fifth of the page.
+
+    Selective filters are resolved to their rows before term matching, from the index's page
+    offsets and confidence order, so a query scoped to one document costs about as much as
+    that document. Broad ones are applied to the matched rows instead.
+    """
+
+    def __init__(self, document=None, page_from=None, page_to=None, min_confidence=None, region=None):
+        self.document = document or None
+        self.page_from = page_from
+        self.page_to = page_to
+        self.min_confidence = min_confidence
+        self.region = None
+        if region is not None:
+            self.region = tuple(float(value) for value in region)
+            if len(self.region) != 4:
+                raise ValueError("region must be x_min,y_min,x_max,y_max")
+            x_min, y_min, x_max, y_max = self.region
+            if not (0 <= x_min < x_max <= 1 and 0 <= y_min < y_max <= 1):
+                raise ValueError("region must lie within 0-1 with x_min < x_max and y_min < y_max")
+        if page_from is not None and page_to is not None and page_from > page_to:
+            raise ValueError("page_from must not be after page_to")
+
+    @staticmethod
+    def parse_region(text):
+        """Region tuple of an "x_min,y_min,x_max,y_max" string, None for an empty one."""
+        if not text or not text.strip():
+            return None
+        try:
+            return tuple(float(value) for value in text.split(","))
+        except ValueError as e:
+            raise ValueError("region must be x_min,y_min,x_max,y_max") from e
+
+    def __bool__(self):
+        return any(value is not None for value in self.options().values())
+
+    def options(self):
+        """The predicates as a JSON-serializable dict, part of the search cache key."""
+        return {
+            "document": self.document,
+            "page_from": self.page_from,
+            "page_to": self.page_to,
+            "min_confidence": self.min_confidence,
+            "region": list(self.region) if self.region is not None else None
+        }
+
+    def page_ids(self, store):
+        """Ids of the pages passing the document and page predicates, ascending, or None without such predicates."""
+        if self.document is None and self.page_from is None and self.page_to is None:
+            return None
+        index = store.index
+
+        if self.document is not None:
+            document_ids = [
+                document_id for document_id, name in enumerate(store.documents)
+                if fnmatchcase(name, self.document) or fnmatchcase(f"{name}.pdf", self.document)
+            ]
+            pages = [index.document_pages[document_id] for document_id in document_ids]
+            page_ids = np.sort(np.concatenate(pages)) if pages else np.zeros(0, dtype=np.int64)
+        else:
+            page_ids = np.arange(len(store.pages), dtype=np.int64)
+
+        page_numbers = index.page_numbers[page_ids]
+        if self.page_from is not None:
+            page_ids = page_ids[page_numbers >= self.page_from]
+            page_numbers = page_numbers[page_numbers >= self.page_from]
+        if self.page_to is not None:
+            page_ids = page_ids[page_numbers <= self.page_to]
+        return page_ids
+
+    def row_mask(self, store, rows):
+        """Which of `rows` pass the confidence and region predicates."""
+        mask = np.ones(len(rows), dtype=bool)
+        if self.min_confidence is not None:
+            # Compared in the store's float32, like the sorted confidences
+            mask &= np.asarray(store.confidences)[rows] >= np.float32(self.min_confidence)
+        if self.region is not None:
+            boxes = np.asarray(store.bboxes)[rows]
+            x_min, y_min, x_max, y_max = self.region
+            centre_x = (boxes[:, 0] + boxes[:, 2]) / 2
+            centre_y = (boxes[:, 1] + boxes[:, 3]) / 2
+            mask &= (centre_x >= x_min) & (centre_x <= x_max) & (centre_y >= y_min) & (centre_y <= y_max)
+        return mask
+
+    def apply(self, store, rows, page_ids=None):
+        """The rows (ascending) among `rows` passing every predicate."""
+        rows = np.asarray(rows)
+        if page_ids is not None:
+            rows = rows[np.isin(np.asarray(store.page_ids)[rows], page_ids)]
+        return rows[self.row_mask(store, rows)]
+
+    def candidate_rows(self, store, scan_ratio):
+        """Every row passing the filter, ascending, or None when the filter keeps more than `scan_ratio` of the store.
+
+        Rows come from the page offsets of the selected pages or from the tail of the confidence
+        order, whichever is smaller; only those rows are read.
+        """
+        index = store.index
+        limit = scan_ratio * len(store)
+        page_ids = self.page_ids(store)
+        rows = None
+
+        if page_ids is not None:
+            starts = np.asarray(index.page_offsets[page_ids])
+            lengths = np.asarray(index.page_offsets[page_ids + 1]) - starts
+            if lengths.sum() <= limit:
+                # Concatenated ranges starts[i]:starts[i] + lengths[i]
+                rows = (
+                    np.arange(lengths.sum(), dtype=np.int64)
+                    - np.repeat(np.cumsum(lengths) - lengths, lengths)
+                    + np.repeat(starts, lengths)
+                )
+
+        if self.min_confidence is not None:
+            order, sorted_confidences = index.confidence_order
+            first = int(np.searchsorted(sorted_confidences, np.float32(self.min_confidence), side="left"))
+            if len(order) - first <= limit and (rows is None or len(order) - first < len(rows)):
+                rows = np.sort(np.asarray(order[first:], dtype=np.int64))
+                return self.apply(store, rows, page_ids)
+
+        if rows is None:
+            return None
+        return self.apply(store, rows)
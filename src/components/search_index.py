@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import bisect
+import numpy as np
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.components.fuzzy_matcher import FuzzyMatcher
+
+
+class SearchIndex:
+    """Inverted index over a results store version: lowercased term -> sorted postings of word rows.
+
+    Files added to the store's version folder:
+        terms.json               sorted distinct lowercased words
+        postings.npy             row ids grouped by term, ascending within a term
+        term_offsets.npy         postings[term_offsets[t]:term_offsets[t + 1]] are the rows of terms[t]
+        token_terms.npy          term id of each entry of the store's `tokens`
+        page_offsets.npy         rows page_offsets[p]:page_offsets[p + 1] are the words of page p
+        confidence_order.npy     row ids by ascending confidence
+        sorted_confidences.npy   confidences in that order, for binary search
+
+    The last four let search filters find the rows of some pages, or above some confidence,
+    without touching the rest of the store. Indexes built before they existed derive them on load.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.version = store.version
+
+        with open(os.path.join(store.folder, "terms.json"), "r", encoding="utf-8") as f:
+            self.terms = json.load(f)
+
+        self.postings = np.load(os.path.join(store.folder, "postings.npy"), mmap_mode="r")
+        self.term_offsets = np.load(os.path.join(store.folder, "term_offsets.npy"), mmap_mode="r")
+
+        self._fuzzy_matcher = None
+        self._token_terms = None
+        self._page_offsets = None
+        self._confidence_order = None
+        self._document_pages = None
+        self._page_numbers = None
+
+    def _load_table(self, name, derive):
+        path = os.path.join(self.store.folder, name)
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else derive()
+
+    @property
+    def token_terms(self):
+        if self._token_terms is None:
+            self._token_terms = self._load_table(
+                "token_terms.npy",
+                lambda: np.asarray([bisect.bisect_left(self.terms, token.lower()) for token in self.store.tokens], dtype=np.int32)
+            )
+        return self._token_terms
+
+    @property
+    def page_offsets(self):
+        if self._page_offsets is None:
+            self._page_offsets = self._load_table(
+                "page_offsets.npy", lambda: self.offsets(np.asarray(self.store.page_ids), len(self.store.pages))
+            )
+        return self._page_offsets
+
+    @property
+    def confidence_order(self):
+        """(row ids by ascending confidence, the confidences in that order)."""
+        if self._confidence_order is None:
+            if os.path.exists(os.path.join(self.store.folder, "confidence_order.npy")):
+                order = np.load(os.path.join(self.store.folder, "confidence_order.npy"), mmap_mode="r")
+                values = np.load(os.path.join(self.store.folder, "sorted_confidences.npy"), mmap_mode="r")
+            else:
+                confidences = np.asarray(self.store.confidences)
+                order = np.argsort(confidences, kind="stable").astype(np.int32)
+                values = confidences[order]
+            self._confidence_order = (order, values)
+        return self._confidence_order
+
+    @property
+    def document_pages(self):
+        """Page ids of every document, ascending."""
+        if self._document_pages is None:
+            pages_by_document = [[] for _ in self.store.documents]
+            for page_id, page in enumerate(self.store.pages):
+                pages_by_document[page[0]].append(page_id)
+            self._document_pages = [np.asarray(page_ids, dtype=np.int64) for page_ids in pages_by_document]
+        return self._document_pages
+
+    @property
+    def page_numbers(self):
+        """Page number of every page, read from its img_<n> page image name (0 if it has none)."""
+        if self._page_numbers is None:
+            numbers = []
+            for page in self.store.pages:
+                digits = os.path.splitext(page[1])[0].rpartition("_")[2]
+                numbers.append(int(digits) if digits.isdigit() else 0)
+            self._page_numbers = np.asarray(numbers, dtype=np.int64)
+        return self._page_numbers
+
+    @staticmethod
+    def offsets(ids, count):
+        """Start offsets of each id's group in a grouped id array, plus the total at the end."""
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(ids, minlength=count)) if len(ids) else 0
+        return offsets
+
+    @property
+    def fuzzy_matcher(self):
+        """Fuzzy candidate structures over the vocabulary, built on the first fuzzy query."""
+        if self._fuzzy_matcher is None:
+            self._fuzzy_matcher = FuzzyMatcher(self.terms)
+        return self._fuzzy_matcher
+
+    @staticmethod
+    def build(folder):
+        """Build the index files for a written results store version folder."""
+        try:
+            with open(os.path.join(folder, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            tokens = meta["tokens"]
+            word_ids = np.load(os.path.join(folder, "word_ids.npy"))
+            page_ids = np.load(os.path.join(folder, "page_ids.npy"))
+            confidences = np.load(os.path.join(folder, "confidences.npy"))
+
+            # Several original spellings ("Total", "TOTAL") share one lowercased term
+            terms = sorted({token.lower() for token in tokens})
+            term_ids = {term: i for i, term in enumerate(terms)}
+            token_term_ids = np.asarray([term_ids[token.lower()] for token in tokens], dtype=np.int32)
+            row_term_ids = token_term_ids[word_ids] if len(word_ids) else np.zeros(0, dtype=np.int32)
+
+            # Stable sort keeps rows ascending inside each term's postings
+            postings = np.argsort(row_term_ids, kind="stable").astype(np.int32)
+            term_offsets = SearchIndex.offsets(row_term_ids, len(terms))
+
+            np.save(os.path.join(folder, "postings.npy"), postings)
+            np.save(os.path.join(folder, "term_offsets.npy"), term_offsets)
+
+            # Tables for search filters; a page's rows are contiguous, so its offsets bound them
+            np.save(os.path.join(folder, "token_terms.npy"), token_term_ids)
+            np.save(os.path.join(folder, "page_offsets.npy"), SearchIndex.offsets(page_ids, len(meta["pages"])))
+            confidence_order = np.argsort(confidences, kind="stable").astype(np.int32)
+            np.save(os.path.join(folder, "confidence_order.npy"), confidence_order)
+            np.save(os.path.join(folder, "sorted_confidences.npy"), confidences[confidence_order])
+            with open(os.path.join(folder, "terms.json"), "w", encoding="utf-8") as f:
+                json.dump(terms, f, ensure_ascii=False)
+
+            logger.logger.info(f"Search index built: {len(word_ids)} postings over {len(terms)} terms")
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    def term_postings(self, term_id):
+        return self.postings[self.term_offsets[term_id]:self.term_offsets[term_id + 1]]
+
+    def match_rows(self, term, fuzzy_threshold, partial_match=False):
+        """Rows of every term matching `term` by substring (if enabled) or fuzzy ratio, ascending."""
+        return self.match_rows_many([(term, fuzzy_threshold, partial_match)])[0]
+
+    def match_rows_many(self, queries, candidate_rows=None):
+        """match_rows() for a list of (term, fuzzy_threshold, partial_match).
+
+        Vocabulary matching is shared through FuzzyMatcher.match_many, and postings of a term
+        matched by several queries are read once. With `candidate_rows` (ascending) only those
+        rows are searched, by matching the terms they hold rather than reading postings, so the
+        cost follows the candidates rather than the corpus.
+        """
+        keys = [(term.lower(), fuzzy_threshold, partial_match) for term, fuzzy_threshold, partial_match in queries]
+        distinct = list(dict.fromkeys(keys))
+        if candidate_rows is not None:
+            return self.match_candidate_rows(keys, distinct, np.asarray(candidate_rows))
+
+        postings = {}
+        rows = {}
+        for key, term_ids in zip(distinct, self.fuzzy_matcher.match_many(distinct)):
+            for term_id in term_ids:
+                if term_id not in postings:
+                    postings[term_id] = self.term_postings(term_id)
+            rows[key] = (
+                np.sort(np.concatenate([postings[term_id] for term_id in term_ids]))
+                if term_ids else np.zeros(0, dtype=np.int32)
+            )
+        return [rows[key] for key in keys]
+
+    def match_candidate_rows(self, keys, distinct, candidate_rows):
+        candidate_terms = np.asarray(self.token_terms)[np.asarray(self.store.word_ids)[candidate_rows]]
+        rows = {
+            key: candidate_rows[np.isin(candidate_terms, term_ids)]
+            for key, term_ids in zip(
+                distinct, self.fuzzy_matcher.match_many(distinct, term_ids=np.unique(candidate_terms))
+            )
+        }
+        return [rows[key] for key in keys]
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+class TextLayerExtractor:
+    """Read the words and boxes of a PDF's embedded text layer with poppler's pdftotext.
+
+    Digitally produced PDFs, including everything LibreOffice converts, carry exact text, so their
+    pages need no OCR. Pages whose text layer is missing, too sparse or badly encoded are left out
+    and go through the model as before.
+    """
+
+    # Share of characters pdftotext could not map to Unicode above which a page's text is not trusted
+    MAX_UNMAPPED_RATIO = 0.1
+
+    def __init__(self, min_words, timeout):
+        self.min_words = max(1, min_words)
+        self.timeout = timeout
+
+    def extract(self, pdf_path):
+        """Return {page_number: lines} for the usable pages; a line is a list of (text, relative bbox)."""
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            layout_path = os.path.join(tmp_folder, "layout.html")
+            # Written to a file and parsed incrementally, large documents never sit in memory as XML text
+            subprocess.run(
+                ["pdftotext", "-bbox-layout", "-enc", "UTF-8", pdf_path, layout_path],
+                check=True,
+                timeout=self.timeout,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+            return self.parse(layout_path)
+
+    def parse(self, layout_path):
+        pages = {}
+        page_number = 0
+        for _, elem in ET.iterparse(layout_path, events=("end",)):
+            if _local_name(elem.tag) != "page":
+                continue
+            page_number += 1
+            width = float(elem.get("width"))
+            height = float(elem.get("height"))
+
+            lines = []
+            for line in (node for node in elem.iter() if _local_name(node.tag) == "line"):
+                words = []
+                for word in (node for node in line if _local_name(node.tag) == "word"):
+                    text = (word.text or "").strip()
+                    if not text:
+                        continue
+                    words.append((text, [
+                        min(max(float(word.get("xMin")) / width, 0.0), 1.0),
+                        min(max(float(word.get("yMin")) / height, 0.0), 1.0),
+                        min(max(float(word.get("xMax")) / width, 0.0), 1.0),
+                        min(max(float(word.get("yMax")) / height, 0.0), 1.0)
+                    ]))
+                if words:
+                    lines.append(words)
+
+            if self.is_usable(lines):
+                pages[page_number] = lines
+            # Pages are dropped as soon as they are read
+            elem.clear()
+        return pages
+
+    def is_usable(self, lines):
+        texts = [text for line in lines for text, _ in line]
+        if len(texts) < self.min_words:
+            return False
+        characters = sum(len(text) for text in texts)
+        unmapped = sum(text.count("\ufffd") for text in texts)
+        return unmapped <= characters * self.MAX_UNMAPPED_RATIO
@@ -0,0 +1,240 @@
+import os
+import sys
+import shutil
+import stat
+import tarfile
+import zipfile
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.entity.config_entity import UploadIngestionConfig
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+# Plain form fields are small options, never file content
+MAX_FIELD_BYTES = 64 * 1024
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadIngestion:
+    """Stream a multipart upload into a run's input folder without holding files in memory.
+
+    Each file part is written to disk as its chunks arrive. Zip and tar parts are extracted into
+    the same flat folder as soon as they are complete and then deleted, so the pipeline sees the
+    same layout as a server-side input folder. Client errors are raised as ValueError.
+    """
+
+    def __init__(self, config: UploadIngestionConfig):
+        try:
+            self.config = config
+            self.supported_extensions = set(
+                config.supported_doc_extenctions + config.supported_img_extenctions + ["pdf"]
+            )
+            self.fields = {}
+            self.saved_files = []
+            self.skipped_files = []
+            self.received_bytes = 0
+            self.extracted_bytes = 0
+            self._headers = {}
+            self._header_field = b""
+            self._header_value = b""
+            self._part = None
+            self.parser = None
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
+
+    def begin(self, content_type):
+        """Set up the parser for the boundary of the request's Content-Type header."""
+        media_type, options = parse_options_header(content_type or "")
+        if media_type != b"multipart/form-data" or b"boundary" not in options:
+            raise ValueError("Expected a multipart/form-data request")
+
+        self.parser = MultipartParser(options[b"boundary"], callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end
+        })
+
+    def feed(self, chunk):
+        """Parse the next chunk of the request body, writing file data straight to disk."""
+        self.received_bytes += len(chunk)
+        if self.config.upload_max_bytes and self.received_bytes > self.config.upload_max_bytes:
+            raise ValueError(f"Upload exceeds {self.config.upload_max_bytes} bytes")
+        self.parser.write(chunk)
+
+    def finalize(self):
+        self.parser.finalize()
+        shutil.rmtree(self.config.staging_folder, ignore_errors=True)
+        if not self.saved_files:
+            raise ValueError("The upload contains no supported files")
+        logger.logger.info(
+            f"Received {len(self.saved_files)} files for run {self.config.run_id} "
+            f"({self.received_bytes} bytes), skipped {len(self.skipped_files)}"
+        )
+
+    def discard(self):
+        """Remove everything written so far after a rejected or interrupted upload."""
+        if self._part is not None and self._part.get("file") is not None:
+            self._part["file"].close()
+        self._part = None
+        # Nothing but the upload has been written to the run's workspace yet
+        shutil.rmtree(self.config.run_folder, ignore_errors=True)
+
+    # ---------------- Multipart callbacks ----------------
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = params.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in params:
+            self._part = {"name": name, "value": bytearray(), "file": None}
+            return
+
+        raw_name = params[b"filename"].decode("utf-8", "replace")
+        filename = self.clean_name(raw_name)
+        part = {"name": name, "filename": filename, "file": None, "path": None, "archive": False}
+        if filename and filename.lower().endswith(ARCHIVE_SUFFIXES):
+            part["archive"] = True
+            part["path"] = os.path.join(self.config.staging_folder, f"{len(self.saved_files)}_{filename}")
+        else:
+            part["path"] = self.reserve_path(filename)
+
+        if part["path"] is None:
+            # The body still has to be read past, it just isn't written anywhere
+            self.skipped_files.append(raw_name)
+        else:
+            part["file"] = open(part["path"], "wb")
+        self._part = part
+
+    def _on_part_data(self, data, start, end):
+        part = self._part
+        if part is None:
+            return
+        if "value" in part:
+            part["value"] += data[start:end]
+            if len(part["value"]) > MAX_FIELD_BYTES:
+                raise ValueError(f"Form field '{part['name']}' is too large")
+        elif part["file"] is not None:
+            part["file"].write(data[start:end])
+
+    def _on_part_end(self):
+        part, self._part = self._part, None
+        if part is None:
+            return
+        if "value" in part:
+            self.fields[part["name"]] = part["value"].decode("utf-8", "replace")
+            return
+        if part["file"] is None:
+            return
+
+        part["file"].close()
+        if part["archive"]:
+            try:
+                self.extract_archive(part["path"], part["filename"])
+            finally:
+                os.remove(part["path"])
+        else:
+            self.saved_files.append(os.path.basename(part["path"]))
+
+    # ---------------- Files and archives ----------------
+
+    @staticmethod
+    def clean_name(name):
+        """Base name of a client-supplied path, dropping any directories and hidden-file names."""
+        name = os.path.basename(name.replace("\\", "/")).strip()
+        if not name or name.startswith("."):
+            return None
+        return name
+
+    def reserve_path(self, name):
+        """Unused path in the input folder for a supported file name, or None to skip it.
+
+        Archives and multi-file uploads are flattened, so a name already taken gets a numeric suffix.
+        The extension is lower-cased because input files are collected by lower-case pattern.
+        """
+        if not name:
+            return None
+        stem, ext = os.path.splitext(name)
+        ext = ext.lower()
+        if ext.lstrip(".") not in self.supported_extensions:
+            return None
+
+        candidate, counter = f"{stem}{ext}", 1
+        while True:
+            path = os.path.join(self.config.input_folder, candidate)
+            try:
+                # Exclusive create so two parts can never claim the same name
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return path
+            except FileExistsError:
+                candidate = f"{stem}_{counter}{ext}"
+                counter += 1
+
+    def copy_member(self, source, name):
+        path = self.reserve_path(self.clean_name(name))
+        if path is None:
+            self.skipped_files.append(name)
+            return
+
+        with open(path, "wb") as target:
+            # Count the bytes really decompressed; archive headers can lie about member sizes
+            while True:
+                chunk = source.read(COPY_CHUNK_BYTES)
+                if not chunk:
+                    break
+                self.extracted_bytes += len(chunk)
+                if self.config.upload_max_extracted_bytes and self.extracted_bytes > self.config.upload_max_extracted_bytes:
+                    raise ValueError(f"Archives expand beyond {self.config.upload_max_extracted_bytes} bytes")
+                target.write(chunk)
+        self.saved_files.append(os.path.basename(path))
+
+    def extract_archive(self, archive_path, archive_name):
+        """Copy the regular-file members of a zip or tar archive into the input folder."""
+        try:
+            members = 0
+            if archive_name.lower().endswith(".zip"):
+                with zipfile.ZipFile(archive_path) as archive:
+                    for info in archive.infolist():
+                        # Directories and symlinks are never followed or recreated
+                        if info.is_dir() or stat.S_ISLNK(info.external_attr >> 16):
+                            continue
+                        members += 1
+                        if members > self.config.upload_max_archive_members:
+                            raise ValueError(f"{archive_name} has more than {self.config.upload_max_archive_members} files")
+                        with archive.open(info) as source:
+                            self.copy_member(source, info.filename)
+            else:
+                with tarfile.open(archive_path, mode="r:*") as archive:
+                    for member in archive:
+                        if not member.isfile():
+                            continue
+                        members += 1
+                        if members > self.config.upload_max_archive_members:
+                            raise ValueError(f"{archive_name} has more than {self.config.upload_max_archive_members} files")
+                        with archive.extractfile(member) as source:
+                            self.copy_member(source, member.name)
+            logger.logger.info(f"Extracted {members} files from {archive_name}")
+
+        except (zipfile.BadZipFile, tarfile.TarError) as e:
+            raise ValueError(f"{archive_name} is not a readable archive: {str(e)}") from e
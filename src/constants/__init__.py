@@ -23,3 +23,138 @@ RECOGNITION_MODEL = "crnn_vgg16_bn"
 PRETRAINED = True
 ASSUME_STRAIGHT_TEXT = False
 EXPORT_AS_STRAIGHT_BOXES = True
+
+# Blank page pushed through the predictor once at startup (height, width)
+WARMUP_PAGE_SIZE = (1024, 768)
+
+# === INFERENCE BACKEND ===
+# "pytorch" runs docTR's predictor, "onnx" runs OnnxTR on models exported by src.benchmark.onnx_export
+OCR_BACKEND = "pytorch"
+# Exported detection and recognition models, read from disk only. The onnx backend OCRs pages as
+# straight whatever ASSUME_STRAIGHT_TEXT says, so OnnxTR never fetches its orientation classifiers
+ONNX_MODELS_FOLDER = os.path.join(PROJECT_ROOT, "models", "onnx")
+# Use the int8 models (<arch>_int8.onnx) instead of float32 (<arch>.onnx)
+ONNX_QUANTIZED = True
+# onnxruntime intra-op threads of a predictor outside the OCR worker pool (0 lets onnxruntime pick)
+ONNX_INTRA_OP_THREADS = 0
+
+# === OCR BATCHING ===
+# Pages per predictor call; batches also stop growing once the pixel budget is reached (0 disables it)
+DETECTION_BATCH_SIZE = 8
+DETECTION_BATCH_PIXEL_BUDGET = 8 * 1700 * 2200
+
+# === PARALLEL OCR ===
+# Worker processes each load their own predictor, in batch and streaming runs; 1 keeps OCR in the calling process
+DETECTION_NUM_WORKERS = 1
+# Intra-op threads per worker (torch, or onnxruntime with the onnx backend), keep workers x threads <= physical cores
+DETECTION_TORCH_THREADS = 1
+
+# === PDF TEXT LAYER ===
+# Read words straight from the embedded text of PDF pages and only OCR pages without usable text
+TEXT_LAYER_ENABLED = True
+# Pages with fewer embedded words than this are OCR'd instead
+TEXT_LAYER_MIN_WORDS = 5
+# Seconds before pdftotext is given up on and the document is OCR'd
+TEXT_LAYER_TIMEOUT_SECONDS = 120
+
+# === DOCUMENT CONVERSION ===
+# Concurrent soffice processes, each with its own user profile
+CONVERSION_MAX_WORKERS = 4
+# Seconds before a single LibreOffice conversion is killed
+CONVERSION_TIMEOUT_SECONDS = 300
+
+# === RASTERIZATION ===
+# Used when RASTER_DETECTION_SCALE is 0
+RASTER_DPI = 200
+# pdftoppm processes per PDF chunk
+RASTER_THREAD_COUNT = 1
+# Pages rendered per pdftoppm call; bounds temporary disk and memory regardless of page count
+RASTER_CHUNK_PAGES = 16
+
+# === PAGE PREPROCESSING ===
+# Input side of docTR's detection models; pages are resized to it before detection
+DETECTION_INPUT_SIZE = 1024
+# Render pages with their long side at this multiple of DETECTION_INPUT_SIZE instead of at RASTER_DPI (0 disables).
+# Recognition reads word crops from the full page, so it needs headroom above the detector input:
+# 2 puts A4 pages at about 175 DPI, with 10 pt text about 24 px high for the 32 px recognizer crops
+RASTER_DETECTION_SCALE = 2
+# Render pages in grayscale; halves the page images kept on disk and in the streaming queues
+PREPROCESS_GRAYSCALE = False
+# Crop blank margins before OCR so text fills more of the detector input; word boxes are mapped back to the page
+PREPROCESS_AUTO_CROP = True
+# Pixels lighter than this (0-255) count as margin, and cropped pages keep this many pixels of it
+PREPROCESS_CROP_THRESHOLD = 240
+PREPROCESS_CROP_PADDING = 16
+# Long side of the page images kept for annotation; OCR reads the full-size pages from memory (0 keeps full size)
+ANNOTATION_IMAGE_MAX_SIDE = 1600
+
+# === PAGE DEDUPLICATION ===
+# Skip OCR for near-blank pages and reuse the words of near-duplicates of a page already OCR'd
+PAGE_FILTER_ENABLED = True
+# Pages whose dark pixels cover less than this share of the page count as blank (separator sheets,
+# pages holding only a page number or scanner specks) and produce no words
+BLANK_PAGE_INK_RATIO = 0.0005
+# Side of the difference hash (bits = side squared). Pages with close hashes are only candidates:
+# pages differing in a few words often share one, so a duplicate is confirmed on downsampled pixels
+PAGE_HASH_SIZE = 32
+# Candidates differ in at most this many hash bits; a re-encoded scan of a page flips a few dozen
+PAGE_HASH_MAX_DISTANCE = 128
+# Candidates are duplicates when no cell of their 128x128 gray thumbnails differs by more than this
+# many levels (0-255); re-encoding moves cells by a few levels, a changed word by far more
+PAGE_PIXEL_MAX_DIFFERENCE = 8
+# Keep the words of hashed pages under artifacts/page_cache, so duplicate pages of later runs are reused too
+PAGE_CACHE_PERSIST = True
+
+# === STREAMING PIPELINE ===
+# Run convert/rasterize/OCR/annotate as overlapping stages instead of one after another
+PIPELINE_STREAMING = False
+# Items buffered between two streaming stages before the producer blocks
+STREAMING_QUEUE_SIZE = 32
+
+# === INCREMENTAL PROCESSING ===
+# Reuse cached OCR results of input files whose content and OCR settings are unchanged
+INCREMENTAL_PROCESSING = True
+
+# === RESULTS STORAGE ===
+# Also write the legacy final_output.json after every detection run (it can always be exported on demand)
+EXPORT_JSON_RESULTS = False
+
+# === BACKGROUND JOBS ===
+# Pipeline runs executed concurrently per API worker process
+JOB_WORKERS = 1
+# Seconds between checks for jobs queued by other worker processes
+JOB_POLL_INTERVAL_SECONDS = 2
+# Minimum seconds between progress writes to the job database
+JOB_PROGRESS_INTERVAL_SECONDS = 1
+
+# === ANNOTATION RENDERING ===
+# Write annotated page JPEGs during detection and search; otherwise pages are only drawn on request
+EAGER_ANNOTATION = False
+# Rendered annotated pages kept in memory per API worker process
+ANNOTATION_CACHE_SIZE = 64
+ANNOTATION_JPEG_QUALITY = 85
+
+# === SEARCH ===
+# "any": every match of every term, "phrase": adjacent terms on one line, "proximity": terms near each other
+SEARCH_MATCH_MODES = ("any", "phrase", "proximity")
+# Default word distance for proximity queries
+SEARCH_PROXIMITY_WORDS = 5
+# Query results kept in memory per API worker process, for the current results store version
+SEARCH_CACHE_SIZE = 256
+# Also share cached results between worker processes through artifacts/data_search/cache
+SEARCH_DISK_CACHE = False
+# Most queries accepted by one POST /search/batch request
+SEARCH_BATCH_MAX_QUERIES = 1000
+# Filters keeping at most this share of all words are searched by scanning just those words;
+# broader ones are applied to the index matches instead
+SEARCH_FILTER_SCAN_RATIO = 0.2
+
+# === UPLOADS ===
+# Largest request body accepted by POST /uploads in bytes (0 disables the limit)
+UPLOAD_MAX_BYTES = 2 * 1024 ** 3
+# Limits per uploaded zip/tar archive, checked against the bytes actually extracted
+UPLOAD_MAX_ARCHIVE_MEMBERS = 10000
+UPLOAD_MAX_EXTRACTED_BYTES = 8 * 1024 ** 3
+# Manifest source every upload is recorded under, by file name: uploading a file of the same name
+# again replaces its earlier version instead of adding it as another document
+UPLOAD_MANIFEST_SOURCE = "uploads"
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 @dataclass
 class DataTransformationArtifact:
@@ -7,12 +7,19 @@ class DataTransformationArtifact:
     """
     image_file_path: str                    # Path to folder containing extracted images
     converted_document_file_path: str  
+    peak_rss_mb: float = 0.0                # Peak resident memory of the process after rasterization
+    converted_documents: list = field(default_factory=list)  # Document names successfully converted in this run
+    run_id: str = None                      # Workspace the run wrote to, None for the shared legacy layout
 
 @dataclass
 class DataDetectionArtifact:
     annotated_image_file_path: str
-    output_json_file_path: str
+    output_json_file_path: str              # Legacy JSON export, None unless EXPORT_JSON_RESULTS is set
+    results_store_path: str = None          # Published columnar results store version
+    run_id: str = None
+    page_counts: dict = field(default_factory=dict)  # Pages of this run by how their words were obtained (ocr, text_layer, blank, duplicate)
 
 @dataclass
 class DataSearchArtifact:
-    search_result_file_path: str
\ No newline at end of file
+    search_result_file_path: str
+    run_id: str = None                      # Pipeline run that published the searched results store
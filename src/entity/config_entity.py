@@ -3,7 +3,7 @@ from datetime import datetime
 from src.constants import *
 
 class ConfigEntity:
-    def __init__(self, timestamp=datetime.now()):
+    def __init__(self, timestamp=datetime.now(), run_id=None):
         timestamp = timestamp.strftime("%m_%d_%Y__%H_%M_%S")
 
         # OCR settings
@@ -12,25 +12,109 @@ class ConfigEntity:
         self.pretrained = PRETRAINED
         self.assume_straight_text = ASSUME_STRAIGHT_TEXT
         self.export_as_straingt_boxes = EXPORT_AS_STRAIGHT_BOXES
+        self.ocr_backend = OCR_BACKEND
+        self.onnx_models_folder = ONNX_MODELS_FOLDER
+        self.onnx_quantized = ONNX_QUANTIZED
+        self.onnx_intra_op_threads = ONNX_INTRA_OP_THREADS
+        self.warmup_page_size = WARMUP_PAGE_SIZE
+        self.detection_batch_size = DETECTION_BATCH_SIZE
+        self.detection_batch_pixel_budget = DETECTION_BATCH_PIXEL_BUDGET
+        self.detection_num_workers = DETECTION_NUM_WORKERS
+        self.detection_torch_threads = DETECTION_TORCH_THREADS
+
+        # PDF text layer
+        self.text_layer_enabled = TEXT_LAYER_ENABLED
+        self.text_layer_min_words = TEXT_LAYER_MIN_WORDS
+        self.text_layer_timeout = TEXT_LAYER_TIMEOUT_SECONDS
 
         # Supported file extensions
         self.supported_doc_extenctions = SUPPORTED_DOC_EXTENSIONS
         self.supported_img_extenctions = SUPPORTED_IMG_EXTENSIONS
 
+        # Document conversion
+        self.conversion_max_workers = CONVERSION_MAX_WORKERS
+        self.conversion_timeout = CONVERSION_TIMEOUT_SECONDS
+
+        # Rasterization
+        self.raster_dpi = RASTER_DPI
+        self.raster_thread_count = RASTER_THREAD_COUNT
+        self.raster_chunk_pages = RASTER_CHUNK_PAGES
+
+        # Page preprocessing
+        self.detection_input_size = DETECTION_INPUT_SIZE
+        self.raster_detection_scale = RASTER_DETECTION_SCALE
+        self.preprocess_grayscale = PREPROCESS_GRAYSCALE
+        self.preprocess_auto_crop = PREPROCESS_AUTO_CROP
+        self.preprocess_crop_threshold = PREPROCESS_CROP_THRESHOLD
+        self.preprocess_crop_padding = PREPROCESS_CROP_PADDING
+        self.annotation_image_max_side = ANNOTATION_IMAGE_MAX_SIDE
+
+        # Page deduplication
+        self.page_filter_enabled = PAGE_FILTER_ENABLED
+        self.blank_page_ink_ratio = BLANK_PAGE_INK_RATIO
+        self.page_hash_size = PAGE_HASH_SIZE
+        self.page_hash_max_distance = PAGE_HASH_MAX_DISTANCE
+        self.page_pixel_max_difference = PAGE_PIXEL_MAX_DIFFERENCE
+        self.page_cache_persist = PAGE_CACHE_PERSIST
+
+        # Streaming pipeline
+        self.pipeline_streaming = PIPELINE_STREAMING
+        self.streaming_queue_size = STREAMING_QUEUE_SIZE
+
+        # Incremental processing
+        self.incremental_processing = INCREMENTAL_PROCESSING
+
+        # Results storage
+        self.export_json_results = EXPORT_JSON_RESULTS
+
+        # Search
+        self.search_match_modes = SEARCH_MATCH_MODES
+        self.search_proximity_words = SEARCH_PROXIMITY_WORDS
+        self.search_cache_size = SEARCH_CACHE_SIZE
+        self.search_disk_cache = SEARCH_DISK_CACHE
+        self.search_batch_max_queries = SEARCH_BATCH_MAX_QUERIES
+        self.search_filter_scan_ratio = SEARCH_FILTER_SCAN_RATIO
+
+        # Annotation rendering
+        self.eager_annotation = EAGER_ANNOTATION
+        self.annotation_cache_size = ANNOTATION_CACHE_SIZE
+        self.annotation_jpeg_quality = ANNOTATION_JPEG_QUALITY
+
+        # Uploads
+        self.upload_max_bytes = UPLOAD_MAX_BYTES
+        self.upload_max_archive_members = UPLOAD_MAX_ARCHIVE_MEMBERS
+        self.upload_max_extracted_bytes = UPLOAD_MAX_EXTRACTED_BYTES
+        self.upload_manifest_source = UPLOAD_MANIFEST_SOURCE
+
+        # Background jobs
+        self.job_workers = JOB_WORKERS
+        self.job_poll_interval = JOB_POLL_INTERVAL_SECONDS
+        self.job_progress_interval = JOB_PROGRESS_INTERVAL_SECONDS
+
         # Base folders
         self.data_folder_path = DATA_FOLDER_PATH
         self.artifact_folder_path = ARTIFACTS_FOLDER_PATH
 
+        # Run-scoped workspace so concurrent pipeline runs never share intermediate files;
+        # without a run id everything lives directly under artifacts/ as before
+        self.run_id = run_id
+        self.run_artifact_folder_path = (
+            os.path.join(ARTIFACTS_FOLDER_PATH, "runs", run_id) if run_id else ARTIFACTS_FOLDER_PATH
+        )
+        # Serializes manifest updates and results store publishing across runs and processes
+        self.publish_lock_path = os.path.join(ARTIFACTS_FOLDER_PATH, "publish.lock")
+
 
 class DataTransformationConfig:
     def __init__(self, config: ConfigEntity):
         # Base folders
         self.data_folder_path = config.data_folder_path
         self.artifact_folder_path = config.artifact_folder_path
+        self.run_id = config.run_id
 
         # Data transformation main folder
         self.data_transformation_folder_path = os.path.join(
-            self.artifact_folder_path, "data_transformation"
+            config.run_artifact_folder_path, "data_transformation"
         )
         os.makedirs(self.data_transformation_folder_path, exist_ok=True)
 
@@ -45,19 +129,79 @@ class DataTransformationConfig:
         )
         os.makedirs(self.images_folder, exist_ok=True)
 
+        # Per-worker LibreOffice user profiles, shared by all runs
+        self.libreoffice_profiles_folder = os.path.join(
+            self.artifact_folder_path, "libreoffice_profiles"
+        )
+        os.makedirs(self.libreoffice_profiles_folder, exist_ok=True)
+
         # Supported extensions
         self.supported_doc_extenctions = config.supported_doc_extenctions
         self.supported_img_extenctions = config.supported_img_extenctions
 
+        # Conversion settings
+        self.conversion_max_workers = config.conversion_max_workers
+        self.conversion_timeout = config.conversion_timeout
+
+        # Rasterization settings
+        self.raster_dpi = config.raster_dpi
+        self.raster_thread_count = config.raster_thread_count
+        self.raster_chunk_pages = config.raster_chunk_pages
+        self.detection_input_size = config.detection_input_size
+        self.raster_detection_scale = config.raster_detection_scale
+        self.preprocess_grayscale = config.preprocess_grayscale
+        self.annotation_image_max_side = config.annotation_image_max_side
+        self.annotation_jpeg_quality = config.annotation_jpeg_quality
+
+        # Bounded queue size between streaming stages
+        self.streaming_queue_size = config.streaming_queue_size
+
+        # Incremental processing
+        self.incremental_processing = config.incremental_processing
+
+class UploadIngestionConfig:
+    def __init__(self, config: ConfigEntity):
+        self.run_id = config.run_id
+        self.run_folder = config.run_artifact_folder_path
+
+        # Uploaded files land in the run's own input folder, which the pipeline then reads
+        self.input_folder = os.path.join(config.run_artifact_folder_path, "input")
+        os.makedirs(self.input_folder, exist_ok=True)
+
+        # Archives are written here while they arrive and removed once extracted
+        self.staging_folder = os.path.join(config.run_artifact_folder_path, "upload_staging")
+        os.makedirs(self.staging_folder, exist_ok=True)
+
+        # Supported extensions
+        self.supported_doc_extenctions = config.supported_doc_extenctions
+        self.supported_img_extenctions = config.supported_img_extenctions
+
+        # Limits
+        self.upload_max_bytes = config.upload_max_bytes
+        self.upload_max_archive_members = config.upload_max_archive_members
+        self.upload_max_extracted_bytes = config.upload_max_extracted_bytes
+
+        # Incremental processing source shared by all uploads
+        self.manifest_source = config.upload_manifest_source
+
 class DataDetectionConfig:
     def __init__(self, config: ConfigEntity):
         # Base folders
         self.data_folder_path = config.data_folder_path
         self.artifact_folder_path = config.artifact_folder_path
+        self.run_id = config.run_id
+
+        # Page images and PDFs written by this run's data transformation
+        self.images_folder = os.path.join(
+            config.run_artifact_folder_path, "data_transformation", "images"
+        )
+        self.documents_folder = os.path.join(
+            config.run_artifact_folder_path, "data_transformation", "documents"
+        )
 
         # Data detection main folder
         self.data_detection_folder_path = os.path.join(
-            self.artifact_folder_path, "data_detection", "annotated_images"
+            config.run_artifact_folder_path, "data_detection", "annotated_images"
         )
         os.makedirs(self.data_detection_folder_path, exist_ok=True)
 
@@ -69,6 +213,12 @@ class DataDetectionConfig:
             self.data_detection_folder_path, "output_json"
         )
         os.makedirs(self.output_json_folder, exist_ok=True)
+        # The published corpus is shared by all runs
+        self.results_store_folder = os.path.join(
+            self.artifact_folder_path, "data_detection", "annotated_images", "results_store"
+        )
+        os.makedirs(self.results_store_folder, exist_ok=True)
+        self.export_json_results = config.export_json_results
 
         # Models and their configs
         self.data_detection_model = config.data_detection_model
@@ -76,6 +226,37 @@ class DataDetectionConfig:
         self.pretrained = config.pretrained
         self.assume_straight_text = config.assume_straight_text
         self.export_as_straingt_boxes = config.export_as_straingt_boxes
+        self.ocr_backend = config.ocr_backend
+        self.onnx_models_folder = config.onnx_models_folder
+        self.onnx_quantized = config.onnx_quantized
+        self.onnx_intra_op_threads = config.onnx_intra_op_threads
+        self.warmup_page_size = config.warmup_page_size
+        self.detection_batch_size = config.detection_batch_size
+        self.detection_batch_pixel_budget = config.detection_batch_pixel_budget
+        self.detection_num_workers = config.detection_num_workers
+        self.detection_torch_threads = config.detection_torch_threads
+        self.eager_annotation = config.eager_annotation
+
+        # Page preprocessing before the predictor
+        self.preprocess_auto_crop = config.preprocess_auto_crop
+        self.preprocess_crop_threshold = config.preprocess_crop_threshold
+        self.preprocess_crop_padding = config.preprocess_crop_padding
+
+        # Embedded PDF text used instead of OCR where it is usable
+        self.text_layer_enabled = config.text_layer_enabled
+        self.text_layer_min_words = config.text_layer_min_words
+        self.text_layer_timeout = config.text_layer_timeout
+
+        # Blank page skipping and reuse of near-duplicate pages' words
+        self.page_filter_enabled = config.page_filter_enabled
+        self.blank_page_ink_ratio = config.blank_page_ink_ratio
+        self.page_hash_size = config.page_hash_size
+        self.page_hash_max_distance = config.page_hash_max_distance
+        self.page_pixel_max_difference = config.page_pixel_max_difference
+        # Shared by all runs, keyed by the OCR settings as well as the page hash
+        self.page_cache_folder = (
+            os.path.join(self.artifact_folder_path, "page_cache") if config.page_cache_persist else None
+        )
 
 class DataSearchConfig:
     def __init__(self, config: ConfigEntity):
@@ -95,4 +276,32 @@ class DataSearchConfig:
             "annotated_images",
             "output_json",
             "final_output.json"
-        )
\ No newline at end of file
+        )
+
+        # Columnar results store and inverted index published by detection
+        self.results_store_folder = os.path.join(
+            self.artifact_folder_path,
+            "data_detection",
+            "annotated_images",
+            "results_store"
+        )
+
+        # Annotated pages: written eagerly per search, or rendered on request and cached
+        self.eager_annotation = config.eager_annotation
+        self.annotation_cache_size = config.annotation_cache_size
+        self.annotation_jpeg_quality = config.annotation_jpeg_quality
+
+        # Phrase and proximity search
+        self.search_match_modes = config.search_match_modes
+        self.search_proximity_words = config.search_proximity_words
+
+        # Search result cache
+        self.search_cache_size = config.search_cache_size
+        self.search_disk_cache = config.search_disk_cache
+        self.search_cache_folder = os.path.join(self.data_search_folder_path, "cache")
+
+        # Batch queries
+        self.search_batch_max_queries = config.search_batch_max_queries
+
+        # Document, page, confidence and region filters
+        self.search_filter_scan_ratio = config.search_filter_scan_ratio
@@ -14,6 +14,10 @@ class WordSearchException(Exception):
     
     def __str__(self):
         return f"Error occurred in Python Script: [{self.file_name}] at line number [{self.line_number}]. Error message: [{self.error_message}]"
+
+
+class ResultsNotFoundError(LookupError):
+    """No OCR results store has been published yet; the API answers it with a 404."""
         
 
 
@@ -0,0 +1,244 @@
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.entity.config_entity import ConfigEntity
+from src.pipeline.pipeline import TrainPipeline
+from src.components.model_registry import ModelRegistry
+from src.components.processing_manifest import ProcessingManifest
+from src.utils.progress import ProgressTracker
+
+
+class JobStore:
+    """SQLite-backed queue of pipeline runs shared by every API worker process on the host."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    folder_path TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    worker_host TEXT,
+                    worker_pid INTEGER,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived autocommit connection per call keeps the store usable from any thread
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, folder_path, options, job_id=None):
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, state, folder_path, options, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, folder_path, json.dumps(options), now, now)
+            )
+        return job_id
+
+    def claim_next(self):
+        """Atomically move the oldest queued job to running for this process and return it."""
+        with self._connect() as conn:
+            # IMMEDIATE takes the write lock up front so two workers can't claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, folder_path, options FROM jobs WHERE state = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET state = 'running', worker_host = ?, worker_pid = ?, updated_at = ? WHERE id = ?",
+                        (socket.gethostname(), os.getpid(), time.time(), row[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        return {"id": row[0], "folder_path": row[1], "options": json.loads(row[2])}
+
+    def requeue_orphans(self):
+        """Put back jobs whose worker process on this host died mid-run."""
+        hostname = socket.gethostname()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, worker_pid FROM jobs WHERE state = 'running' AND worker_host = ?", (hostname,)
+            ).fetchall()
+            orphans = [job_id for job_id, pid in rows if not self._pid_alive(pid)]
+            for job_id in orphans:
+                conn.execute(
+                    "UPDATE jobs SET state = 'queued', worker_pid = NULL, updated_at = ? WHERE id = ? AND state = 'running'",
+                    (time.time(), job_id)
+                )
+        if orphans:
+            logger.logger.info(f"Re-queued {len(orphans)} jobs left running by dead workers: {orphans}")
+        return orphans
+
+    @staticmethod
+    def _pid_alive(pid):
+        if pid is None:
+            return False
+        if pid == os.getpid():
+            # Our own pid on startup means a previous incarnation that reused it
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        for key in ("progress", "result"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, state, folder_path, options, progress, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "state": row[1],
+            "folder_path": row[2],
+            "options": json.loads(row[3]),
+            "progress": json.loads(row[4]) if row[4] else {},
+            "result": json.loads(row[5]) if row[5] else None,
+            "error": row[6],
+            "created_at": row[7],
+            "updated_at": row[8]
+        }
+
+
+class JobManager:
+    """Bounded pool of background threads that execute queued pipeline runs off the event loop."""
+
+    def __init__(self, model=None, config: ConfigEntity = None):
+        config = config or ConfigEntity()
+        # Without a model, each job takes the registry's when it runs
+        self.model = model
+        self.num_workers = max(1, config.job_workers)
+        self.poll_interval = config.job_poll_interval
+        self.progress_interval = config.job_progress_interval
+        self.store = JobStore(os.path.join(config.artifact_folder_path, "jobs", "jobs.db"))
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.store.requeue_orphans()
+        for worker in range(self.num_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"pipeline-job-{worker}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.logger.info(f"Started {self.num_workers} pipeline job workers")
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    def submit(self, folder_path, streaming=None, job_id=None, source=None):
+        """Queue a run; pass the run id as `job_id` when its workspace already holds the input.
+
+        `source` is the manifest source the folder's files are added to, for uploads.
+        """
+        options = {"streaming": streaming}
+        if source is not None:
+            options["source"] = source
+        job_id = self.store.enqueue(folder_path, options, job_id=job_id)
+        self._wakeup.set()
+        logger.logger.info(f"Queued pipeline job {job_id} for {folder_path}")
+        return job_id
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                job = self.store.claim_next()
+            except Exception as e:
+                logger.logger.error(f"Could not claim a pipeline job: {str(e)}")
+                job = None
+
+            if job is None:
+                # Also polls, so jobs queued by other worker processes get picked up
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run_job(job)
+
+    def _run_job(self, job):
+        job_id = job["id"]
+        last_write = [0.0]
+
+        def on_progress(snapshot):
+            # Throttle the SQLite writes; the final snapshot is written when the job ends
+            now = time.time()
+            if now - last_write[0] >= self.progress_interval:
+                last_write[0] = now
+                self.store.update(job_id, progress=snapshot)
+
+        progress = ProgressTracker(listener=on_progress)
+        try:
+            logger.logger.info(f"Running pipeline job {job_id}")
+            model = self.model if self.model is not None else ModelRegistry.get_model()
+            transformation_artifact, detection_artifact = TrainPipeline(model=model).run_pipeline(
+                job["folder_path"], streaming=job["options"].get("streaming"), progress=progress,
+                run_id=job_id, source=job["options"].get("source")
+            )
+            self.store.update(
+                job_id,
+                state="succeeded",
+                progress=progress.snapshot(),
+                result={
+                    "data_transformation": asdict(transformation_artifact),
+                    "data_detection": asdict(detection_artifact),
+                    "timings": progress.timings()
+                }
+            )
+            logger.logger.info(f"Pipeline job {job_id} succeeded")
+
+        except Exception as e:
+            error = e if isinstance(e, WordSearchException) else WordSearchException(str(e), sys)
+            self.store.update(job_id, state="failed", progress=progress.snapshot(), error=str(error))
+            logger.logger.error(f"Pipeline job {job_id} failed: {str(error)}")
+
+        finally:
+            # run_pipeline marks its own runs, but the job may fail before reaching it (no model)
+            ProcessingManifest.mark_run_finished(ConfigEntity(run_id=job_id))
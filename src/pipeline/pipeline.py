@@ -1,30 +1,88 @@
+import os
 import sys
+import time
+import uuid
+from datetime import datetime
 from src.exception.exception import WordSearchException
 from src.logging import logger
 from src.components.data_transformation import DataTransformation
 from src.components.data_detection import DataDetection
+from src.entity.config_entity import ConfigEntity
+from src.components.processing_manifest import ProcessingManifest
+from src.pipeline.streaming_pipeline import StreamingPipeline
+from src.utils.file_lock import file_lock
+from src.utils.progress import ProgressTracker
+from src.utils.metrics import PIPELINE_RUN_SECONDS
 
 
 class TrainPipeline:
-    def __init__(self):
-        self.data_transformation = DataTransformation()
-        self.data_detection = DataDetection()
+    def __init__(self, model=None):
+        self.model = model
 
-    def run_pipeline(self, data_path):
+    @staticmethod
+    def new_run_id():
+        return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+    def run_pipeline(self, data_path, streaming=None, progress=None, run_id=None, source=None):
+        """Run the pipeline over a folder; pass a ProgressTracker to read its per-stage timings after.
+
+        `source` records the folder's files under that manifest source instead of the folder (uploads).
+        """
+        start = time.perf_counter()
+        progress = progress or ProgressTracker()
+        config = ConfigEntity(run_id=run_id or self.new_run_id())
+        if streaming is None:
+            streaming = config.pipeline_streaming
+        mode = "streaming" if streaming else "batch"
+        try:
+            return self._run(config, data_path, streaming, progress, source)
+        finally:
+            ProcessingManifest.mark_run_finished(config)
+            seconds = time.perf_counter() - start
+            PIPELINE_RUN_SECONDS.observe(seconds, mode=mode)
+            progress.add_time("pipeline", seconds)
+
+    def _run(self, config, data_path, streaming, progress, source):
         try:
-            logger.logger.info("=== Data Pipeline Started ===")
+            if streaming:
+                return StreamingPipeline(
+                    data_path, model=self.model, progress=progress, config_entity=config, source=source
+                ).run_pipeline()
+
+            logger.logger.info(f"=== Data Pipeline Started (run {config.run_id}) ===")
 
             # ---------------- Data Transformation ----------------
-            transformer = DataTransformation(data_folder_path=data_path)
-            transformation_artifact = transformer.initiate_data_transformation()
+            transformer = DataTransformation(data_folder_path=data_path, progress=progress, config_entity=config)
+            tasks = transformer.collect_input_files()
+
+            # Only new or changed files go through conversion and OCR
+            manifest = ProcessingManifest(config) if config.incremental_processing else None
+            if manifest is not None:
+                tasks = manifest.plan(data_path, tasks, source)
+
+            # Pages are rendered while they are OCR'd, straight from pdftoppm's PPM into memory
+            transformation_artifact = transformer.initiate_data_transformation(tasks)
 
             logger.logger.info("Data Transformation Completed")
             logger.logger.info(f"Extracted Images Folder: {transformation_artifact.image_file_path}")
             logger.logger.info(f"Converted Documents Folder: {transformation_artifact.converted_document_file_path}")
 
             # ---------------- Data Detection ----------------
-            detector = DataDetection()
-            detection_artifact = detector.initiate_data_detection()
+            detector = DataDetection(model=self.model, progress=progress, config_entity=config)
+            results = detector.detect_documents(transformer.render_documents([
+                os.path.join(transformer.config.documents_folder, f"{doc_name}.pdf")
+                for doc_name in transformation_artifact.converted_documents
+            ]))
+            if manifest is None:
+                with file_lock(config.publish_lock_path):
+                    detection_artifact = detector.save_results(results)
+            else:
+                with file_lock(config.publish_lock_path):
+                    results, image_folders = manifest.record_run(
+                        data_path, tasks, transformation_artifact.converted_documents, results,
+                        transformer.config.images_folder
+                    )
+                    detection_artifact = detector.save_results(results, image_folders)
 
             logger.logger.info("Data Detection Completed")
             logger.logger.info(f"Detection Results File: {detection_artifact.output_json_file_path}")
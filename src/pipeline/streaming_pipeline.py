@@ -0,0 +1,245 @@
+import os
+import sys
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.exception.exception import WordSearchException
+from src.logging import logger
+from src.components.data_transformation import DataTransformation
+from src.components.data_detection import DataDetection
+from src.components.parallel_detection import ParallelDetectionEngine
+from src.components.processing_manifest import ProcessingManifest
+from src.entity.artifact_entity import DataTransformationArtifact
+from src.entity.config_entity import ConfigEntity
+from src.utils.memory_utils import peak_rss_mb
+from src.utils.progress import ProgressTracker
+from src.utils.file_lock import file_lock
+
+# Marks the end of a stage's output on its queue
+_DONE = object()
+
+
+class StreamingPipeline:
+    """Overlap convert -> rasterize -> OCR -> annotate -> index through bounded in-memory queues."""
+
+    def __init__(self, data_path, model=None, progress=None, config_entity: ConfigEntity = None, source=None):
+        self.data_path = data_path
+        self.source = source
+        self.config = config_entity or ConfigEntity()
+        self.progress = progress or ProgressTracker()
+        self.transformer = DataTransformation(
+            data_folder_path=data_path, progress=self.progress, config_entity=self.config
+        )
+        self.detector = DataDetection(model=model, progress=self.progress, config_entity=self.config)
+        self.converted_documents = []
+        # Position of each converted document among the input files, and the pages in render order,
+        # so results are indexed in the batch pipeline's order whatever order conversions finish in
+        self.document_order = {}
+        self.page_order = []
+        # Word records of pages read from the PDF text layer, waiting for the OCR stage to pass them on
+        self.text_pages = {}
+
+        queue_size = max(1, self.transformer.config.streaming_queue_size)
+        self.pdf_queue = queue.Queue(maxsize=queue_size)
+        self.page_queue = queue.Queue(maxsize=queue_size)
+        self.annotate_queue = queue.Queue(maxsize=queue_size)
+        self.errors = []
+        # Queues whose end marker has already been consumed
+        self.closed_queues = set()
+
+    def _get(self, source_queue, block=True):
+        item = source_queue.get(block=block)
+        if item is _DONE:
+            self.closed_queues.add(source_queue)
+        return item
+
+    def _convert_stage(self, tasks):
+        self.progress.set_total("convert", len(tasks))
+        with ThreadPoolExecutor(max_workers=self.transformer.scheduler.max_workers) as executor:
+            futures = {
+                executor.submit(self.transformer.convert_file, task): position for position, task in enumerate(tasks)
+            }
+            # Hand PDFs downstream as soon as each finishes, not in submission order
+            for future in as_completed(futures):
+                pdf_path = future.result()
+                if pdf_path is not None:
+                    doc_name = os.path.splitext(os.path.basename(pdf_path))[0]
+                    self.converted_documents.append(doc_name)
+                    self.document_order[doc_name] = futures[future]
+                    self.pdf_queue.put(pdf_path)
+
+    def _rasterize_stage(self):
+        queued_pages = 0
+        while (pdf_path := self._get(self.pdf_queue)) is not _DONE:
+            doc_name = os.path.splitext(os.path.basename(pdf_path))[0]
+            doc_image_folder = self.transformer.document_image_folder(pdf_path)
+            # Filled before the pages are queued, so the OCR stage always sees them
+            self.text_pages.update(self.detector.document_text_layer(pdf_path))
+            for image_path, page in self.transformer.render_pages(pdf_path, doc_image_folder):
+                # The OCR total grows as pages are found, documents are rendered one at a time
+                queued_pages += 1
+                self.progress.set_total("ocr", queued_pages)
+                self.page_order.append((doc_name, os.path.basename(image_path)))
+                # Blocks while OCR is behind; this backpressure caps the pages in flight
+                self.page_queue.put((doc_name, os.path.basename(image_path), image_path, page))
+
+    def _next_batch(self):
+        """Wait for one page, then top the batch up with whatever is already queued."""
+        batch_size = max(1, self.detector.config.detection_batch_size)
+        job = self._get(self.page_queue)
+        if job is _DONE:
+            return None, True
+
+        batch = [job]
+        while len(batch) < batch_size:
+            try:
+                job = self._get(self.page_queue, block=False)
+            except queue.Empty:
+                break
+            if job is _DONE:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _ocr_batches(self, in_flight, duplicates):
+        """Yield the batches of queued pages that need the model, passing every other page on to annotation.
+
+        Each yielded batch is appended to `in_flight`; near-duplicates of a page being OCR'd are
+        appended to `duplicates` until its words come back.
+        """
+        finished = False
+        while not finished:
+            batch, finished = self._next_batch()
+            if not batch:
+                continue
+            text_jobs = [job for job in batch if job[:2] in self.text_pages]
+            ocr_jobs = [job for job in batch if job[:2] not in self.text_pages]
+            # Rendered pages are dropped from the jobs here, annotation reads the saved copies
+            if text_jobs:
+                self.annotate_queue.put(
+                    ([job[:3] for job in text_jobs], [self.text_pages.pop(job[:2]) for job in text_jobs])
+                )
+            # Blank pages and near-duplicates of an earlier page skip the model too
+            ocr_jobs, screened, batch_duplicates = self.detector.screen_pages(ocr_jobs)
+            if screened:
+                self.annotate_queue.put(
+                    ([job[:3] for job, _ in screened], [page_words for _, page_words in screened])
+                )
+            duplicates.extend((job[:3], key) for job, key in batch_duplicates)
+            self.progress.advance("ocr", len(text_jobs) + len(screened))
+            if ocr_jobs:
+                in_flight.append(ocr_jobs)
+                yield ocr_jobs
+
+    def _ocr_stage(self):
+        """OCR the queued pages, on DETECTION_NUM_WORKERS worker processes when it is above 1."""
+        # Batches handed to OCR whose words have not come back yet, in order
+        in_flight = deque()
+        duplicates = []
+        # Words of the pages OCR'd so far, for their duplicates
+        ocr_pages = {}
+        if self.detector.config.detection_num_workers > 1:
+            engine = ParallelDetectionEngine(
+                num_workers=self.detector.config.detection_num_workers,
+                torch_threads=self.detector.config.detection_torch_threads
+            )
+            batch_outputs = engine.run(self._ocr_batches(in_flight, duplicates))
+        else:
+            batch_outputs = (self.detector.run_ocr(batch) for batch in self._ocr_batches(in_flight, duplicates))
+
+        for batch_words, seconds in batch_outputs:
+            ocr_jobs = in_flight.popleft()
+            self.detector.record_ocr(ocr_jobs, batch_words, seconds)
+            self.detector.remember_pages(ocr_jobs, batch_words)
+            self.annotate_queue.put(([job[:3] for job in ocr_jobs], batch_words))
+            self.progress.advance("ocr", len(ocr_jobs))
+            ocr_pages.update((job[:2], page_words) for job, page_words in zip(ocr_jobs, batch_words))
+            self._pass_duplicates(duplicates, ocr_pages)
+        # Duplicates screened after the last batch went out
+        self._pass_duplicates(duplicates, ocr_pages)
+
+    def _pass_duplicates(self, duplicates, ocr_pages):
+        """Hand the duplicates whose twin has been OCR'd to annotation, leaving the rest in `duplicates`."""
+        ready = [duplicate for duplicate in duplicates if duplicate[1] in ocr_pages]
+        if ready:
+            duplicates[:] = [duplicate for duplicate in duplicates if duplicate[1] not in ocr_pages]
+            self.annotate_queue.put(([job for job, _ in ready], self.detector.duplicate_words(ready, ocr_pages)))
+            self.progress.advance("ocr", len(ready))
+
+    def _annotate_stage(self, pages):
+        while (item := self._get(self.annotate_queue)) is not _DONE:
+            batch, batch_words = item
+            for job, page_words in zip(batch, batch_words):
+                self.detector.annotate_job(job, page_words)
+                pages[job[:2]] = page_words
+
+    def _run_stage(self, name, target, input_queue, output_queue, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            logger.logger.error(f"Streaming stage '{name}' failed: {str(e)}")
+            self.errors.append(e)
+            # Keep draining the input so producers blocked on a full queue can finish
+            if input_queue is not None and input_queue not in self.closed_queues:
+                while self._get(input_queue) is not _DONE:
+                    pass
+        finally:
+            if output_queue is not None:
+                output_queue.put(_DONE)
+
+    def run_pipeline(self):
+        try:
+            logger.logger.info(f"=== Streaming Data Pipeline Started (run {self.config.run_id}) ===")
+
+            tasks = self.transformer.collect_input_files()
+            manifest = None
+            if self.transformer.config.incremental_processing:
+                manifest = ProcessingManifest(self.config)
+                tasks = manifest.plan(self.data_path, tasks, self.source)
+
+            pages = {}
+            stages = [
+                threading.Thread(target=self._run_stage, args=("convert", self._convert_stage, None, self.pdf_queue, tasks)),
+                threading.Thread(target=self._run_stage, args=("rasterize", self._rasterize_stage, self.pdf_queue, self.page_queue)),
+                threading.Thread(target=self._run_stage, args=("ocr", self._ocr_stage, self.page_queue, self.annotate_queue)),
+                threading.Thread(target=self._run_stage, args=("annotate", self._annotate_stage, self.annotate_queue, None, pages)),
+            ]
+            for stage in stages:
+                stage.start()
+            for stage in stages:
+                stage.join()
+
+            if self.errors:
+                raise self.errors[0]
+
+            # Index stage: documents in input order and their pages in render order, as in the
+            # batch pipeline (the stable sort keeps each document's pages in order)
+            results = []
+            for key in sorted(self.page_order, key=lambda key: self.document_order[key[0]]):
+                results.extend(pages[key])
+            with file_lock(self.config.publish_lock_path):
+                image_folders = None
+                if manifest is not None:
+                    results, image_folders = manifest.record_run(
+                        self.data_path, tasks, self.converted_documents, results,
+                        self.transformer.config.images_folder
+                    )
+                detection_artifact = self.detector.save_results(results, image_folders)
+
+            transformation_artifact = DataTransformationArtifact(
+                image_file_path=self.transformer.config.images_folder,
+                converted_document_file_path=self.transformer.config.documents_folder,
+                peak_rss_mb=peak_rss_mb(),
+                converted_documents=self.converted_documents,
+                run_id=self.config.run_id
+            )
+
+            logger.logger.info(f"Streaming pipeline processed {len(pages)} pages")
+            logger.logger.info("=== Streaming Data Pipeline Completed ===")
+
+            return transformation_artifact, detection_artifact
+
+        except Exception as e:
+            raise WordSearchException(str(e), sys) from e
@@ -0,0 +1,15 @@
+import os
+import fcntl
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Exclusive advisory lock on `lock_path`, held across threads and processes on this host."""
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,141 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Upper bounds in seconds, wide enough for a 1 ms index lookup and a 5 minute LibreOffice conversion
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_text(labels, extra=None):
+    pairs = list(labels) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts, sum, count]
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f"{self.name}_bucket{_label_text(key, {'le': bound})} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_label_text(key, {'le': '+Inf'})} {count}")
+                lines.append(f"{self.name}_sum{_label_text(key)} {total}")
+                lines.append(f"{self.name}_count{_label_text(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms, rendered in the Prometheus text exposition format.
+
+    Each API worker process keeps its own values; Prometheus sums them across scrape targets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation):
+        return self._register(Counter(name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+CONVERSION_SECONDS = registry.histogram(
+    "wordsearch_conversion_seconds", "Time to turn one input file into a PDF, by input kind and outcome"
+)
+RASTERIZE_PAGE_SECONDS = registry.histogram(
+    "wordsearch_rasterize_page_seconds", "pdftoppm time per rendered page"
+)
+OCR_BATCH_SECONDS = registry.histogram(
+    "wordsearch_ocr_batch_seconds", "OCR predictor time per batch of pages"
+)
+OCR_PAGE_SECONDS = registry.histogram(
+    "wordsearch_ocr_page_seconds", "OCR predictor time per page (batch time split evenly over its pages)"
+)
+TEXT_LAYER_SECONDS = registry.histogram(
+    "wordsearch_text_layer_seconds", "pdftotext time per document read for its embedded text"
+)
+PAGE_FILTER_SECONDS = registry.histogram(
+    "wordsearch_page_filter_seconds", "Blank and duplicate page screening time per group of pages"
+)
+ANNOTATION_SECONDS = registry.histogram(
+    "wordsearch_annotation_seconds", "Time to draw and encode one annotated page, by caller"
+)
+SEARCH_MATCH_SECONDS = registry.histogram(
+    "wordsearch_index_lookup_seconds", "Index and fuzzy matching time per uncached query, by match mode"
+)
+INDEX_BUILD_SECONDS = registry.histogram(
+    "wordsearch_index_build_seconds", "Time to write and index a results store version"
+)
+PIPELINE_RUN_SECONDS = registry.histogram(
+    "wordsearch_pipeline_run_seconds", "Wall time of a whole pipeline run, by mode",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+)
+FILES_TOTAL = registry.counter("wordsearch_files_total", "Input files converted, by input kind and outcome")
+PAGES_TOTAL = registry.counter("wordsearch_pages_total", "Pages processed, by stage")
+WORDS_TOTAL = registry.counter("wordsearch_words_total", "Words extracted from pages, by source (ocr, text_layer, duplicate)")
+CACHE_REQUESTS_TOTAL = registry.counter("wordsearch_cache_requests_total", "Cache lookups, by cache and result")
@@ -0,0 +1,59 @@
+import threading
+
+
+class ProgressTracker:
+    """Thread-safe per-stage progress counters, pushed to an optional listener on every change.
+
+    Also sums the time spent per stage in this run, for the run's timing summary.
+    """
+
+    def __init__(self, listener=None):
+        self._lock = threading.Lock()
+        self.listener = listener
+        self.stages = {}
+        self._timings = {}
+
+    def _stage(self, stage):
+        return self.stages.setdefault(stage, {"done": 0, "total": None})
+
+    def set_total(self, stage, total):
+        with self._lock:
+            self._stage(stage)["total"] = total
+            snapshot = self._snapshot()
+        self._notify(snapshot)
+
+    def advance(self, stage, count=1):
+        with self._lock:
+            self._stage(stage)["done"] += count
+            snapshot = self._snapshot()
+        self._notify(snapshot)
+
+    def add_time(self, stage, seconds, count=1):
+        """Record `seconds` spent on `count` items of a stage (no listener call, this is hot-path)."""
+        with self._lock:
+            timing = self._timings.setdefault(stage, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            timing["count"] += count
+            timing["total_seconds"] += seconds
+            timing["max_seconds"] = max(timing["max_seconds"], seconds / max(1, count))
+
+    def timings(self):
+        """Per-stage item count, total and mean/max seconds per item."""
+        with self._lock:
+            return {
+                stage: {
+                    **timing,
+                    "mean_seconds": timing["total_seconds"] / timing["count"] if timing["count"] else 0.0
+                }
+                for stage, timing in self._timings.items()
+            }
+
+    def _snapshot(self):
+        return {stage: dict(counters) for stage, counters in self.stages.items()}
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+
+    def _notify(self, snapshot):
+        if self.listener is not None:
+            self.listener(snapshot)